@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from .tokens import TokenUser, read_access_token, revocations
+
+
+def get_token_cache_settings():
+    options = {
+        "ALIAS": "default",
+        "MAX_ENTRIES": 10000,
+        "TIMEOUT": 60,
+        "ALLOW_PROCESS_LOCAL": False,
+    }
+    options.update(getattr(settings, "TOKEN_AUTH_CACHE", {}))
+    return options
+
+
+def shared_cache(alias):
+    """Whether entries under ``alias`` are seen by every process"""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def token_cache_enabled():
+    """Snapshots are only safe where revocation marks reach every process"""
+    options = get_token_cache_settings()
+    return options["ALLOW_PROCESS_LOCAL"] or shared_cache(options["ALIAS"])
+
+
+def now_us():
+    # Microseconds keep a revocation and a read in the same millisecond apart
+    return time.time_ns() // 1000
+
+
+def revocation_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def revoke_cached_tokens(user_id):
+    """Reject every cached authentication of ``user_id`` made before now
+
+    The mark lives in the shared ALIAS cache so all processes see it. It
+    only has to outlive the snapshots it rejects; a missing mark rejects
+    them too.
+    """
+    options = get_token_cache_settings()
+    caches[options["ALIAS"]].set(
+        revocation_key(user_id), now_us(), options["TIMEOUT"] + 1
+    )
+
+
+def track_revocations(user_id, read_at):
+    """Start a missing mark just before a fresh read, which it must accept"""
+    options = get_token_cache_settings()
+    caches[options["ALIAS"]].add(
+        revocation_key(user_id), read_at - 1, options["TIMEOUT"] + 1
+    )
+
+
+def revoked_at(user_id):
+    options = get_token_cache_settings()
+    cache = caches[options["ALIAS"]]
+    key = revocation_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        # A lost mark may have been a revocation: reject older snapshots
+        cache.add(key, now_us(), options["TIMEOUT"] + 1)
+        value = cache.get(key)
+    return value
+
+
+class TokenCache:
+    """Bounded LRU of token key -> (user snapshot, time it was read)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        max_entries = get_token_cache_settings()["MAX_ENTRIES"]
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication answering repeat requests without a query
+
+    A successful lookup stores the user's column values under the token for
+    TOKEN_AUTH_CACHE["TIMEOUT"] seconds. A hit rebuilds the user from them
+    and checks one cache key: user saves and token deletions (logout,
+    password change, deactivation) stamp it, which rejects every snapshot
+    read before the stamp, in every process. With a process-local ALIAS
+    (LocMemCache) other processes would miss the stamp, so snapshots are
+    not used unless ALLOW_PROCESS_LOCAL says the site runs in one process.
+    """
+
+    def authenticate_credentials(self, key):
+        if not token_cache_enabled():
+            return super().authenticate_credentials(key)
+        entry = token_cache.get(key)
+        if entry is not None:
+            db, values, read_at = entry
+            user = self.restore_user(db, values)
+            timeout = get_token_cache_settings()["TIMEOUT"] * 1_000_000
+            if now_us() - read_at <= timeout and read_at > revoked_at(user.pk):
+                return user, self.get_model()(key=key, user=user)
+            token_cache.delete(key)
+
+        # Stamped before the query: a revocation committed while it runs is
+        # stamped later and therefore still rejects this snapshot
+        read_at = now_us()
+        user, token = super().authenticate_credentials(key)
+        track_revocations(user.pk, read_at)
+        token_cache.set(key, (user._state.db, self.snapshot(user), read_at))
+        return user, token
+
+    def snapshot(self, user):
+        return tuple(
+            getattr(user, field.attname) for field in user._meta.concrete_fields
+        )
+
+    def restore_user(self, db, values):
+        User = get_user_model()
+        names = [field.attname for field in User._meta.concrete_fields]
+        return User.from_db(db, names, values)
+
+
+class SignedAccessAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <access token>`` verified without the database
+
+    The token's signature and age are checked, then its issue time against
+    the in-memory revocation list. request.user is a TokenUser, which only
+    loads the row if the view reads more than its id.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid bearer header.")
+
+        try:
+            claims = read_access_token(auth[1].decode())
+        except signing.SignatureExpired:
+            raise AuthenticationFailed("Access token expired.")
+        except (signing.BadSignature, UnicodeError):
+            raise AuthenticationFailed("Invalid access token.")
+
+        revoked = revocations.revoked_until(claims["u"])
+        if revoked is not None and claims["t"] <= revoked:
+            raise AuthenticationFailed("Access token revoked.")
+        return TokenUser(claims["u"]), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("email", "username")
+
+
+def get_availability_settings():
+    options = {
+        "CAPACITY": 100000,
+        "ERROR_RATE": 0.01,
+        "SYNC_INTERVAL": 5,
+        "THROTTLE_RATE": "30/min",
+    }
+    options.update(getattr(settings, "ACCOUNT_AVAILABILITY", {}))
+    return options
+
+
+class BloomFilter:
+    """Set of strings answering "definitely absent" or "possibly present"
+
+    Sized for ``capacity`` values at ``error_rate`` false positives; past
+    capacity the false positive rate climbs, it never gives false negatives.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(
+            64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # k positions from the two halves of one digest (double hashing)
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        positions = self.positions(value)
+        if not self._all_set(positions):
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def _all_set(self, positions):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, value):
+        return self._all_set(self.positions(value))
+
+    @property
+    def overfull(self):
+        return self.count > self.capacity
+
+
+class AvailabilityFilter:
+    """Bloom filters over every user's lowercased email and username
+
+    A miss means the value is free, answered without a query; a possible
+    hit is confirmed with exists(). Users saved in this process are added
+    on commit, those created by other processes are picked up every
+    SYNC_INTERVAL seconds with one query for ids above the highest loaded.
+    Nothing is removed: a freed email or username stays a false positive
+    the database clears, until the next rebuild. While cold (or past
+    capacity) the filters are built on a background thread and cold
+    lookups go to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filters = None
+        self._last_id = 0
+        self._synced_at = None
+        self._warming = False
+        self._pending = None
+
+    @property
+    def ready(self):
+        return self._filters is not None
+
+    def rebuild(self):
+        """Load every user and swap the filters in"""
+        options = get_availability_settings()
+        with self._lock:
+            if self._pending is None:
+                self._pending = []
+        User = get_user_model()
+        capacity = max(options["CAPACITY"], 2 * User.objects.count())
+        filters = {
+            field: BloomFilter(capacity, options["ERROR_RATE"]) for field in FIELDS
+        }
+        last_id = 0
+        rows = User.objects.order_by().values_list("id", *FIELDS)
+        for user_id, *values in rows.iterator(chunk_size=2000):
+            for field, value in zip(FIELDS, values):
+                filters[field].add(value.lower())
+            last_id = max(last_id, user_id)
+
+        with self._lock:
+            # Replay saves that committed while the filters were loading
+            for values in self._pending or ():
+                for field, value in zip(FIELDS, values):
+                    filters[field].add(value)
+            self._filters = filters
+            self._last_id = last_id
+            self._synced_at = time.monotonic()
+            self._pending = None
+
+    def warm_async(self):
+        """Build the filters on a background thread unless one is running"""
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+            self._pending = []
+
+        def target():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Failed to build account availability filters")
+            finally:
+                self._warming = False
+                connection.close()
+
+        threading.Thread(
+            target=target, name="availability-filter", daemon=True
+        ).start()
+
+    def sync(self):
+        """Add the users other processes created since the last load"""
+        rows = (
+            get_user_model()
+            .objects.filter(id__gt=self._last_id)
+            .order_by()
+            .values_list("id", *FIELDS)
+        )
+        with self._lock:
+            self._synced_at = time.monotonic()
+        for user_id, *values in rows:
+            self.add(*values)
+            with self._lock:
+                self._last_id = max(self._last_id, user_id)
+
+    def add(self, email, username):
+        values = (email.lower(), username.lower())
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(values)
+            if self._filters is None:
+                return
+            for field, value in zip(FIELDS, values):
+                self._filters[field].add(value)
+            overfull = any(f.overfull for f in self._filters.values())
+        if overfull:
+            self.warm_async()
+
+    def might_exist(self, field, value):
+        """False only if no user has ``value`` (lowercased) as ``field``"""
+        if self._filters is None:
+            self.warm_async()
+            return True
+        interval = get_availability_settings()["SYNC_INTERVAL"]
+        if time.monotonic() - self._synced_at >= interval:
+            self.sync()
+        return value.lower() in self._filters[field]
+
+    def clear(self):
+        with self._lock:
+            self._filters = None
+            self._last_id = 0
+            self._synced_at = None
+
+
+availability = AvailabilityFilter()
+
+
+def email_taken(email):
+    email = email.lower()
+    return (
+        availability.might_exist("email", email)
+        and get_user_model().objects.filter(email=email).exists()
+    )
+
+
+def username_taken(username):
+    username = username.lower()
+    return (
+        availability.might_exist("username", username)
+        and get_user_model().objects.filter(username=username).exists()
+    )
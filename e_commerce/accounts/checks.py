@@ -0,0 +1,22 @@
+from django.core.checks import Warning, register
+
+from .authentication import get_token_cache_settings, token_cache_enabled
+
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """Warn when token snapshots are off because the cache is process-local"""
+    if token_cache_enabled():
+        return []
+    alias = get_token_cache_settings()["ALIAS"]
+    return [
+        Warning(
+            f"TOKEN_AUTH_CACHE uses the process-local cache {alias!r}, so token "
+            "snapshots are disabled and every request queries the token.",
+            hint=(
+                "Point TOKEN_AUTH_CACHE['ALIAS'] at a shared cache, or set "
+                "ALLOW_PROCESS_LOCAL if the site runs in a single process."
+            ),
+            id="accounts.W001",
+        )
+    ]
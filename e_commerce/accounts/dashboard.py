@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_dashboard_cache_settings():
+    options = {"ALIAS": "default", "TIMEOUT": 300}
+    options.update(getattr(settings, "DASHBOARD_CACHE", {}))
+    return options
+
+
+def get_cache():
+    return caches[get_dashboard_cache_settings()["ALIAS"]]
+
+
+def version_key(user_id):
+    return f"accounts:dashboard:version:{user_id}"
+
+
+def get_version(user_id):
+    cache = get_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an old version
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_dashboard(user_id):
+    """Make the user's cached dashboard unreachable, in every process"""
+    cache = get_cache()
+    key = version_key(user_id)
+    now = time.time_ns() // 1000
+    current = cache.get(key)
+    if current is None or current < now:
+        cache.set(key, now, timeout=None)
+    else:
+        cache.incr(key)
+
+
+def invalidate_dashboard_on_commit(user_id):
+    # After commit, so a rebuild cannot read the data being changed
+    transaction.on_commit(lambda: invalidate_dashboard(user_id))
+
+
+def load_dashboard_user(user_id):
+    """The user with everything the dashboard shows, in two queries
+
+    The profile is joined (None when missing) and the addresses prefetched;
+    the order count is the total_orders column the orders app maintains.
+    """
+    return (
+        get_user_model()
+        .objects.select_related("profile")
+        .prefetch_related("addresses")
+        .get(pk=user_id)
+    )
+
+
+def cached_dashboard(user_id, build):
+    """``build(user)``'s data, cached until the user's dashboard changes
+
+    The key carries the per-user version read before building, so data
+    built from rows that change meanwhile is stored under a stale key.
+    """
+    cache = get_cache()
+    key = f"accounts:dashboard:{user_id}:{get_version(user_id)}"
+    data = cache.get(key)
+    if data is None:
+        data = dict(build(load_dashboard_user(user_id)))
+        cache.set(key, data, get_dashboard_cache_settings()["TIMEOUT"])
+    return data
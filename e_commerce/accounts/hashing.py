@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+def get_password_hashing_settings():
+    options = {"WORKERS": 2, "MAX_QUEUE": 32, "MAX_WAIT": 2.0}
+    options.update(getattr(settings, "PASSWORD_HASHING", {}))
+    return options
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins in progress, try again shortly."
+    default_code = "password_hashing_busy"
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class HashingStats:
+    """Per-process counters and recent queue/hash timings of the pool"""
+
+    def __init__(self, samples=1000):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {"completed": 0, "rejected": 0, "expired": 0}
+            self._queue_ms = deque(maxlen=self.samples)
+            self._hash_ms = deque(maxlen=self.samples)
+
+    def record(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def timed(self, queued, hashed):
+        with self._lock:
+            self.counters["completed"] += 1
+            self._queue_ms.append(queued * 1000)
+            self._hash_ms.append(hashed * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.counters)
+            timings = {
+                "queue_ms": sorted(self._queue_ms),
+                "hash_ms": sorted(self._hash_ms),
+            }
+        for name, ordered in timings.items():
+            data[name] = (
+                {
+                    "p50": round(percentile(ordered, 0.5), 3),
+                    "p95": round(percentile(ordered, 0.95), 3),
+                    "max": round(ordered[-1], 3),
+                }
+                if ordered
+                else None
+            )
+        return data
+
+
+class PasswordHasherPool:
+    """A few dedicated threads for password hashing
+
+    PBKDF2 is deliberately slow; run on request threads, a burst of logins
+    holds every worker and starves catalog traffic. Here at most WORKERS
+    hashes run at once, at most MAX_QUEUE more wait, and anything beyond
+    is refused at once with PasswordHashingBusy (503). A hash still queued
+    after MAX_WAIT seconds is refused too, as its client has likely given up.
+    Sync callers block on the result; async callers await it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._workers = None
+        self._in_flight = 0
+        self.stats = HashingStats()
+
+    def get_executor(self, workers):
+        # Called with the lock held; a settings change starts a new pool
+        if self._workers != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="password-hashing"
+            )
+            self._workers = workers
+        return self._executor
+
+    def submit(self, func, *args):
+        options = get_password_hashing_settings()
+        with self._lock:
+            if self._in_flight >= options["WORKERS"] + options["MAX_QUEUE"]:
+                self.stats.record("rejected")
+                raise PasswordHashingBusy()
+            self._in_flight += 1
+            return self.get_executor(options["WORKERS"]).submit(
+                self.call, time.perf_counter(), options["MAX_WAIT"], func, *args
+            )
+
+    def call(self, submitted, max_wait, func, *args):
+        started = time.perf_counter()
+        try:
+            if started - submitted > max_wait:
+                self.stats.record("expired")
+                raise PasswordHashingBusy()
+            result = func(*args)
+            self.stats.timed(started - submitted, time.perf_counter() - started)
+            return result
+        finally:
+            # Before the caller sees the result, so it can submit again at once
+            with self._lock:
+                self._in_flight -= 1
+
+    def run(self, func, *args):
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+
+hasher_pool = PasswordHasherPool()
+
+
+def hash_password(raw_password):
+    return hasher_pool.run(hashers.make_password, raw_password)
+
+
+async def ahash_password(raw_password):
+    return await hasher_pool.arun(hashers.make_password, raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """(is_correct, must_update), as django.contrib.auth.hashers returns"""
+    return hasher_pool.run(hashers.verify_password, raw_password, encoded)
+
+
+async def averify_password(raw_password, encoded):
+    return await hasher_pool.arun(hashers.verify_password, raw_password, encoded)
+
+
+def hashing_snapshot():
+    options = get_password_hashing_settings()
+    return {
+        "workers": options["WORKERS"],
+        "max_queue": options["MAX_QUEUE"],
+        "in_flight": hasher_pool.in_flight,
+        **hasher_pool.stats.snapshot(),
+    }
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+
+from products.query_plans import hot_query
+
+from .models import Address
+
+
+@hot_query("address_default")
+def address_default():
+    # Address.save() clearing the previous default address
+    return Address.objects.filter(user_id=1, address_type="shipping", is_default=True)
+
+
+@hot_query("address_list")
+def address_list():
+    return Address.objects.filter(user_id=1)
+
+
+@hot_query("user_by_email")
+def user_by_email():
+    return get_user_model().objects.filter(email="user@example.com")
@@ -0,0 +1,90 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+from accounts.authentication import token_cache
+from accounts.tokens import issue_tokens, revocations
+
+ENDPOINTS = {
+    # Authenticates the request, never reads the user
+    "products": "/api/products/?page_size=1",
+    # Serializes the user
+    "user-info": "/api/auth/user-info/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare authenticated requests/sec with database tokens (with and "
+        "without the token cache) and signed access tokens"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+        )
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        # The benchmark user and its tokens are rolled back afterwards
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email="bench-auth@example.com", username="bench-auth", password="x"
+            )
+            token = Token.objects.create(user=user)
+            access = issue_tokens(user)["access"]
+            modes = {
+                "anonymous": ({}, None),
+                "token (uncached)": (
+                    {"HTTP_AUTHORIZATION": f"Token {token.key}"},
+                    {"MAX_ENTRIES": 0},
+                ),
+                "token (cached)": ({"HTTP_AUTHORIZATION": f"Token {token.key}"}, {}),
+                "signed": ({"HTTP_AUTHORIZATION": f"Bearer {access}"}, {}),
+            }
+            for name in options["endpoints"]:
+                for mode, (headers, cache_settings) in modes.items():
+                    if name == "user-info" and mode == "anonymous":
+                        continue
+                    self.report(
+                        name,
+                        mode,
+                        self.run(
+                            ENDPOINTS[name],
+                            headers,
+                            cache_settings,
+                            options["requests"],
+                        ),
+                    )
+            transaction.set_rollback(True)
+        token_cache.clear()
+        revocations.clear()
+
+    def run(self, path, headers, cache_settings, count):
+        client = Client(**headers)
+        token_cache.clear()
+        revocations.reload()
+        # One process, so the local cache's revocation marks reach every reader
+        cache_settings = {"ALLOW_PROCESS_LOCAL": True, **(cache_settings or {})}
+        with override_settings(TOKEN_AUTH_CACHE=cache_settings):
+            # Warm the response, token and revocation caches
+            client.get(path)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                statuses = [client.get(path).status_code for _ in range(count)]
+                elapsed = time.perf_counter() - started
+        errors = sum(status != 200 for status in statuses)
+        return count, elapsed, len(queries), errors
+
+    def report(self, name, mode, outcome):
+        count, elapsed, queries, errors = outcome
+        self.stdout.write(
+            f"{name:10} {mode:17}  {count / elapsed:7.0f} req/s  "
+            f"{queries / count:5.2f} queries/request  {errors} errors"
+        )
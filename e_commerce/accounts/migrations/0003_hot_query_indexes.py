@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_total_orders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(condition=models.Q(('is_default', True)), fields=['user', 'address_type'], name='address_default_idx'),
+        ),
+    ]
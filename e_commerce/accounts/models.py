@@ -1,7 +1,32 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .hashing import (
+    ahash_password,
+    averify_password,
+    hash_password,
+    verify_password,
+)
+
+
+class UserManager(DjangoUserManager):
+    """Creates users with the password hashed on the hashing pool"""
+
+    def _create_user(self, username, email, password, **extra_fields):
+        user = self._create_user_object(username, email, None, **extra_fields)
+        if password is not None:
+            user.password = hash_password(password)
+        user.save(using=self._db)
+        return user
+
+    async def _acreate_user(self, username, email, password, **extra_fields):
+        user = self._create_user_object(username, email, None, **extra_fields)
+        if password is not None:
+            user.password = await ahash_password(password)
+        await user.asave(using=self._db)
+        return user
+
 
 class User(AbstractUser):
     """Extended User model with additional fields"""
@@ -10,6 +35,8 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=15, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     is_email_verified = models.BooleanField(default=False)
+    # Maintained by the orders app's signals
+    total_orders = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,6 +44,8 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
 
+    objects = UserManager()
+
     def __str__(self):
         return f"{self.email} - {self.get_full_name()}"
 
@@ -24,6 +53,34 @@ class User(AbstractUser):
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
 
+    # Hashing runs on the bounded pool of accounts.hashing, so every caller
+    # (authentication backends, create_user, password changes) goes through it
+
+    def set_password(self, raw_password):
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes
+            self._password = None
+            self.save(update_fields=["password"])
+        return is_correct
+
+    async def aset_password(self, raw_password):
+        self.password = await ahash_password(raw_password)
+        self._password = raw_password
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await averify_password(raw_password, self.password)
+        if is_correct and must_update:
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+        return is_correct
+
 
 class UserProfile(models.Model):
     """User profile with additional information"""
@@ -74,6 +131,14 @@ class Address(models.Model):
     class Meta:
         verbose_name_plural = "Addresses"
         ordering = ["-is_default", "-created_at"]
+        indexes = [
+            # Address.save() clears the previous default of the same type
+            models.Index(
+                fields=["user", "address_type"],
+                condition=models.Q(is_default=True),
+                name="address_default_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.get_address_type_display()}"
@@ -85,3 +150,41 @@ class Address(models.Model):
                 user=self.user, address_type=self.address_type, is_default=True
             ).update(is_default=False)
         super().save(*args, **kwargs)
+
+
+class RefreshToken(models.Model):
+    """Single-use refresh token of the signed token auth mode
+
+    Only a SHA-256 digest of the token is stored. Each use replaces it with
+    a new token of the same family; presenting a used token again revokes
+    the whole family, since someone else holds its replacement.
+    """
+
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="refresh_tokens"
+    )
+    digest = models.CharField(max_length=64, unique=True)
+    family = models.UUIDField(db_index=True)
+    expires_at = models.DateTimeField()
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.family}"
+
+
+class AccessRevocation(models.Model):
+    """Signed access tokens of a user issued up to ``revoked_at`` are invalid
+
+    Rows only matter while such tokens could still be unexpired, so the
+    table stays as small as the revocations of one access token lifetime.
+    """
+
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="+"
+    )
+    revoked_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.revoked_at}"
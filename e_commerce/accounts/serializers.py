@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from .availability import email_taken, username_taken
 from .models import UserProfile, Address
 
 User = get_user_model()
@@ -36,12 +38,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_email(self, value):
-        if User.objects.filter(email=value.lower()).exists():
+        if email_taken(value):
             raise serializers.ValidationError("A user with this email already exists.")
         return value.lower()
 
     def validate_username(self, value):
-        if User.objects.filter(username=value.lower()).exists():
+        if username_taken(value):
             raise serializers.ValidationError(
                 "A user with this username already exists."
             )
@@ -51,7 +53,15 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop("password_confirm")
         password = validated_data.pop("password")
 
-        user = User.objects.create_user(password=password, **validated_data)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(password=password, **validated_data)
+        except IntegrityError:
+            # Taken since validation, or by a user another process has not
+            # yet shared with this one's availability filter
+            raise serializers.ValidationError(
+                "A user with this email or username already exists."
+            )
 
         # Create user profile
         UserProfile.objects.create(user=user)
@@ -201,12 +211,17 @@ class PasswordChangeSerializer(serializers.Serializer):
         return user
 
 
+class TokenRefreshSerializer(serializers.Serializer):
+    """Refresh token to exchange in the signed token auth mode"""
+
+    refresh = serializers.CharField(write_only=True)
+
+
 class UserDashboardSerializer(serializers.ModelSerializer):
     """Comprehensive user data for dashboard"""
 
     profile = UserProfileSerializer(read_only=True)
     addresses = AddressSerializer(many=True, read_only=True)
-    total_orders = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -222,7 +237,4 @@ class UserDashboardSerializer(serializers.ModelSerializer):
             "addresses",
             "total_orders",
         ]
-
-    def get_total_orders(self, obj):
-        # This will be implemented when we add orders functionality
-        return 0
+        read_only_fields = ["total_orders"]
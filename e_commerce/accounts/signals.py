@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import revoke_cached_tokens, token_cache
+from .availability import availability
+from .dashboard import invalidate_dashboard_on_commit
+from .models import Address, UserProfile
+
+User = get_user_model()
+
+
+def _revoke_on_commit(user_id):
+    # Stamped after commit, so snapshots read before it are all rejected
+    transaction.on_commit(lambda: revoke_cached_tokens(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_user_tokens(sender, instance, **kwargs):
+    """Password changes, deactivation and profile edits drop cached logins"""
+    _revoke_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def revoke_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+    _revoke_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def track_taken_names(sender, instance, **kwargs):
+    """Keep the availability filter covering new emails and usernames"""
+    email, username = instance.email, instance.username
+    transaction.on_commit(lambda: availability.add(email, username))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def invalidate_owner_dashboard(sender, instance, **kwargs):
+    """Profile and address edits change the owner's dashboard"""
+    invalidate_dashboard_on_commit(instance.user_id)
@@ -1,3 +1,502 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from .authentication import (
+    CachedTokenAuthentication,
+    SignedAccessAuthentication,
+    revoke_cached_tokens,
+    token_cache,
+)
+from .availability import BloomFilter, availability
+from .checks import check_token_cache
+from .hashing import PasswordHashingBusy, hasher_pool
+from .models import AccessRevocation, Address, RefreshToken, UserProfile
+from .tokens import revocations
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Repeat token logins skip the database until the user or token changes"""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="shopper@example.com", username="shopper", password="old-pass-123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def authenticate(self):
+        request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Token {self.token.key}"
+        )
+        return CachedTokenAuthentication().authenticate(request)
+
+    def test_hit_costs_no_queries(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "shopper@example.com")
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_logout_revokes_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/auth/logout/")
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivation_revokes_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/auth/deactivate/", {"password": "old-pass-123"}
+            )
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_password_change_refreshes_snapshot(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/auth/change-password/",
+                {
+                    "old_password": "old-pass-123",
+                    "new_password": "new-pass-456!",
+                    "new_password_confirm": "new-pass-456!",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        self.assertTrue(user.check_password("new-pass-456!"))
+
+    def test_revocation_from_another_process(self):
+        self.authenticate()
+        # Only the shared mark changes, as when another worker saves the user
+        revoke_cached_tokens(self.user.pk)
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_lost_revocation_mark_rejects_snapshot(self):
+        self.authenticate()
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    @override_settings(TOKEN_AUTH_CACHE={"TIMEOUT": 0, "ALLOW_PROCESS_LOCAL": True})
+    def test_snapshots_expire(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    @override_settings(TOKEN_AUTH_CACHE={"MAX_ENTRIES": 1, "ALLOW_PROCESS_LOCAL": True})
+    def test_cache_is_bounded(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="x"
+        )
+        other_token = Token.objects.create(user=other)
+        self.authenticate()
+        CachedTokenAuthentication().authenticate_credentials(other_token.key)
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
+
+    def test_process_local_cache_is_not_trusted(self):
+        with override_settings(TOKEN_AUTH_CACHE={}):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    self.authenticate()
+            self.assertIsNone(token_cache.get(self.token.key))
+            self.assertEqual(
+                [warning.id for warning in check_token_cache(None)], ["accounts.W001"]
+            )
+        self.assertEqual(check_token_cache(None), [])
+
+
+class SignedTokenTests(TestCase):
+    """Signed access tokens verify without queries; refresh tokens rotate"""
+
+    def setUp(self):
+        revocations.clear()
+        self.user = get_user_model().objects.create_user(
+            email="signed@example.com", username="signed", password="old-pass-123"
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {
+                "email": "signed@example.com",
+                "password": "old-pass-123",
+                "auth_mode": "signed",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def authenticate(self, access):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return SignedAccessAuthentication().authenticate(request)
+
+    def test_login_issues_signed_tokens(self):
+        data = self.login()
+        self.assertEqual(data["token_type"], "Bearer")
+        self.assertNotIn("token", data)
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(RefreshToken.objects.filter(user=self.user).count(), 1)
+
+        revocations.reload()
+        with self.assertNumQueries(0):
+            user, claims = self.authenticate(data["access"])
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual(user.pk, self.user.pk)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+        response = self.client.get("/api/auth/user-info/")
+        self.assertEqual(response.data["user"]["email"], "signed@example.com")
+
+    def test_token_mode_is_the_default(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": "signed@example.com", "password": "old-pass-123"},
+        )
+        self.assertEqual(response.data["token"], Token.objects.get().key)
+
+    def test_unknown_mode_is_rejected_before_registering(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "email": "new@example.com",
+                "username": "new",
+                "first_name": "New",
+                "last_name": "User",
+                "password": "a-long-pass-123",
+                "password_confirm": "a-long-pass-123",
+                "auth_mode": "jwt",
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("auth_mode", response.data)
+        self.assertFalse(get_user_model().objects.filter(username="new").exists())
+
+    def test_tampered_and_expired_tokens(self):
+        access = self.login()["access"]
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access[:-1] + ("A" if access[-1] != "A" else "B"))
+        later = time.time() + 301
+        with mock.patch("django.core.signing.time.time", return_value=later):
+            with self.assertRaisesMessage(AuthenticationFailed, "expired"):
+                self.authenticate(access)
+
+    def test_refresh_rotates_and_detects_reuse(self):
+        first = self.login()
+        response = self.client.post(
+            "/api/auth/token/refresh/", {"refresh": first["refresh"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        second = response.data
+        self.assertNotEqual(second["refresh"], first["refresh"])
+
+        # Replaying the used token revokes its whole family
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/auth/token/refresh/", {"refresh": first["refresh"]}
+            )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            "/api/auth/token/refresh/", {"refresh": second["refresh"]}
+        )
+        self.assertEqual(response.status_code, 401)
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(second["access"])
+
+    def test_logout_revokes_tokens(self):
+        data = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post("/api/auth/logout/").status_code, 200)
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(data["access"])
+        response = self.client.post(
+            "/api/auth/token/refresh/", {"refresh": data["refresh"]}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocation_from_another_process(self):
+        access = self.login()["access"]
+        AccessRevocation.objects.create(user=self.user, revoked_at=timezone.now())
+        revocations.reload()
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(access)
+
+    def test_password_change_reissues_tokens(self):
+        data = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/auth/change-password/",
+                {
+                    "old_password": "old-pass-123",
+                    "new_password": "new-pass-456!",
+                    "new_password_confirm": "new-pass-456!",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaisesMessage(AuthenticationFailed, "revoked"):
+            self.authenticate(data["access"])
+        user, claims = self.authenticate(response.data["access"])
+        self.assertTrue(user.check_password("new-pass-456!"))
+
+
+class PasswordHashingPoolTests(TestCase):
+    """Password hashing runs on a bounded pool that refuses work when full"""
+
+    def setUp(self):
+        hasher_pool.stats.reset()
+        self.user = get_user_model().objects.create_user(
+            email="pool@example.com", username="pool", password="old-pass-123"
+        )
+        self.client = APIClient()
+
+    def block_workers(self, count):
+        """Occupy ``count`` pool threads; returns the function freeing them"""
+        release = threading.Event()
+        started = threading.Barrier(count + 1)
+
+        def hold():
+            started.wait()
+            release.wait()
+
+        held = [hasher_pool.submit(hold) for _ in range(count)]
+        started.wait()
+
+        def unblock():
+            release.set()
+            for future in held:
+                future.result()
+
+        self.addCleanup(unblock)
+        return unblock
+
+    def login(self):
+        return self.client.post(
+            "/api/auth/login/",
+            {"email": "pool@example.com", "password": "old-pass-123"},
+        )
+
+    def test_hashes_run_on_the_pool(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertFalse(self.user.check_password("wrong"))
+        names = []
+        hasher_pool.run(lambda: names.append(threading.current_thread().name))
+        self.assertTrue(names[0].startswith("password-hashing"))
+
+        snapshot = hasher_pool.stats.snapshot()
+        # create_user, login, wrong password, and the probe
+        self.assertEqual(snapshot["completed"], 4)
+        self.assertGreater(snapshot["hash_ms"]["max"], 0)
+        self.assertIsNotNone(snapshot["queue_ms"])
+
+    @override_settings(PASSWORD_HASHING={"WORKERS": 1, "MAX_QUEUE": 0})
+    def test_saturated_pool_rejects_fast(self):
+        unblock = self.block_workers(1)
+        response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(hasher_pool.stats.snapshot()["rejected"], 1)
+
+        unblock()
+        self.assertEqual(self.login().status_code, 200)
+
+    @override_settings(PASSWORD_HASHING={"WORKERS": 1, "MAX_WAIT": 0.01})
+    def test_stale_queued_hash_is_dropped(self):
+        unblock = self.block_workers(1)
+        future = hasher_pool.submit(time.sleep, 0)
+        time.sleep(0.05)
+        unblock()
+        with self.assertRaises(PasswordHashingBusy):
+            future.result()
+        self.assertEqual(hasher_pool.stats.snapshot()["expired"], 1)
+
+    async def test_async_check_password(self):
+        user = await get_user_model().objects.aget(pk=self.user.pk)
+        self.assertTrue(await user.acheck_password("old-pass-123"))
+        self.assertFalse(await user.acheck_password("wrong"))
+
+    def test_stats_are_admin_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/auth/hashing/stats/")
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/auth/hashing/stats/")
+        self.assertEqual(response.data["workers"], 2)
+        self.assertEqual(response.data["in_flight"], 0)
+
+
+class AvailabilityFilterTests(TestCase):
+    """Free emails and usernames are answered from memory, taken ones by SQL"""
+
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.User.objects.create_user(
+            email="taken@example.com", username="taken", password="x"
+        )
+        availability.rebuild()
+        self.addCleanup(availability.clear)
+        self.client = APIClient()
+
+    def check(self, field, value):
+        response = self.client.post(f"/api/auth/check-{field}/", {field: value})
+        self.assertEqual(response.status_code, 200)
+        return response.data["is_available"]
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}@example.com")
+        self.assertTrue(all(f"user{i}@example.com" in bloom for i in range(1000)))
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_free_values_skip_the_database(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check("email", "free@example.com"))
+            self.assertTrue(self.check("username", "free"))
+        with self.assertNumQueries(1):
+            self.assertFalse(self.check("email", "Taken@Example.com"))
+        self.assertFalse(self.check("username", "TAKEN"))
+
+    def test_saved_users_are_added(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.User.objects.create_user(
+                email="fresh@example.com", username="fresh", password="x"
+            )
+        self.assertFalse(self.check("email", "fresh@example.com"))
+        self.assertFalse(self.check("username", "fresh"))
+
+    def test_users_of_other_processes_are_synced(self):
+        # bulk_create sends no post_save, as for a user another process saved
+        self.User.objects.bulk_create(
+            [self.User(email="remote@example.com", username="remote")]
+        )
+        self.assertTrue(self.check("email", "remote@example.com"))
+        with override_settings(ACCOUNT_AVAILABILITY={"SYNC_INTERVAL": 0}):
+            self.assertFalse(self.check("email", "remote@example.com"))
+
+    def test_registration_of_unsynced_duplicate_is_rejected(self):
+        self.User.objects.bulk_create(
+            [self.User(email="remote@example.com", username="remote")]
+        )
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "email": "remote@example.com",
+                "username": "remote",
+                "first_name": "Re",
+                "last_name": "Mote",
+                "password": "a-long-pass-123",
+                "password_confirm": "a-long-pass-123",
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cold_filter_asks_the_database(self):
+        availability.clear()
+        with mock.patch.object(availability, "warm_async") as warm_async:
+            with self.assertNumQueries(1):
+                self.assertTrue(self.check("email", "free@example.com"))
+        warm_async.assert_called_once()
+
+    @override_settings(ACCOUNT_AVAILABILITY={"THROTTLE_RATE": "2/min"})
+    def test_checks_are_rate_limited(self):
+        self.check("email", "a@example.com")
+        self.check("username", "b")
+        response = self.client.post("/api/auth/check-email/", {"email": "c@x.com"})
+        self.assertEqual(response.status_code, 429)
+
+
+class UserDashboardTests(TestCase):
+    """The dashboard is built in two queries and cached until it changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="home@example.com", username="home", password="x"
+        )
+        UserProfile.objects.create(user=self.user, location="Lisbon")
+        for city in ("Porto", "Braga", "Faro"):
+            Address.objects.create(
+                user=self.user,
+                address_type="shipping",
+                street_address="1 Main St",
+                city=city,
+                state="-",
+                postal_code="1000",
+                country="PT",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def dashboard(self):
+        response = self.client.get("/api/auth/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_query_count(self):
+        # user joined to profile + addresses, whatever the number of addresses
+        with self.assertNumQueries(2):
+            data = self.dashboard()
+        self.assertEqual(data["profile"]["location"], "Lisbon")
+        self.assertEqual(len(data["addresses"]), 3)
+        self.assertEqual(data["total_orders"], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.dashboard(), data)
+
+    def test_missing_profile(self):
+        UserProfile.objects.all().delete()
+        with self.assertNumQueries(2):
+            self.assertIsNone(self.dashboard()["profile"])
+
+    def test_changes_invalidate(self):
+        self.dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            Address.objects.filter(city="Faro").delete()
+        self.assertEqual(len(self.dashboard()["addresses"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/api/auth/profile/", {"location": "Coimbra"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.dashboard()["profile"]["location"], "Coimbra")
+
+    def test_dashboards_are_per_user(self):
+        self.dashboard()
+        other = get_user_model().objects.create_user(
+            email="away@example.com", username="away", password="x"
+        )
+        self.client.force_authenticate(other)
+        data = self.dashboard()
+        self.assertEqual(data["email"], "away@example.com")
+        self.assertEqual(data["addresses"], [])
@@ -0,0 +1,22 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+from .availability import get_availability_settings
+
+
+class AvailabilityCheckThrottle(SimpleRateThrottle):
+    """Per-client limit on the email/username availability checks
+
+    Keyed by client address even for signed-in users, since it guards
+    against enumerating accounts.
+    """
+
+    scope = "availability"
+
+    def get_rate(self):
+        return get_availability_settings()["THROTTLE_RATE"]
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
@@ -0,0 +1,202 @@
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+
+from .models import AccessRevocation, RefreshToken
+
+ACCESS_SALT = "accounts.access"
+AUTH_MODES = ("token", "signed")
+
+
+def get_signed_token_settings():
+    options = {
+        "DEFAULT_MODE": "token",
+        "ACCESS_TTL": 300,
+        "REFRESH_TTL": 14 * 24 * 3600,
+        "REVOCATION_RELOAD": 5,
+    }
+    options.update(getattr(settings, "SIGNED_TOKENS", {}))
+    return options
+
+
+def to_us(moment):
+    """Microseconds since the epoch of an aware datetime"""
+    return round(moment.timestamp() * 1_000_000)
+
+
+def get_auth_mode(request):
+    """The credentials a login or registration asks for"""
+    mode = request.data.get("auth_mode") or get_signed_token_settings()["DEFAULT_MODE"]
+    if mode not in AUTH_MODES:
+        raise ValidationError(
+            {"auth_mode": [f"Choose one of {', '.join(AUTH_MODES)}."]}
+        )
+    return mode
+
+
+def issue_credentials(user, mode):
+    if mode == "signed":
+        return issue_tokens(user)
+    token, created = Token.objects.get_or_create(user=user)
+    return {"token": token.key}
+
+
+def issue_access_token(user):
+    """HMAC-signed (SECRET_KEY) user id and issue time"""
+    return signing.dumps({"u": user.pk, "t": to_us(timezone.now())}, salt=ACCESS_SALT)
+
+
+def read_access_token(token):
+    """Claims of a valid access token; raises signing.BadSignature otherwise"""
+    return signing.loads(
+        token, salt=ACCESS_SALT, max_age=get_signed_token_settings()["ACCESS_TTL"]
+    )
+
+
+def digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_tokens(user, family=None):
+    """A new access token and a refresh token continuing ``family``"""
+    options = get_signed_token_settings()
+    refresh = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        digest=digest(refresh),
+        family=family or uuid.uuid4(),
+        expires_at=timezone.now() + timedelta(seconds=options["REFRESH_TTL"]),
+    )
+    return {
+        "token_type": "Bearer",
+        "access": issue_access_token(user),
+        "expires_in": options["ACCESS_TTL"],
+        "refresh": refresh,
+    }
+
+
+def rotate_refresh_token(token):
+    """Exchange a refresh token for new tokens, once
+
+    A token that was already used or revoked is a replay: its family and the
+    user's access tokens are revoked before the request is refused.
+    """
+    now = timezone.now()
+    try:
+        current = RefreshToken.objects.select_related("user").get(digest=digest(token))
+    except RefreshToken.DoesNotExist:
+        raise AuthenticationFailed("Invalid refresh token.")
+
+    with transaction.atomic():
+        # Compare-and-set, so two concurrent uses cannot both succeed
+        claimed = RefreshToken.objects.filter(
+            pk=current.pk, used_at__isnull=True, revoked_at__isnull=True
+        ).update(used_at=now)
+        if claimed:
+            if current.expires_at <= now or not current.user.is_active:
+                raise AuthenticationFailed("Refresh token expired.")
+            return current.user, issue_tokens(current.user, current.family)
+        RefreshToken.objects.filter(
+            family=current.family, revoked_at__isnull=True
+        ).update(revoked_at=now)
+        revoke_access_tokens(current.user_id)
+    raise AuthenticationFailed("Refresh token already used.")
+
+
+def revoke_access_tokens(user_id):
+    """Reject the user's access tokens issued until now, in every process"""
+    now = timezone.now()
+    AccessRevocation.objects.create(user_id=user_id, revoked_at=now)
+    ttl = timedelta(seconds=get_signed_token_settings()["ACCESS_TTL"])
+    AccessRevocation.objects.filter(revoked_at__lt=now - ttl).delete()
+    transaction.on_commit(lambda: revocations.add(user_id, to_us(now)))
+
+
+def revoke_signed_tokens(user_id):
+    """Log a user out of the signed token mode on every device"""
+    RefreshToken.objects.filter(user_id=user_id, revoked_at__isnull=True).update(
+        revoked_at=timezone.now()
+    )
+    revoke_access_tokens(user_id)
+
+
+class RevocationList:
+    """In-memory user id -> latest access token revocation
+
+    Revocations made by this process apply at once; the list is reloaded
+    from AccessRevocation every REVOCATION_RELOAD seconds to pick up those
+    of other processes. Only the last ACCESS_TTL seconds are kept, older
+    tokens having expired anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._loaded_at = None
+
+    def revoked_until(self, user_id):
+        reload = get_signed_token_settings()["REVOCATION_RELOAD"]
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > reload:
+            self.reload()
+        return self._revoked.get(user_id)
+
+    def reload(self):
+        ttl = timedelta(seconds=get_signed_token_settings()["ACCESS_TTL"])
+        rows = AccessRevocation.objects.filter(
+            revoked_at__gte=timezone.now() - ttl
+        ).values_list("user_id", "revoked_at")
+        revoked = {}
+        for user_id, revoked_at in rows:
+            revoked[user_id] = max(revoked.get(user_id, 0), to_us(revoked_at))
+        with self._lock:
+            self._revoked = revoked
+            self._loaded_at = time.monotonic()
+
+    def add(self, user_id, revoked_at):
+        with self._lock:
+            self._revoked[user_id] = max(self._revoked.get(user_id, 0), revoked_at)
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._loaded_at = None
+
+
+revocations = RevocationList()
+
+
+def load_token_user(user_id):
+    try:
+        user = get_user_model().objects.get(pk=user_id)
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed("User inactive or deleted.")
+    if not user.is_active:
+        raise AuthenticationFailed("User inactive or deleted.")
+    return user
+
+
+class TokenUser(SimpleLazyObject):
+    """The user an access token names, loaded when a view first reads it
+
+    Authentication and permission checks only need the id and the
+    authenticated flag, so they never touch the database.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        super().__init__(lambda: load_token_user(user_id))
+        self.__dict__["pk"] = self.__dict__["id"] = user_id
@@ -10,6 +10,7 @@ urlpatterns = [
     path("register/", views.UserRegistrationView.as_view(), name="register"),
     path("login/", views.UserLoginView.as_view(), name="login"),
     path("logout/", views.UserLogoutView.as_view(), name="logout"),
+    path("token/refresh/", views.TokenRefreshView.as_view(), name="token_refresh"),
     # User management
     path("profile/", views.UserProfileView.as_view(), name="profile"),
     path("dashboard/", views.UserDashboardView.as_view(), name="dashboard"),
@@ -28,4 +29,9 @@ urlpatterns = [
     path("check-username/", views.check_username_availability, name="check_username"),
     # Account management
     path("deactivate/", views.AccountDeactivateView.as_view(), name="deactivate"),
+    path(
+        "hashing/stats/",
+        views.password_hashing_stats,
+        name="password_hashing_stats",
+    ),
 ]
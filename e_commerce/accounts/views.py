@@ -1,8 +1,8 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.views import APIView
 from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.signals import user_logged_in
@@ -13,9 +13,22 @@ from .serializers import (
     UserSerializer,
     AddressSerializer,
     PasswordChangeSerializer,
+    TokenRefreshSerializer,
     UserDashboardSerializer,
 )
+from .authentication import SignedAccessAuthentication
+from .availability import email_taken, username_taken
+from .dashboard import cached_dashboard, load_dashboard_user
+from .hashing import hashing_snapshot
 from .models import UserProfile, Address
+from .throttles import AvailabilityCheckThrottle
+from .tokens import (
+    get_auth_mode,
+    issue_credentials,
+    issue_tokens,
+    revoke_signed_tokens,
+    rotate_refresh_token,
+)
 
 User = get_user_model()
 
@@ -28,12 +41,13 @@ class UserRegistrationView(generics.CreateAPIView):
     permission_classes = [AllowAny]
 
     def create(self, request, *args, **kwargs):
+        mode = get_auth_mode(request)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        # Create token for immediate login
-        token, created = Token.objects.get_or_create(user=user)
+        # Issue credentials for immediate login
+        credentials = issue_credentials(user, mode)
 
         # Login user
         login(request, user)
@@ -42,7 +56,7 @@ class UserRegistrationView(generics.CreateAPIView):
             {
                 "message": "User registered successfully",
                 "user": UserSerializer(user).data,
-                "token": token.key,
+                **credentials,
             },
             status=status.HTTP_201_CREATED,
         )
@@ -74,9 +88,10 @@ class UserLoginView(APIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
+        mode = get_auth_mode(request)
 
-        # Get or create token
-        token, created = Token.objects.get_or_create(user=user)
+        # A Token row, or signed access + refresh tokens
+        credentials = issue_credentials(user, mode)
 
         # Login user
         login(request, user)
@@ -86,7 +101,7 @@ class UserLoginView(APIView):
             {
                 "message": "Login successful",
                 "user": UserSerializer(user).data,
-                "token": token.key,
+                **credentials,
             },
             status=status.HTTP_200_OK,
         )
@@ -103,6 +118,7 @@ class UserLogoutView(APIView):
             request.user.auth_token.delete()
         except Token.DoesNotExist:
             pass
+        revoke_signed_tokens(request.user.pk)
 
         logout(request)
 
@@ -127,7 +143,13 @@ class UserDashboardView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        return load_dashboard_user(self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = cached_dashboard(
+            request.user.pk, lambda user: self.get_serializer(user).data
+        )
+        return Response(data)
 
 
 class PasswordChangeView(APIView):
@@ -140,11 +162,32 @@ class PasswordChangeView(APIView):
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        user = serializer.save()
+
+        data = {"message": "Password changed successfully"}
+        # Sessions signed in with the old password end; this one continues
+        revoke_signed_tokens(user.pk)
+        if isinstance(request.successful_authenticator, SignedAccessAuthentication):
+            data.update(issue_tokens(user))
+        return Response(data, status=status.HTTP_200_OK)
 
-        return Response(
-            {"message": "Password changed successfully"}, status=status.HTTP_200_OK
-        )
+
+class TokenRefreshView(APIView):
+    """Rotate a refresh token into a new access and refresh token"""
+
+    permission_classes = [AllowAny]
+    # An expired access token in the header must not fail the request
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user, tokens = rotate_refresh_token(serializer.validated_data["refresh"])
+        return Response(tokens, status=status.HTTP_200_OK)
+
+    def get_authenticate_header(self, request):
+        # Answer a rejected refresh token with 401 rather than 403
+        return SignedAccessAuthentication.keyword
 
 
 class AddressListCreateView(generics.ListCreateAPIView):
@@ -176,8 +219,16 @@ def user_info(request):
     )
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def password_hashing_stats(request):
+    """Password hashing pool load and timings for this process"""
+    return Response(hashing_snapshot())
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AvailabilityCheckThrottle])
 def check_email_availability(request):
     """Check if email is available for registration"""
     email = request.data.get("email", "").lower().strip()
@@ -187,13 +238,15 @@ def check_email_availability(request):
             {"error": "Email is required"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    is_available = not User.objects.filter(email=email).exists()
+    # Most free emails are answered by the in-memory filter, without a query
+    is_available = not email_taken(email)
 
     return Response({"email": email, "is_available": is_available})
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([AvailabilityCheckThrottle])
 def check_username_availability(request):
     """Check if username is available for registration"""
     username = request.data.get("username", "").lower().strip()
@@ -203,7 +256,7 @@ def check_username_availability(request):
             {"error": "Username is required"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    is_available = not User.objects.filter(username=username).exists()
+    is_available = not username_taken(username)
 
     return Response({"username": username, "is_available": is_available})
 
@@ -236,6 +289,7 @@ class AccountDeactivateView(APIView):
             request.user.auth_token.delete()
         except Token.DoesNotExist:
             pass
+        revoke_signed_tokens(request.user.pk)
 
         logout(request)
 
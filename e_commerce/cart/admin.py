@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Cart, CartItem
+
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    extra = 0
+    raw_id_fields = ["product"]
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ["user", "created_at", "updated_at"]
+    search_fields = ["user__email"]
+    raw_id_fields = ["user"]
+    inlines = [CartItemInline]
@@ -0,0 +1,8 @@
+from products.query_plans import hot_query
+
+from .models import CartItem
+
+
+@hot_query("cart_items")
+def cart_items():
+    return CartItem.objects.filter(cart__user_id=1).select_related("product")
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from products.models import Product
+
+
+class Cart(models.Model):
+    """Server-side shopping cart, one per user"""
+
+    user = models.OneToOneField(
+        get_user_model(), on_delete=models.CASCADE, related_name="cart"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.email}'s Cart"
+
+
+class CartItem(models.Model):
+    """A product line in a cart"""
+
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="cart_items"
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["added_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"], name="unique_cart_product"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name}"
+
+    @property
+    def line_total(self):
+        return self.product.price * self.quantity
@@ -0,0 +1,209 @@
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import serializers
+
+from products.models import Product
+from .models import Cart, CartItem
+
+MAX_OPERATIONS = 500
+
+
+def get_cart(user):
+    """Return the user's cart with every line and its product in two queries"""
+    items = CartItem.objects.select_related("product").only(
+        "id",
+        "cart_id",
+        "quantity",
+        "added_at",
+        "product__id",
+        "product__name",
+        "product__price",
+        "product__image_url",
+        "product__stock_quantity",
+        "product__is_active",
+    )
+    cart = (
+        Cart.objects.filter(user=user)
+        .prefetch_related(Prefetch("items", queryset=items))
+        .first()
+    )
+    if cart is None:
+        cart = Cart.objects.create(user=user)
+    return cart
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    """Cart line with the product's current price and stock"""
+
+    product_id = serializers.IntegerField(source="product.id", read_only=True)
+    name = serializers.CharField(source="product.name", read_only=True)
+    price = serializers.DecimalField(
+        source="product.price", max_digits=10, decimal_places=2, read_only=True
+    )
+    image_url = serializers.URLField(source="product.image_url", read_only=True)
+    stock_quantity = serializers.IntegerField(
+        source="product.stock_quantity", read_only=True
+    )
+    is_in_stock = serializers.BooleanField(source="product.is_in_stock", read_only=True)
+    line_total = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = CartItem
+        fields = [
+            "product_id",
+            "name",
+            "price",
+            "image_url",
+            "quantity",
+            "stock_quantity",
+            "is_in_stock",
+            "line_total",
+        ]
+
+
+class CartSerializer(serializers.ModelSerializer):
+    """Cart contents and totals"""
+
+    items = CartItemSerializer(many=True, read_only=True)
+    item_count = serializers.SerializerMethodField()
+    subtotal = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Cart
+        fields = ["items", "item_count", "subtotal", "updated_at"]
+
+    def get_item_count(self, obj):
+        return sum(item.quantity for item in obj.items.all())
+
+    def get_subtotal(self, obj):
+        total = sum(item.line_total for item in obj.items.all())
+        return f"{total:.2f}"
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """One line-item operation: add to, set or remove a product's quantity"""
+
+    OPERATIONS = ["add", "set", "remove"]
+
+    op = serializers.ChoiceField(choices=OPERATIONS, default="add")
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+
+class CartOperationsSerializer(serializers.Serializer):
+    """Batch of cart operations applied atomically
+
+    The cart lines and every referenced product are loaded with one query
+    each, the batch is replayed in memory, and the result is written with
+    bulk_create/bulk_update/delete. Call inside a transaction.
+    """
+
+    operations = CartOperationSerializer(
+        many=True, allow_empty=False, max_length=MAX_OPERATIONS
+    )
+    # Reject lines that are unavailable instead of adjusting them
+    strict = True
+
+    def plan(self, operations):
+        user = self.context["request"].user
+        cart, _ = Cart.objects.get_or_create(user=user)
+        lines = {item.product_id: item for item in cart.items.select_for_update()}
+        quantities = {product_id: item.quantity for product_id, item in lines.items()}
+
+        product_ids = {operation["product_id"] for operation in operations}
+        products = Product.objects.only(
+            "id", "name", "stock_quantity", "is_active"
+        ).in_bulk(product_ids)
+
+        errors = {}
+        adjustments = []
+        for index, operation in enumerate(operations):
+            product_id = operation["product_id"]
+            product = products.get(product_id)
+            current = quantities.get(product_id, 0)
+            if operation["op"] == "remove":
+                quantities[product_id] = 0
+                continue
+            if product is None or not product.is_active:
+                if self.strict:
+                    errors[index] = "Product is not available."
+                else:
+                    adjustments.append({"product_id": product_id, "quantity": 0})
+                quantities[product_id] = 0
+                continue
+
+            wanted = current + operation["quantity"]
+            if operation["op"] == "set":
+                wanted = operation["quantity"]
+            if wanted > product.stock_quantity:
+                if self.strict:
+                    errors[index] = (
+                        f"Only {product.stock_quantity} of {product.name} in stock."
+                    )
+                    continue
+                wanted = product.stock_quantity
+                adjustments.append({"product_id": product_id, "quantity": wanted})
+            quantities[product_id] = wanted
+
+        if errors:
+            raise serializers.ValidationError({"operations": errors})
+        return cart, lines, quantities, adjustments
+
+    def validate(self, attrs):
+        cart, lines, quantities, adjustments = self.plan(attrs["operations"])
+        attrs.update(
+            cart=cart, lines=lines, quantities=quantities, adjustments=adjustments
+        )
+        return attrs
+
+    def save(self):
+        data = self.validated_data
+        cart, lines = data["cart"], data["lines"]
+        created, updated, removed = [], [], []
+        for product_id, quantity in data["quantities"].items():
+            line = lines.get(product_id)
+            if quantity <= 0:
+                if line is not None:
+                    removed.append(line.id)
+            elif line is None:
+                created.append(
+                    CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                )
+            elif line.quantity != quantity:
+                line.quantity = quantity
+                updated.append(line)
+
+        if removed:
+            CartItem.objects.filter(id__in=removed).delete()
+        if updated:
+            CartItem.objects.bulk_update(updated, ["quantity"])
+        if created:
+            CartItem.objects.bulk_create(created)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+        return cart
+
+
+class CartMergeItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CartMergeSerializer(CartOperationsSerializer):
+    """Merge an anonymous (localStorage) cart into the user's cart
+
+    Quantities are added to existing lines; unavailable products are dropped
+    and quantities capped at stock, with each change reported back.
+    """
+
+    operations = None
+    items = CartMergeItemSerializer(many=True, max_length=MAX_OPERATIONS)
+    strict = False
+
+    def validate(self, attrs):
+        attrs["operations"] = [
+            {"op": "add", "product_id": item["product_id"], "quantity": item["quantity"]}
+            for item in attrs["items"]
+        ]
+        return super().validate(attrs)
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from .models import Cart, CartItem
+
+User = get_user_model()
+
+
+class CartAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="shopper@example.com", username="shopper", password="pass12345"
+        )
+        category = Category.objects.create(name="Kitchen")
+        cls.products = [
+            Product.objects.create(
+                name=f"Mug {i}",
+                description="mug",
+                price=Decimal("10.00") + i,
+                category=category,
+                stock_quantity=5,
+            )
+            for i in range(30)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_operations(self, operations):
+        return self.client.post(
+            "/api/cart/items/", {"operations": operations}, format="json"
+        )
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/api/cart/").status_code, 401)
+
+    def test_batch_operations(self):
+        first, second, third = self.products[:3]
+        response = self.post_operations(
+            [
+                {"product_id": first.id, "quantity": 2},
+                {"product_id": second.id},
+                {"op": "add", "product_id": first.id, "quantity": 1},
+                {"op": "set", "product_id": third.id, "quantity": 4},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        quantities = {item["product_id"]: item["quantity"] for item in response.data["items"]}
+        self.assertEqual(quantities, {first.id: 3, second.id: 1, third.id: 4})
+        self.assertEqual(response.data["item_count"], 8)
+        self.assertEqual(response.data["subtotal"], f"{10 * 3 + 11 + 12 * 4:.2f}")
+
+        response = self.post_operations(
+            [
+                {"op": "remove", "product_id": second.id},
+                {"op": "set", "product_id": third.id, "quantity": 0},
+            ]
+        )
+        self.assertEqual([item["product_id"] for item in response.data["items"]], [first.id])
+
+    def test_stock_and_availability_errors_roll_back(self):
+        inactive = self.products[1]
+        Product.objects.filter(id=inactive.id).update(is_active=False)
+        response = self.post_operations(
+            [
+                {"product_id": self.products[0].id, "quantity": 1},
+                {"product_id": self.products[2].id, "quantity": 6},
+                {"product_id": inactive.id},
+                {"product_id": 999999},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data["operations"]), {1, 2, 3})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_query_count_is_flat_in_cart_size(self):
+        operations = [{"product_id": p.id, "quantity": 1} for p in self.products]
+        Cart.objects.create(user=self.user)
+        # savepoint, cart, lines, products, bulk insert, touch cart, release,
+        # then the cart and its lines joined to products
+        with self.assertNumQueries(9):
+            response = self.post_operations(operations)
+        self.assertEqual(len(response.data["items"]), 30)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/cart/")
+        self.assertEqual(response.data["item_count"], 30)
+
+    def test_merge_anonymous_cart(self):
+        first, second, third = self.products[:3]
+        self.post_operations([{"product_id": first.id, "quantity": 2}])
+        Product.objects.filter(id=third.id).update(is_active=False)
+
+        response = self.client.post(
+            "/api/cart/merge/",
+            {
+                "items": [
+                    {"product_id": first.id, "quantity": 4},
+                    {"product_id": second.id, "quantity": 1},
+                    {"product_id": third.id, "quantity": 1},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        quantities = {item["product_id"]: item["quantity"] for item in response.data["items"]}
+        # Capped at stock, unavailable product dropped
+        self.assertEqual(quantities, {first.id: 5, second.id: 1})
+        self.assertEqual(
+            response.data["adjustments"],
+            [
+                {"product_id": first.id, "quantity": 5},
+                {"product_id": third.id, "quantity": 0},
+            ],
+        )
+
+    def test_clear(self):
+        self.post_operations([{"product_id": self.products[0].id}])
+        response = self.client.post("/api/cart/clear/")
+        self.assertEqual(response.data["items"], [])
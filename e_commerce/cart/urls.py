@@ -0,0 +1,12 @@
+# cart/urls.py
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r"cart", views.CartViewSet, basename="cart")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -0,0 +1,48 @@
+from django.db import transaction
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import CartItem
+from .serializers import (
+    CartMergeSerializer,
+    CartOperationsSerializer,
+    CartSerializer,
+    get_cart,
+)
+
+
+class CartViewSet(viewsets.ViewSet):
+    """The authenticated user's cart"""
+
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        return Response(CartSerializer(get_cart(request.user)).data)
+
+    def apply(self, request, serializer_class):
+        serializer = serializer_class(data=request.data, context={"request": request})
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        data = CartSerializer(get_cart(request.user)).data
+        if serializer.validated_data["adjustments"]:
+            data["adjustments"] = serializer.validated_data["adjustments"]
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"])
+    def items(self, request):
+        """Apply a batch of add/set/remove line-item operations"""
+        return self.apply(request, CartOperationsSerializer)
+
+    @action(detail=False, methods=["post"])
+    def merge(self, request):
+        """Merge an anonymous localStorage cart after login"""
+        return self.apply(request, CartMergeSerializer)
+
+    @action(detail=False, methods=["post"])
+    def clear(self, request):
+        CartItem.objects.filter(cart__user=request.user).delete()
+        return Response(CartSerializer(get_cart(request.user)).data)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
     # Your apps - ORDER MATTERS! accounts must come before products
     "accounts",  # MOVED TO FIRST - contains custom User model
     "products",
+    "cart",
+    "orders",
 ]
 
 MIDDLEWARE = [
@@ -57,6 +60,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "products.replicas.PrimaryPinMiddleware",
 ]
 
 ROOT_URLCONF = "e_commerce.urls"
@@ -82,13 +86,60 @@ WSGI_APPLICATION = "e_commerce.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection tuning per deployment, selected with DJANGO_DATABASE_PROFILE.
+# "production" runs SQLite in WAL mode so readers never block the writer,
+# waits for the write lock instead of failing with "database is locked", takes
+# it when a transaction begins (a deferred read-then-write transaction cannot
+# wait for it) and keeps connections open across requests.
+DATABASE_PROFILES = {
+    "development": {},
+    "production": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "init_command": ";".join(
+                [
+                    "PRAGMA journal_mode=WAL",
+                    "PRAGMA busy_timeout=20000",
+                    "PRAGMA synchronous=NORMAL",
+                    # 256 MiB memory-mapped reads, 64 MiB page cache
+                    "PRAGMA mmap_size=268435456",
+                    "PRAGMA cache_size=-65536",
+                    "PRAGMA temp_store=MEMORY",
+                ]
+            ),
+        },
+    },
+}
+DATABASE_PROFILE = os.environ.get("DJANGO_DATABASE_PROFILE", "development")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        **DATABASE_PROFILES[DATABASE_PROFILE],
     }
 }
 
+# Local read replicas: DJANGO_CATALOG_REPLICAS=N adds N SQLite copies of the
+# database, refreshed by `manage.py sync_replicas`
+for number in range(1, int(os.environ.get("DJANGO_CATALOG_REPLICAS", 0)) + 1):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / f"db.replica{number}.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    }
+
+# Catalog reads of safe requests go to one of ALIASES; a client that writes
+# reads from the primary for PIN_SECONDS, see products/replicas.py
+CATALOG_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "APPS": ["products"],
+    "PIN_SECONDS": 5,
+}
+DATABASE_ROUTERS = ["products.replicas.CatalogReplicaRouter"]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -175,7 +226,10 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        # TokenAuthentication with an in-memory token -> user cache
+        "accounts.authentication.CachedTokenAuthentication",
+        # "Bearer" access tokens of the signed token mode
+        "accounts.authentication.SignedAccessAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -183,4 +237,131 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # orjson-backed JSONRenderer, see products/renderers.py
+    "DEFAULT_RENDERER_CLASSES": [
+        "products.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# Serialize product list rows from values_list() tuples instead of
+# ProductListSerializer field objects, see products/compiled.py
+PRODUCT_COMPILED_SERIALIZATION = True
+
+# Product search index: "fts5" (SQLite FTS5 table), "python" (in-process
+# inverted index) or "auto" to use FTS5 when the database supports it
+PRODUCT_SEARCH_BACKEND = "auto"
+PRODUCT_SEARCH_MAX_RESULTS = 1000
+
+# In-process autocomplete trie; bounds its memory footprint
+PRODUCT_SUGGESTIONS = {
+    "MAX_ENTRIES": 50000,
+    "MAX_DEPTH": 24,
+    "TOP_K": 10,
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; point "default" at Redis or Memcached in production
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "e_commerce",
+    }
+}
+
+# Versioned response cache for catalog reads, see products/cache.py
+CATALOG_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+    "PREFIX": "catalog",
+}
+
+# Per-process LRU of token -> user snapshots used by
+# accounts.authentication.CachedTokenAuthentication. Snapshots expire after
+# TIMEOUT seconds; revocations are marked in the ALIAS cache, which must be
+# shared (Redis, Memcached, database) for them to reach every process. With a
+# process-local ALIAS such as LocMemCache the snapshots are not used, unless
+# ALLOW_PROCESS_LOCAL declares a single-process site (runserver)
+TOKEN_AUTH_CACHE = {
+    "ALIAS": "default",
+    "MAX_ENTRIES": 10000,
+    "TIMEOUT": 60,
+    "ALLOW_PROCESS_LOCAL": DEBUG,
+}
+
+# Per-user dashboard payloads, see accounts/dashboard.py. Profile, address,
+# order and user changes invalidate them in every process through the ALIAS
+# cache; TIMEOUT bounds how long an idle entry is kept
+DASHBOARD_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Password hashing pool, see accounts/hashing.py. At most WORKERS hashes run
+# at once and MAX_QUEUE more wait; beyond that, and for hashes queued longer
+# than MAX_WAIT seconds, logins and registrations get a 503 right away
+PASSWORD_HASHING = {
+    "WORKERS": 2,
+    "MAX_QUEUE": 32,
+    "MAX_WAIT": 2.0,
+}
+
+# Email/username availability checks, see accounts/availability.py. Bloom
+# filters sized for CAPACITY users (or twice the current count) at
+# ERROR_RATE false positives; users created by other processes are picked
+# up every SYNC_INTERVAL seconds. THROTTLE_RATE limits each client address
+ACCOUNT_AVAILABILITY = {
+    "CAPACITY": 100000,
+    "ERROR_RATE": 0.01,
+    "SYNC_INTERVAL": 5,
+    "THROTTLE_RATE": "30/min",
+}
+
+# Signed token auth mode, see accounts/tokens.py. Clients choose "token"
+# (a Token row) or "signed" (short-lived HMAC-signed access tokens plus
+# rotating refresh tokens) with auth_mode at login; DEFAULT_MODE applies
+# otherwise. Revocations from other processes apply within
+# REVOCATION_RELOAD seconds
+SIGNED_TOKENS = {
+    "DEFAULT_MODE": "token",
+    "ACCESS_TTL": 300,
+    "REFRESH_TTL": 14 * 24 * 3600,
+    "REVOCATION_RELOAD": 5,
+}
+
+# Precomputed related/similar products; refreshed on a background thread
+# after product changes (set BACKGROUND to False to refresh inline)
+PRODUCT_RECOMMENDATIONS = {
+    "BACKGROUND": True,
+}
+
+# Materialized featured products, see products/featured.py. Refreshed lazily
+# after REFRESH_INTERVAL seconds, by an in-process thread when SCHEDULER is
+# True, or by `manage.py refresh_featured`
+FEATURED_PRODUCTS = {
+    "SIZE": 6,
+    "REFRESH_INTERVAL": 900,
+    "SCHEDULER": False,
+}
+
+# Stock reservations expire after RESERVATION_TTL seconds unless committed,
+# see products/inventory.py and `manage.py expire_reservations`
+INVENTORY = {
+    "RESERVATION_TTL": 900,
+}
+
+# Durable post-checkout job queue drained by `manage.py run_jobs`
+ORDER_JOBS = {
+    "WORKERS": 4,
+    "BATCH_SIZE": 10,
+    "MAX_ATTEMPTS": 5,
+    # Seconds before a job claimed by a lost worker is run again
+    "LEASE": 300,
+    "POLL_INTERVAL": 1.0,
+}
+
+ORDERS = {
+    "LOW_STOCK_THRESHOLD": 5,
 }
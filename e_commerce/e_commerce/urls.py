@@ -23,4 +23,6 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("products.urls")),  # Products API endpoints
     path("api/auth/", include("accounts.urls")),  # Authentication endpoints
+    path("api/", include("cart.urls")),  # Cart endpoints
+    path("api/", include("orders.urls")),  # Order endpoints
 ]
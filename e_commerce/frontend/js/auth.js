@@ -5,6 +5,9 @@ class AuthenticationSystem {
         this.apiUrl = 'http://127.0.0.1:8000/api/auth';
         this.currentUser = null;
         this.authToken = null;
+        // 'token' (database token) or 'signed' (short-lived access token + refresh token)
+        this.authMode = localStorage.getItem('auth_mode') || 'token';
+        this.lastChecked = { email: null, username: null };
         this.init();
         this.getCsrfToken();
         this.init();
@@ -72,6 +75,9 @@ class AuthenticationSystem {
         // Real-time validation
         document.getElementById('registerEmail').addEventListener('blur', () => this.checkEmailAvailability());
         document.getElementById('registerUsername').addEventListener('blur', () => this.checkUsernameAvailability());
+        // Check as the user types, once they pause
+        document.getElementById('registerEmail').addEventListener('input', this.debounce(() => this.checkEmailAvailability(), 400));
+        document.getElementById('registerUsername').addEventListener('input', this.debounce(() => this.checkUsernameAvailability(), 400));
 
         // Password confirmation validation
         document.getElementById('registerPasswordConfirm').addEventListener('input', () => this.validatePasswordMatch());
@@ -109,19 +115,14 @@ class AuthenticationSystem {
     async checkAuthStatus() {
         const token = localStorage.getItem('auth_token');
         if (!token) return;
+        this.authToken = token;
 
         try {
-            const response = await fetch(`${this.apiUrl}/user-info/`, {
-                headers: {
-                    'Authorization': `Token ${token}`,
-                    'Content-Type': 'application/json',
-                }
-            });
+            const response = await this.authFetch(`${this.apiUrl}/user-info/`);
 
             if (response.ok) {
                 const data = await response.json();
                 this.currentUser = data.user;
-                this.authToken = token;
                 this.updateAuthUI();
             } else {
                 this.clearAuth();
@@ -150,17 +151,15 @@ class AuthenticationSystem {
                 body: JSON.stringify({
                     email: formData.get('email'),
                     password: formData.get('password'),
+                    auth_mode: this.authMode,
                 })
             });
 
             const data = await response.json();
 
             if (response.ok) {
-                this.authToken = data.token;
+                this.storeCredentials(data);
                 this.currentUser = data.user;
-
-                // Store auth data
-                localStorage.setItem('auth_token', data.token);
                 localStorage.setItem('user_data', JSON.stringify(data.user));
 
                 this.updateAuthUI();
@@ -204,17 +203,15 @@ class AuthenticationSystem {
                     phone_number: formData.get('phone_number'),
                     password: formData.get('password'),
                     password_confirm: formData.get('password_confirm'),
+                    auth_mode: this.authMode,
                 })
             });
 
             const data = await response.json();
 
             if (response.ok) {
-                this.authToken = data.token;
+                this.storeCredentials(data);
                 this.currentUser = data.user;
-
-                // Store auth data
-                localStorage.setItem('auth_token', data.token);
                 localStorage.setItem('user_data', JSON.stringify(data.user));
 
                 this.updateAuthUI();
@@ -239,13 +236,7 @@ class AuthenticationSystem {
     async logout() {
         try {
             if (this.authToken) {
-                await fetch(`${this.apiUrl}/logout/`, {
-                    method: 'POST',
-                    headers: {
-                        'Authorization': `Token ${this.authToken}`,
-                        'Content-Type': 'application/json',
-                    }
-                });
+                await this.authFetch(`${this.apiUrl}/logout/`, { method: 'POST' });
             }
         } catch (error) {
             console.error('Logout error:', error);
@@ -259,6 +250,7 @@ class AuthenticationSystem {
         this.authToken = null;
         this.currentUser = null;
         localStorage.removeItem('auth_token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('user_data');
         this.updateAuthUI();
     }
@@ -268,12 +260,7 @@ class AuthenticationSystem {
         if (!this.authToken) return;
 
         try {
-            const response = await fetch(`${this.apiUrl}/profile/`, {
-                headers: {
-                    'Authorization': `Token ${this.authToken}`,
-                    'Content-Type': 'application/json',
-                }
-            });
+            const response = await this.authFetch(`${this.apiUrl}/profile/`);
 
             if (response.ok) {
                 const profile = await response.json();
@@ -308,12 +295,8 @@ class AuthenticationSystem {
         this.setFormLoading('profileForm', true);
 
         try {
-            const response = await fetch(`${this.apiUrl}/profile/`, {
+            const response = await this.authFetch(`${this.apiUrl}/profile/`, {
                 method: 'PATCH',
-                headers: {
-                    'Authorization': `Token ${this.authToken}`,
-                    'Content-Type': 'application/json',
-                },
                 body: JSON.stringify({
                     first_name: formData.get('first_name'),
                     last_name: formData.get('last_name'),
@@ -358,12 +341,8 @@ class AuthenticationSystem {
         this.clearFormErrors('securityForm');
 
         try {
-            const response = await fetch(`${this.apiUrl}/change-password/`, {
+            const response = await this.authFetch(`${this.apiUrl}/change-password/`, {
                 method: 'POST',
-                headers: {
-                    'Authorization': `Token ${this.authToken}`,
-                    'Content-Type': 'application/json',
-                },
                 body: JSON.stringify({
                     old_password: formData.get('old_password'),
                     new_password: formData.get('new_password'),
@@ -374,6 +353,8 @@ class AuthenticationSystem {
             const data = await response.json();
 
             if (response.ok) {
+                // Signed mode revokes every session and returns fresh tokens
+                if (data.access) this.storeCredentials(data);
                 this.showToast('Password changed successfully!');
                 form.reset();
             } else {
@@ -390,7 +371,8 @@ class AuthenticationSystem {
     // ===== VALIDATION HELPERS =====
     async checkEmailAvailability() {
         const email = document.getElementById('registerEmail').value.trim();
-        if (!email) return;
+        if (!email || email === this.lastChecked.email) return;
+        this.lastChecked.email = email;
 
         try {
             const response = await fetch(`${this.apiUrl}/check-email/`, {
@@ -400,6 +382,11 @@ class AuthenticationSystem {
                 },
                 body: JSON.stringify({ email })
             });
+            // Rate limited (429): leave it to the server-side check at registration
+            if (!response.ok) {
+                this.lastChecked.email = null;
+                return;
+            }
 
             const data = await response.json();
             const errorElement = document.getElementById('registerEmailError');
@@ -419,7 +406,8 @@ class AuthenticationSystem {
 
     async checkUsernameAvailability() {
         const username = document.getElementById('registerUsername').value.trim();
-        if (!username) return;
+        if (!username || username === this.lastChecked.username) return;
+        this.lastChecked.username = username;
 
         try {
             const response = await fetch(`${this.apiUrl}/check-username/`, {
@@ -429,6 +417,11 @@ class AuthenticationSystem {
                 },
                 body: JSON.stringify({ username })
             });
+            // Rate limited (429): leave it to the server-side check at registration
+            if (!response.ok) {
+                this.lastChecked.username = null;
+                return;
+            }
 
             const data = await response.json();
             const errorElement = document.getElementById('registerUsernameError');
@@ -608,14 +601,21 @@ class AuthenticationSystem {
 
     // ===== CART INTEGRATION =====
     syncCartOnLogin() {
-        // Future: Sync localStorage cart with backend user cart
-        if (window.cart) {
-            // This could sync the cart data to the backend
-            console.log('User logged in - cart sync available for future implementation');
+        // Merge the localStorage cart into the user's server-side cart
+        if (window.cart && this.authToken) {
+            window.cart.syncCartToAPI(this.getAuthHeaders(), this.currentUser.id);
         }
     }
 
     // ===== UTILITY METHODS =====
+    debounce(callback, delay) {
+        let timer = null;
+        return () => {
+            clearTimeout(timer);
+            timer = setTimeout(callback, delay);
+        };
+    }
+
     showToast(message, type = 'success') {
         if (window.cart && window.cart.showToast) {
             window.cart.showToast(message);
@@ -630,13 +630,64 @@ class AuthenticationSystem {
     }
 
     getAuthHeaders() {
+        const keyword = this.authMode === 'signed' ? 'Bearer' : 'Token';
         return this.authToken ? {
-            'Authorization': `Token ${this.authToken}`,
+            'Authorization': `${keyword} ${this.authToken}`,
             'Content-Type': 'application/json',
         } : {
             'Content-Type': 'application/json',
         };
     }
+
+    // ===== AUTH MODES =====
+    setAuthMode(mode) {
+        // Takes effect at the next login
+        this.authMode = mode;
+        localStorage.setItem('auth_mode', mode);
+    }
+
+    storeCredentials(data) {
+        if (data.access) {
+            this.authMode = 'signed';
+            this.authToken = data.access;
+            localStorage.setItem('refresh_token', data.refresh);
+        } else {
+            this.authMode = 'token';
+            this.authToken = data.token;
+        }
+        localStorage.setItem('auth_mode', this.authMode);
+        localStorage.setItem('auth_token', this.authToken);
+    }
+
+    async refreshAccessToken() {
+        const refresh = localStorage.getItem('refresh_token');
+        if (!refresh) return false;
+
+        // Share one rotation between concurrent requests: a refresh token works once
+        if (!this.refreshing) {
+            this.refreshing = fetch(`${this.apiUrl}/token/refresh/`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refresh })
+            }).then(async (response) => {
+                if (!response.ok) return false;
+                this.storeCredentials(await response.json());
+                return true;
+            }).catch(() => false).finally(() => {
+                this.refreshing = null;
+            });
+        }
+        return this.refreshing;
+    }
+
+    async authFetch(url, options = {}) {
+        // fetch with the auth headers, renewing an expired access token once
+        let response = await fetch(url, { ...options, headers: this.getAuthHeaders() });
+        if (response.status === 401 && this.authMode === 'signed' && await this.refreshAccessToken()) {
+            response = await fetch(url, { ...options, headers: this.getAuthHeaders() });
+        }
+        return response;
+    }
 }
 
 // Initialize authentication system
@@ -258,13 +258,26 @@ class ShoppingCart {
         };
     }
 
-    // Load cart from API (for when you add user accounts)
-    async loadCartFromAPI(userId) {
+    // Convert server cart lines into the localStorage item format
+    fromServerItems(items) {
+        return items.map(item => ({
+            id: item.product_id,
+            name: item.name,
+            price: parseFloat(item.price),
+            image: item.image_url || '📦',
+            quantity: item.quantity
+        }));
+    }
+
+    // Load the logged-in user's server-side cart
+    async loadCartFromAPI(authHeaders) {
         try {
-            const response = await fetch(`http://localhost:8000/api/cart/${userId}/`);
+            const response = await fetch('http://localhost:8000/api/cart/', {
+                headers: authHeaders
+            });
             if (response.ok) {
                 const data = await response.json();
-                this.cart = data.items || [];
+                this.cart = this.fromServerItems(data.items || []);
                 this.saveCart();
                 this.updateCartUI();
             }
@@ -273,16 +286,41 @@ class ShoppingCart {
         }
     }
 
-    // Sync cart to API (for when you add user accounts)
-    async syncCartToAPI(userId) {
+    // Quantities the user's server cart held after the last merge
+    loadSyncedQuantities(userId) {
+        const saved = JSON.parse(localStorage.getItem('shopping-cart-synced') || 'null');
+        return saved && saved.user === userId ? saved.quantities : {};
+    }
+
+    // Merge the anonymous localStorage cart into the user's cart in one request
+    async syncCartToAPI(authHeaders, userId) {
+        // Only what was added since the last merge; the rest is already
+        // on the server and merging it again would add it twice
+        const synced = this.loadSyncedQuantities(userId);
+        const items = this.cart
+            .map(item => ({
+                product_id: item.id,
+                quantity: item.quantity - (synced[item.id] || 0)
+            }))
+            .filter(item => item.quantity > 0);
         try {
-            await fetch(`http://localhost:8000/api/cart/${userId}/`, {
+            const response = await fetch('http://localhost:8000/api/cart/merge/', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(this.getCartData())
+                headers: authHeaders,
+                body: JSON.stringify({ items })
             });
+            if (response.ok) {
+                const data = await response.json();
+                this.cart = this.fromServerItems(data.items || []);
+                this.saveCart();
+                localStorage.setItem('shopping-cart-synced', JSON.stringify({
+                    user: userId,
+                    quantities: Object.fromEntries(
+                        this.cart.map(item => [item.id, item.quantity])
+                    )
+                }));
+                this.updateCartUI();
+            }
         } catch (error) {
             console.error('Error syncing cart to API:', error);
         }
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from .models import DailySales, Job, Order, OrderItem
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ["product"]
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "status", "item_count", "subtotal", "created_at"]
+    list_filter = ["status", "created_at"]
+    search_fields = ["user__email", "reference"]
+    raw_id_fields = ["user"]
+    inlines = [OrderItemInline]
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ["day", "product", "units", "revenue"]
+    list_filter = ["day"]
+    raw_id_fields = ["product"]
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "status", "attempts", "run_after", "finished_at"]
+    list_filter = ["status", "kind"]
+    readonly_fields = ["last_error"]
@@ -0,0 +1,25 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from products.query_plans import hot_query
+
+from .models import Job, Order, OrderItem
+
+
+@hot_query("order_list")
+def order_list():
+    return Order.objects.filter(user_id=1).order_by("-created_at")
+
+
+@hot_query("order_items")
+def order_items():
+    return OrderItem.objects.filter(order_id=1)
+
+
+@hot_query("job_claim")
+def job_claim():
+    now = timezone.now()
+    ready = Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+    return Job.objects.filter(ready).order_by("run_after", "id")[:10]
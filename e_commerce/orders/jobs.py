@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def get_job_settings():
+    options = {
+        "WORKERS": 4,
+        "BATCH_SIZE": 10,
+        "MAX_ATTEMPTS": 5,
+        "LEASE": 300,
+        "POLL_INTERVAL": 1.0,
+    }
+    options.update(getattr(settings, "ORDER_JOBS", {}))
+    return options
+
+
+def job(kind):
+    """Register a handler; it receives the job payload as keyword arguments"""
+
+    def decorator(func):
+        handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue(*jobs):
+    """Queue ``(kind, payload)`` jobs in the current transaction
+
+    Jobs are rows, so they commit or roll back together with the work that
+    produced them and survive restarts until a worker runs them.
+    """
+    unknown = {kind for kind, _ in jobs} - set(handlers)
+    if unknown:
+        raise ValueError(f"Unknown job kinds: {sorted(unknown)}")
+    return Job.objects.bulk_create(Job(kind=kind, payload=payload) for kind, payload in jobs)
+
+
+def claim(limit, worker_id=None):
+    """Atomically lease up to ``limit`` ready jobs for this worker
+
+    A single UPDATE flips the jobs to running; its WHERE clause re-checks
+    readiness, so two workers can never claim the same job.
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    now = timezone.now()
+    ready = Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+    candidates = Job.objects.filter(ready).order_by("run_after", "id").values("id")[:limit]
+    claimed = Job.objects.filter(ready, id__in=candidates).update(
+        status=Job.RUNNING,
+        claimed_by=worker_id,
+        locked_until=now + timedelta(seconds=get_job_settings()["LEASE"]),
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(claimed_by=worker_id, status=Job.RUNNING))
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome"""
+    options = get_job_settings()
+    attempts = job.attempts + 1
+    try:
+        with transaction.atomic():
+            handlers[job.kind](**job.payload)
+    except Exception:
+        logger.exception("Job %s failed", job)
+        failed = attempts >= options["MAX_ATTEMPTS"]
+        Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+            status=Job.FAILED if failed else Job.PENDING,
+            attempts=attempts,
+            # Exponential backoff before the next attempt
+            run_after=timezone.now() + timedelta(seconds=2**attempts),
+            locked_until=None,
+            last_error=traceback.format_exc(),
+            finished_at=timezone.now() if failed else None,
+        )
+        return False
+
+    Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).update(
+        status=Job.DONE,
+        attempts=attempts,
+        locked_until=None,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def run_batch(worker_id=None, limit=None):
+    """Claim and run one batch; returns the number of jobs run"""
+    jobs = claim(limit or get_job_settings()["BATCH_SIZE"], worker_id)
+    for claimed in jobs:
+        run_job(claimed)
+    return len(jobs)
+
+
+def drain():
+    """Run jobs in this thread until none are ready"""
+    total = 0
+    while ran := run_batch():
+        total += ran
+    return total
+
+
+class WorkerPool:
+    """Threads that poll the queue and run jobs until stopped"""
+
+    def __init__(self, workers=None, poll_interval=None):
+        options = get_job_settings()
+        self.workers = workers or options["WORKERS"]
+        self.poll_interval = poll_interval or options["POLL_INTERVAL"]
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{uuid.uuid4().hex}-{index}",), name=f"jobs-{index}"
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self, worker_id):
+        try:
+            while not self._stop.is_set():
+                try:
+                    ran = run_batch(worker_id)
+                except OperationalError:
+                    # Another worker holds the write lock; poll again shortly
+                    logger.debug("Job claim contended", exc_info=True)
+                    ran = 0
+                if not ran:
+                    self._stop.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def run_forever(self):
+        self.start()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
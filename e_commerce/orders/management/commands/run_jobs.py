@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from orders.jobs import WorkerPool, drain
+
+
+class Command(BaseCommand):
+    help = "Run queued post-checkout jobs with a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument(
+            "--once", action="store_true", help="Run ready jobs, then exit"
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            ran = drain()
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs"))
+            return
+
+        pool = WorkerPool(workers=options["workers"])
+        self.stdout.write(f"Running {pool.workers} job workers, Ctrl+C to stop")
+        pool.run_forever()
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+from products.models import Product
+
+
+class Order(models.Model):
+    """A placed order; its stock was reserved and committed at checkout"""
+
+    PLACED = "placed"
+    FULFILLED = "fulfilled"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (PLACED, "Placed"),
+        (FULFILLED, "Fulfilled"),
+        (CANCELLED, "Cancelled"),
+    ]
+
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="orders"
+    )
+    # Reference of the stock reservation taken at checkout
+    reference = models.UUIDField(unique=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PLACED)
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    # Set by the post-checkout jobs so retries do not repeat their work
+    confirmation_sent_at = models.DateTimeField(null=True, blank=True)
+    analytics_recorded = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order {self.pk} ({self.user.email})"
+
+
+class OrderItem(models.Model):
+    """A product line of an order, priced at checkout"""
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(
+        Product, on_delete=models.SET_NULL, null=True, related_name="order_items"
+    )
+    name = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.name}"
+
+    @property
+    def line_total(self):
+        return self.price * self.quantity
+
+
+class DailySales(models.Model):
+    """Units and revenue per product per day, rolled up from orders"""
+
+    day = models.DateField()
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Daily sales"
+        ordering = ["-day", "product"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="unique_day_product"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.units}"
+
+
+class Job(models.Model):
+    """Durable background job, claimed and run by `manage.py run_jobs`"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose lease expired is assumed lost and claimed again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,112 @@
+from rest_framework import exceptions, serializers, status
+
+from cart.models import CartItem
+from products.inventory import InsufficientStock, inventory
+from .jobs import enqueue
+from .models import Order, OrderItem
+from .tasks import POST_CHECKOUT
+
+
+class ProductsUnavailable(exceptions.APIException):
+    """400 listing the product ids that cannot be ordered, as integers
+
+    serializers.ValidationError would turn every id into a string.
+    """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = "unavailable"
+
+    def __init__(self, product_ids, detail):
+        super().__init__(detail)
+        self.detail = {"unavailable": list(product_ids), "detail": self.detail}
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    line_total = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = OrderItem
+        fields = ["product_id", "name", "price", "quantity", "line_total"]
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "reference",
+            "status",
+            "item_count",
+            "subtotal",
+            "items",
+            "created_at",
+        ]
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Turn the user's cart into an order
+
+    Only the critical path runs here: validate the cart, reserve its stock
+    and write the order. The confirmation email, stock recalculation and
+    analytics are queued as jobs in the same transaction. Call inside a
+    transaction.
+    """
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        items = list(
+            CartItem.objects.filter(cart__user=user)
+            .select_related("product")
+            .only(
+                "id",
+                "quantity",
+                "product__id",
+                "product__name",
+                "product__price",
+                "product__is_active",
+            )
+        )
+        if not items:
+            raise serializers.ValidationError("Your cart is empty.")
+
+        unavailable = [item.product_id for item in items if not item.product.is_active]
+        if unavailable:
+            raise ProductsUnavailable(unavailable, "Some products are not available.")
+        attrs["items"] = items
+        return attrs
+
+    def save(self):
+        user = self.context["request"].user
+        items = self.validated_data["items"]
+        try:
+            reference = inventory.reserve(
+                [(item.product_id, item.quantity) for item in items]
+            )
+        except InsufficientStock as exc:
+            raise ProductsUnavailable(exc.product_ids, "Not enough stock.")
+
+        order = Order.objects.create(
+            user=user,
+            reference=reference,
+            item_count=sum(item.quantity for item in items),
+            subtotal=sum(item.line_total for item in items),
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product_id=item.product_id,
+                name=item.product.name,
+                price=item.product.price,
+                quantity=item.quantity,
+            )
+            for item in items
+        )
+        inventory.commit(reference)
+        CartItem.objects.filter(id__in=[item.id for item in items]).delete()
+        enqueue(*[(kind, {"order_id": order.pk}) for kind in POST_CHECKOUT])
+        self.instance = order
+        return order
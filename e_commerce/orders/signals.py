@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.dashboard import invalidate_dashboard_on_commit
+
+from .models import Order
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Order)
+def count_order(sender, instance, created, **kwargs):
+    """Maintain User.total_orders so the dashboard never runs a COUNT"""
+    if created:
+        User.objects.filter(pk=instance.user_id).update(
+            total_orders=F("total_orders") + 1
+        )
+        # update() sends no User post_save
+        invalidate_dashboard_on_commit(instance.user_id)
+
+
+@receiver(post_delete, sender=Order)
+def uncount_order(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.user_id, total_orders__gt=0).update(
+        total_orders=F("total_orders") - 1
+    )
+    invalidate_dashboard_on_commit(instance.user_id)
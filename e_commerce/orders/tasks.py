@@ -0,0 +1,84 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import mail_admins, send_mail
+from django.db.models import F
+from django.utils import timezone
+
+from products.inventory import inventory
+from products.models import Product
+from .jobs import job
+from .models import DailySales, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+CONFIRMATION = "send_confirmation"
+RECALCULATE_STOCK = "recalculate_stock"
+RECORD_ANALYTICS = "record_analytics"
+
+# Queued by checkout for every order
+POST_CHECKOUT = [CONFIRMATION, RECALCULATE_STOCK, RECORD_ANALYTICS]
+
+
+def get_low_stock_threshold():
+    return getattr(settings, "ORDERS", {}).get("LOW_STOCK_THRESHOLD", 5)
+
+
+@job(CONFIRMATION)
+def send_confirmation(order_id):
+    order = Order.objects.select_related("user").get(pk=order_id)
+    if order.confirmation_sent_at is not None:
+        return
+
+    lines = "\n".join(
+        f"{item.quantity} x {item.name} @ {item.price}" for item in order.items.all()
+    )
+    send_mail(
+        subject=f"Order {order.pk} confirmed",
+        message=f"Thanks for your order!\n\n{lines}\n\nSubtotal: {order.subtotal}",
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
+    Order.objects.filter(pk=order.pk).update(confirmation_sent_at=timezone.now())
+
+
+@job(RECALCULATE_STOCK)
+def recalculate_stock(order_id):
+    """Return abandoned reservations and alert on products running low"""
+    inventory.expire()
+    product_ids = OrderItem.objects.filter(order_id=order_id).values("product_id")
+    low = list(
+        Product.objects.filter(
+            id__in=product_ids,
+            is_active=True,
+            stock_quantity__lte=get_low_stock_threshold(),
+        ).values_list("name", "stock_quantity")
+    )
+    if low:
+        logger.warning("Low stock after order %s: %s", order_id, low)
+        mail_admins(
+            "Low stock",
+            "\n".join(f"{name}: {stock} left" for name, stock in low),
+        )
+
+
+@job(RECORD_ANALYTICS)
+def record_analytics(order_id):
+    # Claiming the flag first makes a retried job a no-op
+    if not Order.objects.filter(pk=order_id, analytics_recorded=False).update(
+        analytics_recorded=True
+    ):
+        return
+
+    order = Order.objects.only("created_at").get(pk=order_id)
+    day = timezone.localdate(order.created_at)
+    items = OrderItem.objects.filter(order_id=order_id, product__isnull=False)
+    for item in items:
+        revenue = item.line_total
+        updated = DailySales.objects.filter(day=day, product_id=item.product_id).update(
+            units=F("units") + item.quantity, revenue=F("revenue") + revenue
+        )
+        if not updated:
+            DailySales.objects.create(
+                day=day, product_id=item.product_id, units=item.quantity, revenue=revenue
+            )
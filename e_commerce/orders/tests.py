@@ -0,0 +1,146 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem
+from products.models import Category, Product
+from . import jobs
+from .models import DailySales, Job, Order
+
+User = get_user_model()
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass12345"
+        )
+        category = Category.objects.create(name="Garden")
+        cls.products = [
+            Product.objects.create(
+                name=f"Spade {i}",
+                description="spade",
+                price=Decimal("20.00") + i,
+                category=category,
+                stock_quantity=4,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=2)
+        CartItem.objects.create(cart=cart, product=self.products[1], quantity=1)
+
+    def checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/orders/checkout/")
+
+    def test_checkout_writes_order_and_defers_side_effects(self):
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["item_count"], 3)
+        self.assertEqual(response.data["subtotal"], "61.00")
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_quantity, 2)
+
+        # Nothing slow ran in the request; it is queued instead
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 3)
+
+        self.assertEqual(jobs.drain(), 3)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Spade 0", mail.outbox[0].body)
+        sales = DailySales.objects.get(product=self.products[0])
+        self.assertEqual((sales.units, sales.revenue), (2, Decimal("40.00")))
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        dashboard = self.client.get("/api/auth/dashboard/")
+        self.assertEqual(dashboard.data["total_orders"], 1)
+        self.assertEqual(len(self.client.get("/api/orders/").data["results"]), 1)
+
+    def test_insufficient_stock_rolls_back(self):
+        Product.objects.filter(id=self.products[1].id).update(stock_quantity=0)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["unavailable"], [self.products[1].id])
+        self.assertEqual(response.data["detail"], "Not enough stock.")
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 2)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_quantity, 4)
+
+    def test_inactive_product_rejected(self):
+        Product.objects.filter(id=self.products[0].id).update(is_active=False)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["unavailable"], [self.products[0].id])
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_cart(self):
+        CartItem.objects.all().delete()
+        self.assertEqual(self.checkout().status_code, 400)
+
+    def test_total_orders_counter(self):
+        self.checkout()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_orders, 1)
+        Order.objects.get().delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.total_orders, 0)
+
+    def test_orders_invalidate_dashboard(self):
+        cache.clear()
+        dashboard = self.client.get("/api/auth/dashboard/")
+        self.assertEqual(dashboard.data["total_orders"], 0)
+        self.checkout()
+        dashboard = self.client.get("/api/auth/dashboard/")
+        self.assertEqual(dashboard.data["total_orders"], 1)
+
+
+class JobQueueTests(TestCase):
+    def test_claims_are_exclusive(self):
+        jobs.enqueue(*[("recalculate_stock", {"order_id": 0})] * 5)
+        first = jobs.claim(3, "first")
+        second = jobs.claim(3, "second")
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(jobs.claim(3, "third"), [])
+
+    def test_failures_back_off_then_fail(self):
+        (queued,) = jobs.enqueue(("send_confirmation", {"order_id": 0}))
+        with self.settings(ORDER_JOBS={"MAX_ATTEMPTS": 2}):
+            self.assertEqual(jobs.drain(), 1)
+            queued.refresh_from_db()
+            self.assertEqual((queued.status, queued.attempts), (Job.PENDING, 1))
+            self.assertIn("DoesNotExist", queued.last_error)
+
+            Job.objects.update(run_after=queued.created_at)
+            jobs.drain()
+            queued.refresh_from_db()
+            self.assertEqual((queued.status, queued.attempts), (Job.FAILED, 2))
+
+    def test_expired_lease_is_reclaimed(self):
+        jobs.enqueue(("recalculate_stock", {"order_id": 0}))
+        (claimed,) = jobs.claim(1, "lost")
+        self.assertEqual(jobs.claim(1, "other"), [])
+        Job.objects.update(locked_until=claimed.run_after)
+        with mock.patch.dict(jobs.handlers, {"recalculate_stock": lambda **kwargs: None}):
+            self.assertEqual(jobs.run_batch("other"), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue(("nope", {}))
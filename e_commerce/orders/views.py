@@ -0,0 +1,27 @@
+from django.db import transaction
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Order
+from .serializers import CheckoutSerializer, OrderSerializer
+
+
+class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """The authenticated user's orders"""
+
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Order.objects.filter(user=self.request.user).prefetch_related("items")
+
+    @action(detail=False, methods=["post"])
+    def checkout(self, request):
+        """Place an order for the contents of the cart"""
+        serializer = CheckoutSerializer(data=request.data, context={"request": request})
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            order = serializer.save()
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
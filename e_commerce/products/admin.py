@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .inventory import stock_changed
 from .models import Product, Category
 
 
@@ -21,3 +26,38 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ["category", "is_active", "created_at"]
     search_fields = ["name", "description"]
     list_editable = ["price", "stock_quantity", "is_active"]
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name == "stock_quantity":
+            # Post the value the page was loaded with next to the edited one
+            kwargs["show_hidden_initial"] = True
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+    def loaded_stock(self, form):
+        """Stock shown when the page was loaded, from the hidden initial input"""
+        field = form.fields["stock_quantity"]
+        name = form.add_initial_prefix("stock_quantity")
+        value = field.hidden_widget().value_from_datadict(form.data, form.files, name)
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            return None
+
+    def save_model(self, request, obj, form, change):
+        loaded = self.loaded_stock(form) if change else None
+        if loaded is None or "stock_quantity" not in form.changed_data:
+            return super().save_model(request, obj, form, change)
+
+        # Apply the edit as a relative adjustment so stock reserved by
+        # checkouts since the page was loaded is not overwritten
+        delta = obj.stock_quantity - loaded
+        Product.objects.filter(pk=obj.pk).update(
+            stock_quantity=Greatest(F("stock_quantity") + delta, 0)
+        )
+        stock_changed([obj.pk])
+        obj.stock_quantity = Product.objects.values_list(
+            "stock_quantity", flat=True
+        ).get(pk=obj.pk)
+        fields = [name for name in form.changed_data if name != "stock_quantity"]
+        if fields:
+            obj.save(update_fields=fields)
@@ -0,0 +1,222 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from .cache import cache_response, conditional_response
+from .featured import VERSION_LABEL as FEATURED_VERSION, featured_set
+from .filters import ProductSearchFilter
+from .models import Category, Product, ProductRecommendation
+from .renderers import FastJSONRenderer
+from .search import get_search_index
+from .serializers import RelatedProductSerializer
+from .suggestions import get_suggestion_index
+from .views import ProductViewSet, get_compiled_serializer
+
+DETAIL_ACTIONS = {"retrieve", "similar"}
+
+
+async def fetch(queryset):
+    return [obj async for obj in queryset]
+
+
+async def load_fields(instance, *names):
+    """Load deferred ``names`` the way attribute access does in sync code"""
+    deferred = instance.get_deferred_fields()
+    missing = [
+        name for name in names if instance._meta.get_field(name).attname in deferred
+    ]
+    if missing:
+        await instance.arefresh_from_db(fields=missing)
+
+
+def has_credentials(request):
+    """Whether authenticating the request may read the database"""
+    return (
+        "HTTP_AUTHORIZATION" in request.META
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+
+
+class AsyncProductViewSet(ProductViewSet):
+    """ProductViewSet's catalog reads as coroutines, for ASGI deployments
+
+    Responses are the same bytes the sync actions return (and share their
+    cache entries and ETags). Queries go through the async ORM; the parts
+    with no async API yet (django-filter, search, featured rebuilds and
+    keyset pages) run in sync_to_async only when a request needs them.
+    Served by as_async_view() rather than a router, since DRF dispatch is
+    sync.
+    """
+
+    renderer_classes = [FastJSONRenderer]
+
+    @classmethod
+    def as_async_view(cls, action):
+        """Async view function for one read action"""
+
+        async def view(request, *args, **kwargs):
+            self = cls(
+                basename="product",
+                detail=action in DETAIL_ACTIONS,
+                action_map={"get": action, "head": action},
+            )
+            self.get = self.head = getattr(self, action)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch awaiting the handler"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if has_credentials(request):
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+            handler = getattr(
+                self, request.method.lower(), self.http_method_not_allowed
+            )
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response.render()
+
+    def filter_params(self):
+        """Query parameters whose filters read the database"""
+        names = {ProductSearchFilter.search_param}
+        for field, lookups in self.filterset_fields.items():
+            names.update(
+                field if lookup == "exact" else f"{field}__{lookup}"
+                for lookup in lookups
+            )
+        return names
+
+    async def afilter_queryset(self, queryset):
+        if self.filter_params().isdisjoint(self.request.query_params):
+            return self.filter_queryset(queryset)
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    def get_lookup_value(self):
+        value = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            return Product._meta.pk.to_python(value)
+        except ValidationError:
+            raise Http404
+
+    async def aget_object(self, pk):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        try:
+            instance = await queryset.aget(**{self.lookup_field: pk})
+        except Product.DoesNotExist:
+            raise Http404(
+                f"No {Product._meta.object_name} matches the given query."
+            )
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def alookup(self, kind, limit, serializer_class=None):
+        """The product and its precomputed neighbors, fetched concurrently"""
+        pk = self.get_lookup_value()
+        return await asyncio.gather(
+            self.aget_object(pk),
+            fetch(self.get_recommended_queryset(pk, kind, limit, serializer_class)),
+        )
+
+    async def aget_breadcrumb(self, product):
+        await load_fields(product, "name", "category")
+        if not Product.category.is_cached(product):
+            product.category = await Category.objects.aget(pk=product.category_id)
+        return self.get_breadcrumb(product)
+
+    @conditional_response(Product, Category)
+    @cache_response(Product, Category)
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        compiled = get_compiled_serializer(self.get_serializer_class())
+        if (
+            compiled is None
+            or self.paginator is None
+            or self.paginator.cursor_query_param in request.query_params
+        ):
+            return await sync_to_async(self.list_response)(queryset)
+
+        rows = compiled.queryset(queryset)
+        page = await self.paginator.apaginate_queryset(rows, request, self)
+        if page is None:
+            return Response(compiled.serialize(await fetch(rows)))
+        return self.get_paginated_response(compiled.serialize(page))
+
+    @conditional_response(Product, Category)
+    @cache_response(Product, Category)
+    async def retrieve(self, request, *args, **kwargs):
+        if self.wants("related"):
+            instance, related_products = await self.alookup(
+                ProductRecommendation.RELATED, 4
+            )
+        else:
+            instance = await self.aget_object(self.get_lookup_value())
+        data = {"product": self.get_serializer(instance).data}
+
+        if self.wants("related"):
+            if not related_products:
+                await load_fields(instance, "category")
+                related_products = await fetch(
+                    self.get_same_category_queryset(instance, 4)
+                )
+            related_serializer = RelatedProductSerializer(related_products, many=True)
+            data["related_products"] = related_serializer.data
+
+        if self.wants("breadcrumb"):
+            data["breadcrumb"] = await self.aget_breadcrumb(instance)
+        return Response(data)
+
+    @conditional_response(
+        Product, Category, FEATURED_VERSION, prepare=featured_set.current
+    )
+    async def featured(self, request):
+        # A cold snapshot is rebuilt from the database
+        data = await sync_to_async(featured_set.data)()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            data = fieldset.filter(data)
+        return Response(data)
+
+    async def search_suggestions(self, request):
+        query = request.query_params.get("q", "")
+        if len(query) < 2:
+            return Response({"suggestions": []})
+        index = get_suggestion_index()
+        suggestions = index.complete(query, limit=5)
+        if suggestions is None:
+            index.warm_async()
+            suggestions = await sync_to_async(get_search_index().suggest)(
+                query, limit=5
+            )
+        return Response({"suggestions": suggestions})
+
+    @conditional_response(Product, Category)
+    async def similar(self, request, pk=None):
+        serializer_class = self.get_serializer_class()
+        product, similar_products = await self.alookup(
+            ProductRecommendation.SIMILAR, 6, serializer_class
+        )
+        if not similar_products:
+            await load_fields(product, "price", "category")
+            similar_products = await fetch(
+                self.get_price_band_queryset(product, 6, serializer_class)
+            )
+        return Response(serializer_class(similar_products, many=True).data)
@@ -0,0 +1,324 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import replica_may_lag
+
+
+def get_cache_settings():
+    options = {"ALIAS": "default", "TIMEOUT": 300, "PREFIX": "catalog"}
+    options.update(getattr(settings, "CATALOG_CACHE", {}))
+    return options
+
+
+def get_cache():
+    return caches[get_cache_settings()["ALIAS"]]
+
+
+def version_key(model):
+    # A model, or a label for data versioned outside one (featured snapshot)
+    label = model if isinstance(model, str) else model._meta.label_lower
+    return f"{get_cache_settings()['PREFIX']}:version:{label}"
+
+
+def get_versions(models):
+    """Return the current version counter of each model"""
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so a lost counter never reuses an old version
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    """Invalidate every cached response that depends on ``model``
+
+    Versions are millisecond timestamps of the last change (bumped by one on
+    collisions), which lets them double as Last-Modified values.
+    """
+    cache = get_cache()
+    key = version_key(model)
+    now = int(time.time() * 1000)
+    current = cache.get(key)
+    if current is None or current < now:
+        cache.set(key, now, timeout=None)
+    else:
+        cache.incr(key)
+    stats.record("invalidations")
+
+
+class CacheStats:
+    """Per-process hit/miss/eviction counters
+
+    The backend does not report evictions, so a miss on a key this process
+    stored recently (same request, same versions) counts as one; that covers
+    entries culled by the backend as well as expired ones.
+    """
+
+    def __init__(self, tracked_keys=10000):
+        self.tracked_keys = tracked_keys
+        self._lock = threading.Lock()
+        self._stored = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {
+                "hits": 0,
+                "misses": 0,
+                "stores": 0,
+                "evictions": 0,
+                "invalidations": 0,
+            }
+            self._stored.clear()
+
+    def record(self, name, count=1):
+        with self._lock:
+            self.counters[name] += count
+
+    def stored(self, key):
+        with self._lock:
+            self.counters["stores"] += 1
+            self._stored[key] = True
+            self._stored.move_to_end(key)
+            if len(self._stored) > self.tracked_keys:
+                self._stored.popitem(last=False)
+
+    def missed(self, key):
+        with self._lock:
+            self.counters["misses"] += 1
+            if self._stored.pop(key, None):
+                self.counters["evictions"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.counters)
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else None
+        return data
+
+
+stats = CacheStats()
+
+
+def normalize_params(query_params):
+    """Order-independent representation of the query string"""
+    return "&".join(
+        f"{name}={value}"
+        for name in sorted(query_params)
+        for value in query_params.getlist(name)
+    )
+
+
+def request_digest(view, request, *extra):
+    parts = [
+        request.get_host(),
+        # Pagination links embed the path the payload was requested from
+        request.path,
+        view.basename or type(view).__name__,
+        view.action or request.method,
+        repr(sorted(view.kwargs.items())),
+        normalize_params(request.query_params),
+        *extra,
+    ]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def response_cache_key(view, request, versions):
+    digest = request_digest(view, request)
+    versions = ".".join(str(version) for version in versions)
+    return f"{get_cache_settings()['PREFIX']}:response:{digest}:{versions}"
+
+
+def cache_response(*models):
+    """Cache a view action's successful response until ``models`` change
+
+    The key combines the normalized request and the version counters of the
+    models the payload is built from, so a signal-driven version bump makes
+    every dependent entry unreachable without guessing TTLs. Works on sync
+    and async actions.
+    """
+
+    def lookup(view, request):
+        versions = get_versions(models)
+        key = response_cache_key(view, request, versions)
+        data = get_cache().get(key)
+        if data is not None:
+            stats.record("hits")
+            return Response(data), key, versions
+        stats.missed(key)
+        return None, key, versions
+
+    def store(response, key, versions):
+        # Replica reads right after a change may predate it
+        if response.status_code == status.HTTP_200_OK and not replica_may_lag(
+            versions
+        ):
+            get_cache().set(key, response.data, get_cache_settings()["TIMEOUT"])
+            stats.stored(key)
+        return response
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(self, request, *args, **kwargs):
+                cached, key, versions = lookup(self, request)
+                if cached is not None:
+                    return cached
+                return store(await func(self, request, *args, **kwargs), key, versions)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            cached, key, versions = lookup(self, request)
+            if cached is not None:
+                return cached
+            return store(func(self, request, *args, **kwargs), key, versions)
+
+        return wrapper
+
+    return decorator
+
+
+def cache_many(namespace, ids, load, models):
+    """Read-through cache of one entry per id, valid until ``models`` change
+
+    Cached entries are fetched with one get_many; ``load`` is called once with
+    the missing ids and returns {id: data} for those that exist, which are
+    stored with one set_many. Returns {id: data} in the order of ``ids``.
+    """
+    cache = get_cache()
+    versions = get_versions(models)
+    prefix = (
+        f"{get_cache_settings()['PREFIX']}:{namespace}:"
+        f"{'.'.join(str(version) for version in versions)}"
+    )
+    keys = {pk: f"{prefix}:{pk}" for pk in ids}
+    cached = cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    stats.record("hits", len(keys) - len(missing))
+    for pk in missing:
+        stats.missed(keys[pk])
+    loaded = load(missing) if missing else {}
+    if loaded and not replica_may_lag(versions):
+        cache.set_many(
+            {keys[pk]: data for pk, data in loaded.items()},
+            get_cache_settings()["TIMEOUT"],
+        )
+        for pk in loaded:
+            stats.stored(keys[pk])
+
+    results = {}
+    for pk, key in keys.items():
+        if key in cached:
+            results[pk] = cached[key]
+        elif pk in loaded:
+            results[pk] = loaded[pk]
+    return results
+
+
+def etag_matches(header, etag):
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_response(*models, prepare=None):
+    """Answer conditional GETs from the version counters of ``models``
+
+    The strong ETag hashes the request, the negotiated format and the
+    versions, so a 304 is decided before any query or serialization runs.
+    ``prepare`` runs first, for data rebuilt on expiry that bumps its own
+    version. Works on sync and async actions.
+    """
+
+    def precondition(view, request):
+        versions = get_versions(models)
+        renderer = getattr(request, "accepted_renderer", None)
+        etag = quote_etag(
+            request_digest(
+                view,
+                request,
+                getattr(renderer, "format", ""),
+                ".".join(str(version) for version in versions),
+            )
+        )
+        last_modified = max(versions) // 1000
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(last_modified),
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("If-None-Match")
+        # The versions say nothing about whether a detail route's object
+        # exists; only an ETag it was served with proves that, not a date
+        # or "*", so those go on to the view and its 404
+        detail = getattr(view, "detail", False)
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag) and not (
+                detail and if_none_match.strip() == "*"
+            )
+        elif detail:
+            not_modified = False
+        else:
+            since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+            not_modified = since is not None and last_modified <= since
+
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers), None
+        return None, (headers, versions)
+
+    def tag(response, headers, versions):
+        if response.status_code == status.HTTP_200_OK and not replica_may_lag(
+            versions
+        ):
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(self, request, *args, **kwargs):
+                if prepare is not None:
+                    await sync_to_async(prepare)()
+                not_modified, tags = precondition(self, request)
+                if not_modified is not None:
+                    return not_modified
+                return tag(await func(self, request, *args, **kwargs), *tags)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if prepare is not None:
+                prepare()
+            not_modified, tags = precondition(self, request)
+            if not_modified is not None:
+                return not_modified
+            return tag(func(self, request, *args, **kwargs), *tags)
+
+        return wrapper
+
+    return decorator
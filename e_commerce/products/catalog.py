@@ -0,0 +1,301 @@
+import csv
+import io
+import json
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, reset_queries, transaction
+
+from .cache import bump_version
+from .featured import featured_set
+from .models import Category, Product
+from .recommendations import schedule_refresh
+from .search import get_search_index
+from .suggestions import get_suggestion_index
+
+# Columns of an import/export file; "category" holds the category name
+COLUMNS = [
+    "id",
+    "name",
+    "description",
+    "price",
+    "category",
+    "image_url",
+    "stock_quantity",
+    "is_active",
+]
+# Columns every row needs, in CSV headers and JSONL objects alike
+REQUIRED = ["name", "price", "category"]
+FORMATS = ["csv", "jsonl"]
+CHUNK_SIZE = 2000
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n", ""}
+
+
+class CatalogError(Exception):
+    pass
+
+
+def guess_format(filename, default="csv"):
+    for file_format in FORMATS:
+        if filename.lower().endswith(f".{file_format}"):
+            return file_format
+    return default
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) from a text stream, one row at a time"""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        missing = set(REQUIRED) - set(reader.fieldnames or ())
+        if missing:
+            raise CatalogError(f"Missing CSV columns: {sorted(missing)}")
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = exc
+            yield line_num, row
+    else:
+        raise CatalogError(f"Unsupported format {file_format!r}")
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValidationError(f"{value!r} is not a boolean.")
+
+
+class CatalogImporter:
+    """Stream rows into Product with bulk_create/bulk_update, chunk by chunk
+
+    Categories are resolved by name from a map loaded once (missing ones are
+    created with the chunk that needs them), rows with a known id update that
+    product and other rows are created. Memory is bounded by the chunk size,
+    not the file. Each chunk commits on its own; invalid rows are reported
+    and skipped.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, create_categories=True, on_chunk=None):
+        self.chunk_size = chunk_size
+        self.create_categories = create_categories
+        self.on_chunk = on_chunk
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.touched_categories = set()
+        self.created_categories = 0
+
+    def category_name(self, name):
+        name = str(name or "").strip()
+        if not name:
+            raise ValidationError("Category is required.")
+        if name not in self.categories and not self.create_categories:
+            raise ValidationError(f"Unknown category {name!r}.")
+        return name
+
+    def category_id(self, name):
+        # Called inside the chunk's transaction, which owns new categories
+        if name not in self.categories:
+            self.categories[name] = Category.objects.create(name=name).id
+        return self.categories[name]
+
+    def parse(self, row):
+        """Clean a raw row into model field values"""
+        if isinstance(row, Exception):
+            raise ValidationError(f"Invalid JSON: {row}")
+        if not isinstance(row, dict):
+            raise ValidationError("Each line must be a JSON object.")
+        missing = [column for column in REQUIRED if column not in row]
+        if missing:
+            raise ValidationError(f"Missing required fields: {', '.join(missing)}.")
+
+        values = {}
+        if row.get("id") not in (None, ""):
+            values["id"] = Product._meta.pk.to_python(row["id"])
+        for column in COLUMNS:
+            if column in ("id", "category"):
+                continue
+            field = Product._meta.get_field(column)
+            # A missing key takes the field's default, or is empty as in a
+            # blank CSV cell, and is validated like any other value
+            raw = row.get(column, field.get_default() if field.has_default() else "")
+            if column == "is_active":
+                values[column] = parse_bool(raw)
+            elif raw in (None, "") and field.has_default():
+                values[column] = field.get_default()
+            else:
+                values[column] = field.clean(raw, None)
+        values["category"] = self.category_name(row["category"])
+        return values
+
+    def write(self, parsed):
+        """Bulk write one chunk of parsed rows; returns (created, updated)"""
+        known = set(self.categories)
+        try:
+            with transaction.atomic():
+                created, updates = self.prepare(parsed)
+                Product.objects.bulk_create(created)
+                for fields, products in updates.items():
+                    Product.objects.bulk_update(products, fields)
+        except DatabaseError:
+            # Categories created for the chunk were rolled back with it
+            for name in set(self.categories) - known:
+                del self.categories[name]
+            raise
+        self.created_categories += len(self.categories) - len(known)
+        return len(created), sum(len(products) for products in updates.values())
+
+    def prepare(self, parsed):
+        """Split parsed rows into new products and updates by field list"""
+        for values in parsed:
+            values["category_id"] = self.category_id(values.pop("category"))
+        ids = [values["id"] for values in parsed if "id" in values]
+        existing = set(
+            Product.objects.filter(id__in=ids).values_list("id", flat=True)
+        )
+        created = []
+        # bulk_update needs one field list per batch; CSV rows share one
+        updates = {}
+        for values in parsed:
+            product = Product(**values)
+            if values.get("id") in existing:
+                fields = tuple(sorted(set(values) - {"id"}))
+                updates.setdefault(fields, []).append(product)
+            else:
+                created.append(product)
+        return created, updates
+
+    def run(self, rows):
+        totals = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "chunks": []}
+        started = time.perf_counter()
+        for number, chunk in enumerate(chunked(rows, self.chunk_size), start=1):
+            errors = []
+            parsed = []
+            for line_num, row in chunk:
+                try:
+                    parsed.append(self.parse(row))
+                except ValidationError as exc:
+                    errors.append({"line": line_num, "errors": exc.messages})
+
+            created = updated = 0
+            try:
+                created, updated = self.write(parsed)
+            except DatabaseError as exc:
+                errors.append({"line": None, "errors": [f"Chunk rejected: {exc}"]})
+            else:
+                self.touched_categories.update(values["category_id"] for values in parsed)
+
+            totals["rows"] += len(chunk)
+            totals["created"] += created
+            totals["updated"] += updated
+            totals["failed"] += len(chunk) - created - updated
+            report = {
+                "chunk": number,
+                "lines": [chunk[0][0], chunk[-1][0]],
+                "created": created,
+                "updated": updated,
+                "errors": errors,
+                "rows_per_second": round(
+                    totals["rows"] / max(time.perf_counter() - started, 1e-9)
+                ),
+            }
+            totals["chunks"].append(
+                {key: report[key] for key in ("chunk", "created", "updated")}
+                | {"errors": len(errors)}
+            )
+            if self.on_chunk:
+                self.on_chunk(report, totals)
+            # With DEBUG on, the logged SQL of every chunk would add up
+            reset_queries()
+
+        totals["elapsed"] = round(time.perf_counter() - started, 3)
+        if totals["created"] or totals["updated"]:
+            self.finish()
+        return totals
+
+    def finish(self):
+        """Refresh what bulk writes bypassed: indexes, caches, recommendations"""
+        get_search_index().rebuild()
+        suggestions = get_suggestion_index()
+        if suggestions.ready:
+            suggestions.rebuild()
+        for category_id in sorted(self.touched_categories):
+            schedule_refresh(None, category_id)
+        bump_version(Product)
+        if self.created_categories:
+            bump_version(Category)
+        featured_set.invalidate()
+
+
+def import_catalog(stream, file_format, **options):
+    importer = CatalogImporter(**options)
+    return importer.run(read_rows(stream, file_format))
+
+
+def export_rows(queryset=None, chunk_size=CHUNK_SIZE):
+    """Yield product rows in id order through a server-side cursor"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    rows = (
+        queryset.order_by("id")
+        .values_list(
+            "id",
+            "name",
+            "description",
+            "price",
+            "category__name",
+            "image_url",
+            "stock_quantity",
+            "is_active",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield dict(zip(COLUMNS, row))
+
+
+def encode_value(value):
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def export_lines(file_format, queryset=None, chunk_size=CHUNK_SIZE):
+    """Yield the export as text, one chunk of rows per string"""
+    if file_format not in FORMATS:
+        raise CatalogError(f"Unsupported format {file_format!r}")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    if file_format == "csv":
+        writer.writeheader()
+
+    for count, row in enumerate(export_rows(queryset, chunk_size), start=1):
+        if file_format == "csv":
+            writer.writerow(row)
+        else:
+            buffer.write(
+                json.dumps({key: encode_value(value) for key, value in row.items()})
+            )
+            buffer.write("\n")
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,156 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.query import ValuesListIterable
+from django.db.models.utils import create_namedtuple_class
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def compiled_serialization_enabled():
+    return getattr(settings, "PRODUCT_COMPILED_SERIALIZATION", False)
+
+
+def identity(value):
+    return value
+
+
+def decimal_converter(field):
+    """Format Decimals like DecimalField, skipping its quantize when exact"""
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if (
+        not coerce_to_string
+        or field.localize
+        or field.normalize_output
+        or field.decimal_places is None
+    ):
+        return field.to_representation
+    exponent = -field.decimal_places
+
+    def convert(value):
+        # Database values already carry the field's scale
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return f"{value:f}"
+        return field.to_representation(value)
+
+    return convert
+
+
+# Field classes whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class RowIterable(ValuesListIterable):
+    """Named values_list() rows that also expose annotations added later
+
+    values_list(named=True) only names the listed fields, so an annotation
+    applied afterwards (such as the keyset pagination seek value) would not
+    be readable as an attribute.
+    """
+
+    def __iter__(self):
+        fields = self.queryset._fields
+        annotations = self.queryset.query.annotation_select
+        row_class = create_namedtuple_class(
+            *fields, *(name for name in annotations if name not in fields)
+        )
+        new = tuple.__new__
+        for row in super().__iter__():
+            yield new(row_class, row)
+
+
+class CompiledSerializer:
+    """Serialize named value rows without going through field objects
+
+    Each declared field is resolved once to a column lookup and a converter;
+    rows are then built directly. Columns map one to one to the serializer's
+    sources, model properties listed in ``computed`` are evaluated on the row
+    with the model's own getter, and anything else makes compilation fail so
+    callers fall back to the serializer.
+    """
+
+    def __init__(self, serializer_class, computed):
+        model = serializer_class.Meta.model
+        self.columns = [model._meta.pk.attname]
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            self.fields.append((name, *self.compile_field(model, name, field, computed)))
+
+    def compile_field(self, model, name, field, computed):
+        attrs = field.source_attrs or [name]
+        if field.source == "*" or isinstance(field, serializers.BaseSerializer):
+            raise TypeError(f"{name}: nested serializers are not compiled")
+
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            getter = getattr(model, attrs[0], None)
+            if attrs[0] not in computed or not isinstance(getter, property):
+                raise TypeError(f"{name}: {field.source} is not a column")
+            if len(attrs) > 1:
+                raise TypeError(f"{name}: {field.source} is too deep to compile")
+            self.columns.extend(computed[attrs[0]])
+            return "computed", getter.fget, self.converter(field)
+
+        if len(attrs) == 1:
+            if model_field.is_relation and not isinstance(
+                field, serializers.PrimaryKeyRelatedField
+            ):
+                raise TypeError(f"{name}: only primary keys of relations are compiled")
+            column = model_field.attname
+        elif model_field.is_relation and len(attrs) == 2:
+            column = f"{model_field.name}__{attrs[1]}"
+        else:
+            raise TypeError(f"{name}: {field.source} is too deep to compile")
+        self.columns.append(column)
+        return "column", column, self.converter(field)
+
+    def converter(self, field):
+        if isinstance(field, serializers.DecimalField):
+            return decimal_converter(field)
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return identity
+        return field.to_representation
+
+    def queryset(self, queryset):
+        """Turn a model queryset into named rows of the compiled columns"""
+        rows = queryset.values_list(*dict.fromkeys(self.columns))
+        rows._iterable_class = RowIterable
+        return rows
+
+    def serialize(self, rows):
+        fields = self.fields
+        data = []
+        for row in rows:
+            item = {}
+            for name, kind, source, convert in fields:
+                value = getattr(row, source) if kind == "column" else source(row)
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class, computed=()):
+    """Return a CompiledSerializer, or None if the class cannot be compiled
+
+    ``computed`` is a tuple of (property, columns) pairs the rows may read.
+    """
+    try:
+        return CompiledSerializer(
+            serializer_class, {name: list(columns) for name, columns in computed}
+        )
+    except TypeError:
+        return None
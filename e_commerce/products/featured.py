@@ -0,0 +1,227 @@
+import logging
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .cache import bump_version, get_cache, get_cache_settings
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Version counter of the snapshot, part of the featured action's ETag
+VERSION_LABEL = "products.featured"
+
+
+def get_featured_settings():
+    options = {
+        "SIZE": 6,
+        "CANDIDATES": 200,
+        "STOCK_WEIGHT": 0.4,
+        "RECENCY_WEIGHT": 0.6,
+        "RECENCY_HALF_LIFE_DAYS": 14,
+        # Score multiplier applied per product already picked from a category
+        "DIVERSITY_PENALTY": 0.5,
+        "REFRESH_INTERVAL": 900,
+        "SCHEDULER": False,
+    }
+    options.update(getattr(settings, "FEATURED_PRODUCTS", {}))
+    return options
+
+
+def score_candidates(candidates, options, now=None):
+    """Pick the featured ids from (id, stock, created_at, category_id) rows
+
+    Each product scores on log-scaled stock and exponentially decaying
+    recency; picks are then made greedily, discounting categories that are
+    already represented so the home page is not one category.
+    """
+    now = now or timezone.now()
+    if not candidates:
+        return []
+
+    max_stock = max(stock for _, stock, _, _ in candidates)
+    half_life = options["RECENCY_HALF_LIFE_DAYS"] * 86400
+    scores = {}
+    for product_id, stock, created_at, category_id in candidates:
+        stock_score = math.log1p(stock) / math.log1p(max_stock) if max_stock else 0
+        age = max((now - created_at).total_seconds(), 0)
+        recency_score = 0.5 ** (age / half_life)
+        scores[product_id] = (
+            options["STOCK_WEIGHT"] * stock_score
+            + options["RECENCY_WEIGHT"] * recency_score,
+            category_id,
+        )
+
+    picked = []
+    per_category = {}
+    remaining = dict(scores)
+    while remaining and len(picked) < options["SIZE"]:
+        best = max(
+            remaining,
+            key=lambda pk: (
+                remaining[pk][0]
+                * options["DIVERSITY_PENALTY"] ** per_category.get(remaining[pk][1], 0),
+                -pk,
+            ),
+        )
+        category_id = remaining.pop(best)[1]
+        per_category[category_id] = per_category.get(category_id, 0) + 1
+        picked.append(best)
+    return picked
+
+
+class FeaturedSet:
+    """Materialized snapshot of the featured products
+
+    The snapshot (ids plus the serialized payload) is published to the shared
+    cache under a generation id and kept in process memory, so serving it
+    costs one cache read and no queries. Its product and category ids are
+    also published on their own, for the membership test run on every save.
+    It is rebuilt on a schedule, or when a product or category it shows
+    changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = None
+        self._scheduler = None
+
+    @property
+    def snapshot_key(self):
+        return f"{get_cache_settings()['PREFIX']}:featured:snapshot"
+
+    @property
+    def members_key(self):
+        return f"{get_cache_settings()['PREFIX']}:featured:members"
+
+    @property
+    def generation_key(self):
+        return f"{get_cache_settings()['PREFIX']}:featured:generation"
+
+    def candidates(self, options):
+        """Newest and best stocked in-stock products, two indexed scans"""
+        base = Product.objects.filter(is_active=True, stock_quantity__gt=0)
+        fields = ("id", "stock_quantity", "created_at", "category_id")
+        limit = options["CANDIDATES"]
+        rows = {row[0]: row for row in base.order_by("-created_at").values_list(*fields)[:limit]}
+        rows.update(
+            (row[0], row)
+            for row in base.order_by("-stock_quantity").values_list(*fields)[:limit]
+        )
+        return list(rows.values())
+
+    def build(self):
+        # Imported here: serializers imports signals, which imports this module
+        from .serializers import ProductListSerializer, shape_queryset
+
+        options = get_featured_settings()
+        ids = score_candidates(self.candidates(options), options)
+        products = {
+            product.id: product
+            for product in shape_queryset(
+                Product.objects.filter(id__in=ids), ProductListSerializer
+            )
+        }
+        ordered = [products[pk] for pk in ids if pk in products]
+        return {
+            "generation": uuid.uuid4().hex,
+            "built_at": time.time(),
+            "ids": [product.id for product in ordered],
+            "category_ids": sorted({product.category_id for product in ordered}),
+            "data": ProductListSerializer(ordered, many=True).data,
+        }
+
+    def refresh(self):
+        """Recompute the snapshot and publish it to every process"""
+        snapshot = self.build()
+        cache = get_cache()
+        cache.set(self.snapshot_key, snapshot, timeout=None)
+        cache.set(self.members_key, self.member_ids(snapshot), timeout=None)
+        cache.set(self.generation_key, snapshot["generation"], timeout=None)
+        with self._lock:
+            self._local = snapshot
+        # A rebuild can change the picks when no product or category changed
+        bump_version(VERSION_LABEL)
+        return snapshot
+
+    def current(self):
+        """Return the live snapshot, rebuilding it if missing or expired"""
+        options = get_featured_settings()
+        if options["SCHEDULER"]:
+            self.start_scheduler(options["REFRESH_INTERVAL"])
+
+        cache = get_cache()
+        generation = cache.get(self.generation_key)
+        snapshot = self._local
+        if generation is None or snapshot is None or snapshot["generation"] != generation:
+            snapshot = cache.get(self.snapshot_key) if generation else None
+            if snapshot is None or snapshot["generation"] != generation:
+                return self.refresh()
+            with self._lock:
+                self._local = snapshot
+
+        expired = time.time() - snapshot["built_at"] > options["REFRESH_INTERVAL"]
+        if expired and not options["SCHEDULER"]:
+            return self.refresh()
+        return snapshot
+
+    def data(self):
+        return self.current()["data"]
+
+    @staticmethod
+    def member_ids(snapshot):
+        return {
+            "generation": snapshot["generation"],
+            "ids": frozenset(snapshot["ids"]),
+            "category_ids": frozenset(snapshot["category_ids"]),
+        }
+
+    def shows(self, product_id=None, category_id=None):
+        """Whether the published snapshot includes a product or category
+
+        Reads the small id sets, never the serialized payload.
+        """
+        members = get_cache().get(self.members_key)
+        if members is None:
+            snapshot = self._local
+            if snapshot is None:
+                return False
+            members = self.member_ids(snapshot)
+        if product_id is not None and product_id in members["ids"]:
+            return True
+        return category_id is not None and category_id in members["category_ids"]
+
+    def invalidate(self):
+        get_cache().delete_many(
+            [self.generation_key, self.snapshot_key, self.members_key]
+        )
+        with self._lock:
+            self._local = None
+
+    def start_scheduler(self, interval):
+        """Refresh the snapshot every ``interval`` seconds on a daemon thread"""
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._scheduler = threading.Thread(
+                target=self._schedule, args=(interval,), name="featured", daemon=True
+            )
+            self._scheduler.start()
+
+    def _schedule(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh featured products")
+            finally:
+                connection.close()
+
+
+featured_set = FeaturedSet()
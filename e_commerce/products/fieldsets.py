@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+INCLUDE_PARAM = "include"
+
+
+def split_param(query_params, name):
+    """Comma separated (or repeated) query parameter as an ordered tuple"""
+    names = []
+    for value in query_params.getlist(name):
+        names.extend(part.strip() for part in value.split(","))
+    return tuple(dict.fromkeys(name for name in names if name))
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    return tuple(
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+@lru_cache(maxsize=None)
+def sparse_serializer(serializer_class, fields):
+    """Subclass of a ModelSerializer limited to ``fields``, in its own order
+
+    Classes are cached so the query plan and compiled serializer caches,
+    which are keyed by class, work for every fieldset as well.
+    """
+    attrs = {
+        name: None for name in serializer_class._declared_fields if name not in fields
+    }
+    attrs["Meta"] = type("Meta", (serializer_class.Meta,), {"fields": list(fields)})
+    return type(serializer_class.__name__, (serializer_class,), attrs)
+
+
+class Fieldset:
+    """The ``?fields=``, ``?exclude=`` and ``?include=`` options of a request"""
+
+    def __init__(self, fields=(), exclude=(), include=()):
+        self.fields = fields
+        self.exclude = exclude
+        self.include = include
+
+    @classmethod
+    def from_request(cls, request, include_options=()):
+        """Parse the request's options, or None when it sets none of them"""
+        params = request.query_params
+        if not any(
+            name in params for name in (FIELDS_PARAM, EXCLUDE_PARAM, INCLUDE_PARAM)
+        ):
+            return None
+        include = split_param(params, INCLUDE_PARAM)
+        unknown = [option for option in include if option not in include_options]
+        if unknown:
+            raise ValidationError(
+                {INCLUDE_PARAM: [f"Unknown option {option!r}." for option in unknown]}
+            )
+        fields = split_param(params, FIELDS_PARAM)
+        return cls(fields, split_param(params, EXCLUDE_PARAM), include)
+
+    def field_names(self, available):
+        """Selected names out of ``available``; unknown names are an error"""
+        errors = {}
+        for param, names in (FIELDS_PARAM, self.fields), (EXCLUDE_PARAM, self.exclude):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f"Unknown field {name!r}." for name in unknown]
+        if errors:
+            raise ValidationError(errors)
+
+        selected = [
+            name
+            for name in available
+            if (not self.fields or name in self.fields) and name not in self.exclude
+        ]
+        if not selected:
+            raise ValidationError({FIELDS_PARAM: ["No fields left to return."]})
+        return tuple(selected)
+
+    def narrow(self, serializer_class):
+        """Serializer class restricted to the selected fields"""
+        if not self.fields and not self.exclude:
+            return serializer_class
+        available = readable_fields(serializer_class)
+        fields = self.field_names(available)
+        if fields == available:
+            return serializer_class
+        return sparse_serializer(serializer_class, fields)
+
+    def filter(self, data):
+        """Apply the fieldset to already serialized rows"""
+        if not data:
+            return data
+        fields = self.field_names(tuple(data[0]))
+        return [{name: row[name] for name in fields} for row in data]
+
+
+class SparseFieldsetMixin:
+    """Let read actions of a viewset return only the fields a client asks for
+
+    ``?fields=id,price`` keeps the listed fields, ``?exclude=description``
+    drops fields, and ``?include=`` opts into extra sections an action
+    offers. The narrowed serializer drives the queryset's only() as well.
+    """
+
+    sparse_actions = ()
+    # Extra sections per action, returned by default and only when listed in
+    # ?include= once a request shapes its response
+    include_options = {}
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = None
+            if self.action in self.sparse_actions:
+                options = self.include_options.get(self.action, ())
+                self._fieldset = Fieldset.from_request(self.request, options)
+        return self._fieldset
+
+    def narrow_serializer_class(self, serializer_class):
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return serializer_class
+        return fieldset.narrow(serializer_class)
+
+    def get_serializer_class(self):
+        return self.narrow_serializer_class(super().get_serializer_class())
+
+    def wants(self, section):
+        """Whether an optional response section should be rendered"""
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return True
+        return section in fieldset.include
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+from .search import get_search_index
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """Search through the product full-text index instead of icontains scans
+
+    Matching ids come back ranked; unless the client asked for an explicit
+    ordering, results keep that rank order. Must run after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = " ".join(self.get_search_terms(request))
+        if not query:
+            return queryset
+
+        params = request.query_params
+        ids = get_search_index().search(
+            query,
+            category=params.get("category") or None,
+            price_min=params.get("price__gte") or None,
+            price_max=params.get("price__lte") or None,
+            limit=getattr(settings, "PRODUCT_SEARCH_MAX_RESULTS", 1000),
+        )
+        queryset = queryset.filter(id__in=ids)
+
+        if not params.get(filters.OrderingFilter.ordering_param) and ids:
+            rank = Case(
+                *[When(id=pk, then=position) for position, pk in enumerate(ids)],
+                output_field=IntegerField(),
+            )
+            queryset = queryset.order_by(rank)
+        return queryset
@@ -0,0 +1,130 @@
+"""Query shapes the catalog runs on every request, see query_plans.py
+
+Parameter values are placeholders; only the shape of each query matters.
+"""
+
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Product, ProductRecommendation, StockReservation
+from .pagination import ProductPagination
+from .query_plans import hot_query
+from .serializers import ProductListSerializer, shape_queryset
+
+PAGE = 20
+
+
+def active():
+    return Product.objects.filter(is_active=True)
+
+
+@hot_query("product_list", index_scan=True)
+def product_list():
+    return active().order_by("-created_at", "-id")[:PAGE]
+
+
+@hot_query("product_list_by_price", index_scan=True)
+def product_list_by_price():
+    return active().order_by("price", "id")[:PAGE]
+
+
+@hot_query("product_list_by_name", index_scan=True)
+def product_list_by_name():
+    return active().order_by("name", "id")[:PAGE]
+
+
+def keyset_page(field, value, descending):
+    """A keyset page past (value, 1), as ProductPagination queries it"""
+    queryset = shape_queryset(active(), ProductListSerializer)
+    cursor = {"v": value, "i": 1, "d": "n"}
+    return ProductPagination().keyset_queryset(queryset, field, cursor, descending)[
+        :PAGE
+    ]
+
+
+@hot_query("product_list_seek")
+def product_list_seek():
+    return keyset_page("created_at", timezone.now(), descending=True)
+
+
+@hot_query("product_list_seek_price")
+def product_list_seek_price():
+    return keyset_page("price", Decimal("10.00"), descending=False)
+
+
+@hot_query("product_count", index_scan=True)
+def product_count():
+    return active().order_by()
+
+
+@hot_query("product_price_filter")
+def product_price_filter():
+    return active().filter(price__gte=10, price__lte=50).order_by("price", "id")[:PAGE]
+
+
+@hot_query("product_by_category")
+def product_by_category():
+    return active().filter(category_id=1).order_by("-created_at", "-id")
+
+
+@hot_query("product_by_category_price")
+def product_by_category_price():
+    return active().filter(category_id=1).order_by("price", "id")[:PAGE]
+
+
+@hot_query("product_similar_fallback")
+def product_similar_fallback():
+    return (
+        active()
+        .filter(category_id=1, price__gte=Decimal("70"), price__lte=Decimal("130"))
+        .exclude(id=1)[:6]
+    )
+
+
+@hot_query("product_recommended")
+def product_recommended():
+    return (
+        active()
+        .filter(
+            recommended_for__product_id=1,
+            recommended_for__kind=ProductRecommendation.RELATED,
+        )
+        .order_by("recommended_for__rank")[:4]
+    )
+
+
+@hot_query("recommendation_neighbors")
+def recommendation_neighbors():
+    return ProductRecommendation.objects.filter(neighbor_id=1).values_list(
+        "product__category_id", flat=True
+    )
+
+
+@hot_query("featured_newest", index_scan=True)
+def featured_newest():
+    return active().filter(stock_quantity__gt=0).order_by("-created_at")[:200]
+
+
+@hot_query("featured_best_stocked")
+def featured_best_stocked():
+    return active().filter(stock_quantity__gt=0).order_by("-stock_quantity")[:200]
+
+
+@hot_query("suggestion_rebuild", index_scan=True)
+def suggestion_rebuild():
+    return active().order_by("-stock_quantity", "name").values_list("id", "name")
+
+
+@hot_query("reservation_expiry")
+def reservation_expiry():
+    return StockReservation.objects.filter(
+        status=StockReservation.HELD, expires_at__lte=timezone.now()
+    )
+
+
+@hot_query("reservation_by_reference")
+def reservation_by_reference():
+    return StockReservation.objects.filter(
+        reference="00000000-0000-0000-0000-000000000000", status=StockReservation.HELD
+    )
@@ -0,0 +1,198 @@
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .featured import featured_set
+from .models import Product, StockReservation
+
+
+class InventoryError(Exception):
+    pass
+
+
+class InsufficientStock(InventoryError):
+    """Raised when one or more lines cannot be reserved; nothing is held"""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+class ReservationExpired(InventoryError):
+    """Raised when committing a reservation that is no longer held"""
+
+
+def get_reservation_ttl():
+    options = getattr(settings, "INVENTORY", {})
+    return timedelta(seconds=options.get("RESERVATION_TTL", 900))
+
+
+def normalize_lines(lines):
+    """Merge (product_id, quantity) pairs, sorted by id to keep lock order stable"""
+    merged = defaultdict(int)
+    for product_id, quantity in lines:
+        if quantity <= 0:
+            raise ValueError("Reserved quantities must be positive")
+        merged[int(product_id)] += quantity
+    return sorted(merged.items())
+
+
+def stock_changed(product_ids):
+    """Refresh catalog caches after stock moved outside of Model.save()"""
+
+    def refresh():
+        bump_version(Product)
+        if any(featured_set.shows(product_id=pk) for pk in product_ids):
+            featured_set.invalidate()
+
+    transaction.on_commit(refresh)
+
+
+class DatabaseInventory:
+    """Reservations enforced by conditional UPDATEs on Product.stock_quantity
+
+    Each line runs ``UPDATE ... SET stock_quantity = stock_quantity - n WHERE
+    id = ? AND stock_quantity >= n``; the database applies it atomically, so
+    concurrent reservations can never take stock below zero.
+    """
+
+    def reserve(self, lines, ttl=None):
+        """Hold stock for every line or none of them; return the reference"""
+        lines = normalize_lines(lines)
+        reference = uuid.uuid4()
+        expires_at = timezone.now() + (ttl or get_reservation_ttl())
+
+        with transaction.atomic():
+            failed = [
+                product_id
+                for product_id, quantity in lines
+                if not Product.objects.filter(
+                    id=product_id, is_active=True, stock_quantity__gte=quantity
+                ).update(stock_quantity=F("stock_quantity") - quantity)
+            ]
+            if failed:
+                raise InsufficientStock(failed)
+
+            StockReservation.objects.bulk_create(
+                StockReservation(
+                    reference=reference,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, quantity in lines
+            )
+            stock_changed([product_id for product_id, _ in lines])
+        return reference
+
+    def commit(self, reference):
+        """Make a held reservation permanent"""
+        with transaction.atomic():
+            committed = StockReservation.objects.filter(
+                reference=reference,
+                status=StockReservation.HELD,
+                expires_at__gt=timezone.now(),
+            ).update(status=StockReservation.COMMITTED)
+            if not committed:
+                raise ReservationExpired(f"Reservation {reference} is not held")
+        return committed
+
+    def _release(self, reservations):
+        restock = defaultdict(int)
+        for pk, product_id, quantity in reservations:
+            # Only the caller that flips the status puts the stock back
+            if StockReservation.objects.filter(
+                pk=pk, status=StockReservation.HELD
+            ).update(status=StockReservation.RELEASED):
+                restock[product_id] += quantity
+        for product_id, quantity in sorted(restock.items()):
+            Product.objects.filter(id=product_id).update(
+                stock_quantity=F("stock_quantity") + quantity
+            )
+        if restock:
+            stock_changed(list(restock))
+        return sum(restock.values())
+
+    def release(self, reference):
+        """Return held stock to the shelf; returns the quantity released"""
+        with transaction.atomic():
+            return self._release(
+                StockReservation.objects.filter(
+                    reference=reference, status=StockReservation.HELD
+                ).values_list("pk", "product_id", "quantity")
+            )
+
+    def expire(self, now=None):
+        """Release every held reservation past its expiry"""
+        with transaction.atomic():
+            return self._release(
+                StockReservation.objects.filter(
+                    status=StockReservation.HELD, expires_at__lte=now or timezone.now()
+                ).values_list("pk", "product_id", "quantity")
+            )
+
+
+class MemoryInventory:
+    """In-process stand-in with the same interface, guarded by one lock"""
+
+    def __init__(self, stock):
+        self.stock = dict(stock)
+        self.reservations = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, lines, ttl=None):
+        lines = normalize_lines(lines)
+        expires_at = timezone.now() + (ttl or get_reservation_ttl())
+        with self._lock:
+            failed = [pk for pk, quantity in lines if self.stock.get(pk, 0) < quantity]
+            if failed:
+                raise InsufficientStock(failed)
+            for product_id, quantity in lines:
+                self.stock[product_id] -= quantity
+            reference = uuid.uuid4()
+            self.reservations[reference] = [StockReservation.HELD, expires_at, lines]
+        return reference
+
+    def commit(self, reference):
+        with self._lock:
+            reservation = self.reservations.get(reference)
+            if (
+                reservation is None
+                or reservation[0] != StockReservation.HELD
+                or reservation[1] <= timezone.now()
+            ):
+                raise ReservationExpired(f"Reservation {reference} is not held")
+            reservation[0] = StockReservation.COMMITTED
+            return len(reservation[2])
+
+    def _release(self, reservation):
+        reservation[0] = StockReservation.RELEASED
+        for product_id, quantity in reservation[2]:
+            self.stock[product_id] += quantity
+        return sum(quantity for _, quantity in reservation[2])
+
+    def release(self, reference):
+        with self._lock:
+            reservation = self.reservations.get(reference)
+            if reservation is None or reservation[0] != StockReservation.HELD:
+                return 0
+            return self._release(reservation)
+
+    def expire(self, now=None):
+        now = now or timezone.now()
+        with self._lock:
+            return sum(
+                self._release(reservation)
+                for reservation in self.reservations.values()
+                if reservation[0] == StockReservation.HELD and reservation[1] <= now
+            )
+
+
+inventory = DatabaseInventory()
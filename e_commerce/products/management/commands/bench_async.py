@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from products.models import Category, Product
+
+# Endpoint templates under /api/ and /api/async/
+ENDPOINTS = {
+    "list": "products/?page={page}",
+    "retrieve": "products/{id}/",
+    "similar": "products/{id}/similar/",
+}
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare catalog reads through the sync (WSGI) views on a thread pool "
+        "with the async (ASGI) views on one event loop, using in-process clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=500,
+            help="Seed this many throwaway products (deleted afterwards)",
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+        )
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        category = None
+        if options["synthetic"]:
+            category = self.seed(options["synthetic"])
+        try:
+            product_ids = list(
+                Product.objects.filter(is_active=True).values_list("id", flat=True)
+            )
+            for name in options["endpoints"]:
+                for repeat in (True, False):
+                    paths = self.paths(
+                        ENDPOINTS[name], product_ids, options["requests"], repeat
+                    )
+                    label = f"{name} ({'repeat' if repeat else 'unique'} urls)"
+                    self.report(
+                        label, "sync", self.run_sync(paths, options["threads"])
+                    )
+                    self.report(
+                        label,
+                        "async",
+                        asyncio.run(self.run_async(paths, options["concurrency"])),
+                    )
+        finally:
+            if category is not None:
+                Product.objects.filter(category=category).delete()
+                category.delete()
+
+    def seed(self, count):
+        category = Category.objects.create(name="Async benchmark")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Async benchmark {i}",
+                description="async benchmark",
+                price=Decimal("10.00") + i % 100,
+                category=category,
+                stock_quantity=i % 40,
+            )
+            for i in range(count)
+        )
+        return category
+
+    def paths(self, template, product_ids, count, repeat):
+        """Request paths cycling through a few pages and products
+
+        Without ``repeat`` every path gets a unique parameter, so responses
+        are never served from the response cache.
+        """
+        pages = max(len(product_ids) // 20, 1)
+        ids = itertools.cycle(product_ids[:50])
+        paths = []
+        for number in range(count):
+            path = template.format(page=number % min(pages, 10) + 1, id=next(ids))
+            if not repeat:
+                path += ("&" if "?" in path else "?") + f"_={number}"
+            paths.append(path)
+        return paths
+
+    def run_sync(self, paths, threads):
+        local = threading.local()
+
+        def get(path):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get("/api/" + path)
+            elapsed = time.perf_counter() - started
+            connections.close_all()
+            return response.status_code, elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(get, paths))
+        return results, time.perf_counter() - started
+
+    async def run_async(self, paths, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/async/" + path)
+                return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get(path) for path in paths))
+        return results, time.perf_counter() - started
+
+    def report(self, label, mode, outcome):
+        results, elapsed = outcome
+        timings = [seconds * 1000 for status, seconds in results]
+        errors = sum(status != 200 for status, seconds in results)
+        self.stdout.write(
+            f"{label:22} {mode:5}  {len(results) / elapsed:7.0f} req/s  "
+            f"p50 {statistics.median(timings):7.2f} ms  "
+            f"p99 {percentile(timings, 0.99):7.2f} ms  {errors} errors"
+        )
@@ -0,0 +1,80 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = "Compare per-item PATCH against the bulk endpoint for the same writes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500)
+        parser.add_argument("--batch", type=int, default=250)
+
+    # Refresh recommendations inline: both paths pay for the refreshes they
+    # trigger, and no worker thread contends for SQLite's write lock
+    @override_settings(PRODUCT_RECOMMENDATIONS={"BACKGROUND": False})
+    def handle(self, *args, **options):
+        category = Category.objects.create(name="Bulk benchmark")
+        user = get_user_model().objects.create_user(
+            email="bulk-benchmark@example.com",
+            username="bulk-benchmark",
+            password=None,
+            is_staff=True,
+        )
+        client = APIClient(HTTP_HOST="localhost")
+        client.force_authenticate(user)
+        try:
+            products = Product.objects.bulk_create(
+                Product(
+                    name=f"Benchmark {i}",
+                    description="bulk benchmark",
+                    price=Decimal("10.00"),
+                    category=category,
+                    stock_quantity=100,
+                )
+                for i in range(options["products"])
+            )
+            ids = [product.id for product in products]
+
+            started = time.perf_counter()
+            for product_id in ids:
+                response = client.patch(
+                    f"/api/products/{product_id}/",
+                    {"price": "11.00", "stock_quantity": 90},
+                    format="json",
+                )
+                if response.status_code != 200:
+                    raise CommandError(f"PATCH failed: {response.content[:500]}")
+            single = len(ids) / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for start in range(0, len(ids), options["batch"]):
+                batch = ids[start : start + options["batch"]]
+                # The fields each PATCH above wrote, with new values
+                operations = [
+                    {
+                        "op": "update",
+                        "id": product_id,
+                        "data": {"price": "12.00", "stock_quantity": 80},
+                    }
+                    for product_id in batch
+                ]
+                response = client.post(
+                    "/api/products/bulk/", {"operations": operations}, format="json"
+                )
+                if response.status_code != 200:
+                    raise CommandError(f"Bulk request failed: {response.content[:500]}")
+            bulk = len(ids) / (time.perf_counter() - started)
+        finally:
+            category.delete()
+            user.delete()
+
+        self.stdout.write(f"PATCH per item   {single:9.0f} ops/s")
+        self.stdout.write(f"bulk ({options['batch']:4d}/req) {bulk:9.0f} ops/s")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {bulk / single:.1f}x"))
@@ -0,0 +1,174 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import F
+
+from products.models import Category, Product
+
+PAGE = 20
+
+
+def profile_database(name, profile):
+    """Settings of the default database with ``profile`` applied to ``name``"""
+    config = dict(connections.settings[DEFAULT_DB_ALIAS])
+    config.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, OPTIONS={})
+    config.update(settings.DATABASE_PROFILES[profile])
+    config["NAME"] = name
+    return config
+
+
+def run_load(alias, product_ids, readers=8, writers=4, seconds=5.0, seed=0):
+    """Hammer ``alias`` with product reads and admin-style writes from threads
+
+    Readers page through the product list. Writers alternate a stock edit
+    (read the row, then update it, like a ProductAdmin list edit) and a
+    registration (check the email, then insert the user). Every operation
+    ends the way a request does, so per-request connections are closed and
+    persistent ones reused. A "database is locked" error fails the operation.
+    """
+    User = get_user_model()
+    lock = threading.Lock()
+    totals = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    deadline = time.perf_counter() + seconds
+
+    def read(rng):
+        offset = rng.randrange(0, max(len(product_ids) - PAGE, 1))
+        rows = (
+            Product.objects.using(alias)
+            .filter(is_active=True)
+            .order_by("-created_at", "-id")
+            .values_list("id", "name", "price", "stock_quantity")
+        )
+        list(rows[offset : offset + PAGE])
+
+    def write(rng, number):
+        with transaction.atomic(using=alias):
+            if number % 2:
+                product_id = rng.choice(product_ids)
+                product = Product.objects.using(alias).only("stock_quantity").get(
+                    id=product_id
+                )
+                step = 1 if product.stock_quantity < 50 else -1
+                Product.objects.using(alias).filter(id=product_id).update(
+                    stock_quantity=F("stock_quantity") + step
+                )
+            else:
+                email = f"load-{threading.get_ident()}-{number}@example.com"
+                if not User.objects.using(alias).filter(email=email).exists():
+                    user = User(email=email, username=email)
+                    user.set_unusable_password()
+                    user.save(using=alias)
+
+    def worker(index, writer):
+        rng = random.Random(seed + index)
+        kind = "writes" if writer else "reads"
+        done = errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    if writer:
+                        write(rng, done + errors)
+                    else:
+                        read(rng)
+                    done += 1
+                except OperationalError:
+                    errors += 1
+                finally:
+                    connections[alias].close_if_unusable_or_obsolete()
+        finally:
+            connections[alias].close()
+            with lock:
+                totals[kind] += done
+                totals[kind[:-1] + "_errors"] += errors
+
+    threads = [
+        threading.Thread(target=worker, args=(index, index < writers))
+        for index in range(readers + writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    totals["elapsed"] = time.perf_counter() - started
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare SQLite throughput and lock errors of the database profiles "
+        "under concurrent reads and writes, each on a scratch database file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", nargs="+", default=list(settings.DATABASE_PROFILES)
+        )
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        unknown = set(options["profiles"]) - set(settings.DATABASE_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown database profiles: {sorted(unknown)}")
+        if connections[DEFAULT_DB_ALIAS].vendor != "sqlite":
+            raise CommandError("The database profiles tune SQLite")
+
+        for profile in options["profiles"]:
+            alias = f"bench_{profile}"
+            with tempfile.TemporaryDirectory() as directory:
+                connections.settings[alias] = profile_database(
+                    os.path.join(directory, "bench.sqlite3"), profile
+                )
+                try:
+                    call_command("migrate", database=alias, verbosity=0)
+                    product_ids = self.seed(alias, options["products"])
+                    totals = run_load(
+                        alias,
+                        product_ids,
+                        options["readers"],
+                        options["writers"],
+                        options["seconds"],
+                    )
+                finally:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+            self.report(profile, totals)
+
+    def seed(self, alias, count):
+        category = Category.objects.using(alias).create(name="Benchmark")
+        products = Product.objects.using(alias).bulk_create(
+            Product(
+                name=f"Benchmark {i}",
+                description="database benchmark",
+                price=Decimal("10.00") + i % 100,
+                category=category,
+                stock_quantity=25,
+            )
+            for i in range(count)
+        )
+        return [product.id for product in products]
+
+    def report(self, profile, totals):
+        elapsed = totals["elapsed"]
+        for kind in ("read", "write"):
+            done = totals[f"{kind}s"]
+            errors = totals[f"{kind}_errors"]
+            attempted = done + errors
+            rate = errors / attempted if attempted else 0
+            self.stdout.write(
+                f"{profile:12} {kind}s  {done / elapsed:9.0f} ops/s  "
+                f"{errors:6d} locked ({rate:.1%})"
+            )
@@ -0,0 +1,99 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.models import Category, Product
+from products.search import FTS5SearchIndex, PythonSearchIndex, fts5_available
+
+WORDS = (
+    "wireless bluetooth headphones laptop stand charger cable leather wallet "
+    "running shoes coffee grinder ceramic mug desk lamp keyboard mouse monitor "
+    "backpack water bottle yoga mat camera lens tripod speaker notebook pen"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compare the search index against the icontains SearchFilter path"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            help="Seed this many throwaway products (rolled back afterwards)",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--queries", nargs="*", default=["lap", "wireless head", "mug", "notebook"]
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["synthetic"]:
+                self.seed(options["synthetic"])
+            self.run(options["queries"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        category = Category.objects.create(name="Benchmark")
+        rng = random.Random(0)
+        # Brand-like words make the vocabulary realistically selective
+        vocabulary = WORDS + [
+            "".join(rng.choices("bcdfghjklmnprstvz", k=3)) + rng.choice(WORDS)
+            for _ in range(2000)
+        ]
+        batch = []
+        for i in range(count):
+            batch.append(
+                Product(
+                    name=" ".join(rng.sample(vocabulary, 3)),
+                    description=" ".join(rng.choices(vocabulary, k=30)),
+                    price=Decimal(rng.randint(100, 50000)) / 100,
+                    category=category,
+                )
+            )
+        Product.objects.bulk_create(batch, batch_size=2000)
+        self.stdout.write(f"Seeded {count} products")
+
+    def run(self, queries, repeat):
+        backends = {}
+        icontains = filters.SearchFilter()
+        view = type("View", (), {"search_fields": ["name", "description"]})()
+        factory = APIRequestFactory()
+
+        def search_filter(query):
+            # What the list endpoint did before: COUNT(*) plus the first page
+            request = Request(factory.get("/", {"search": query}))
+            queryset = icontains.filter_queryset(
+                request, Product.objects.filter(is_active=True), view
+            )
+            queryset.count()
+            return list(queryset.values_list("id", flat=True)[:20])
+
+        backends["SearchFilter (icontains)"] = search_filter
+
+        python_index = PythonSearchIndex()
+        started = time.perf_counter()
+        python_index.rebuild()
+        self.stdout.write(f"Python index built in {time.perf_counter() - started:.3f}s")
+        backends["PythonSearchIndex"] = python_index.search
+
+        if fts5_available():
+            fts_index = FTS5SearchIndex()
+            fts_index.rebuild()
+            backends["FTS5SearchIndex"] = fts_index.search
+
+        for name, search in backends.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for query in queries:
+                    search(query)
+            elapsed = time.perf_counter() - started
+            per_query = elapsed / (repeat * len(queries)) * 1000
+            self.stdout.write(f"{name:28s} {per_query:8.3f} ms/query")
@@ -0,0 +1,95 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from products.compiled import compile_serializer
+from products.models import Category, Product
+from products.renderers import FastJSONRenderer
+from products.serializers import (
+    COMPUTED_FIELD_DEPENDENCIES,
+    ProductListSerializer,
+    shape_queryset,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare ProductListSerializer + JSONRenderer against the compiled fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=1000,
+            help="Seed this many throwaway products (rolled back afterwards)",
+        )
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["synthetic"]:
+                self.seed(options["synthetic"])
+            self.run(options["page_size"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        category = Category.objects.create(name="Benchmark")
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Benchmark product {i}",
+                    description="benchmark",
+                    price=Decimal(1000 + i) / 100,
+                    category=category,
+                    image_url=f"https://example.com/{i}.png",
+                    stock_quantity=i % 7,
+                )
+                for i in range(count)
+            ),
+            batch_size=2000,
+        )
+
+    def run(self, page_size, repeat):
+        queryset = Product.objects.filter(is_active=True).order_by("-created_at", "-id")
+        computed = tuple(
+            (name, tuple(columns)) for name, columns in COMPUTED_FIELD_DEPENDENCIES.items()
+        )
+        compiled = compile_serializer(ProductListSerializer, computed)
+
+        paths = {
+            "ModelSerializer + json": (
+                lambda: ProductListSerializer(
+                    shape_queryset(queryset, ProductListSerializer)[:page_size],
+                    many=True,
+                ).data,
+                JSONRenderer(),
+            ),
+            "compiled + orjson": (
+                lambda: compiled.serialize(compiled.queryset(queryset)[:page_size]),
+                FastJSONRenderer(),
+            ),
+        }
+        results = {}
+        for name, (serialize, renderer) in paths.items():
+            serializing = rendering = 0.0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                data = serialize()
+                serialized = time.perf_counter()
+                content = renderer.render(data)
+                serializing += serialized - started
+                rendering += time.perf_counter() - serialized
+            results[name] = content
+            self.stdout.write(
+                f"{name:24s} {(serializing + rendering) / repeat * 1000:7.2f} ms/page  "
+                f"(query + serialize {serializing / repeat * 1000:.2f} ms, "
+                f"render {rendering / repeat * 1000:.2f} ms)"
+            )
+
+        first, second = results.values()
+        if first != second:
+            raise CommandError("Compiled output differs from the serializer output")
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-for-byte identical"))
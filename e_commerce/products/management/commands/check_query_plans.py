@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from products.query_plans import check_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every registered hot query and fail if any reads a whole table "
+        "instead of an index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Only check these queries")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        failed = []
+        try:
+            for name, plan, scans in check_plans(options["names"], options["database"]):
+                if scans:
+                    failed.append(name)
+                    self.stdout.write(
+                        self.style.ERROR(f"{name}: full scan of {', '.join(scans)}")
+                    )
+                else:
+                    self.stdout.write(f"{name}: ok")
+                if scans or options["verbosity"] > 1:
+                    for line in plan.splitlines():
+                        self.stdout.write(f"    {line}")
+        except KeyError as exc:
+            raise CommandError(f"Unknown hot query {exc}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if failed:
+            raise CommandError(f"{len(failed)} hot queries fall back to a full scan")
+        self.stdout.write(self.style.SUCCESS("Every hot query uses an index"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.inventory import inventory
+
+
+class Command(BaseCommand):
+    help = "Return stock held by expired reservations"
+
+    def handle(self, *args, **options):
+        released = inventory.expire()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} units"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.catalog import CHUNK_SIZE, FORMATS, export_lines, guess_format
+
+
+class Command(BaseCommand):
+    help = "Stream every product to a CSV or JSONL file without loading the table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Output file, stdout if omitted")
+        parser.add_argument("--format", dest="file_format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or guess_format(path or "")
+        lines = export_lines(file_format, chunk_size=options["chunk_size"])
+        if not path:
+            for text in lines:
+                self.stdout.write(text, ending="")
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            for text in lines:
+                stream.write(text)
+        self.stdout.write(self.style.SUCCESS(f"Exported products to {path}"))
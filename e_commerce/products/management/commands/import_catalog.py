@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog import CHUNK_SIZE, FORMATS, CatalogError, guess_format, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Bulk import products from a CSV or JSONL file, chunk by chunk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", dest="file_format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--no-create-categories",
+            action="store_false",
+            dest="create_categories",
+            help="Reject rows whose category does not exist",
+        )
+        parser.add_argument(
+            "--errors", help="Write the per-chunk error report to this JSONL file"
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["file_format"] or guess_format(options["path"])
+        error_report = open(options["errors"], "w") if options["errors"] else None
+
+        def on_chunk(report, totals):
+            self.stdout.write(
+                f"chunk {report['chunk']} (lines {report['lines'][0]}-{report['lines'][1]}): "
+                f"{report['created']} created, {report['updated']} updated, "
+                f"{len(report['errors'])} errors, {report['rows_per_second']} rows/s"
+            )
+            if report["errors"] and error_report:
+                error_report.write(json.dumps(report) + "\n")
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8") as stream:
+                totals = import_catalog(
+                    stream,
+                    file_format,
+                    chunk_size=options["chunk_size"],
+                    create_categories=options["create_categories"],
+                    on_chunk=on_chunk,
+                )
+        except (CatalogError, OSError) as exc:
+            raise CommandError(exc)
+        finally:
+            if error_report:
+                error_report.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {totals['rows']} rows in {totals['elapsed']}s: "
+                f"{totals['created']} created, {totals['updated']} updated, "
+                f"{totals['failed']} failed"
+            )
+        )
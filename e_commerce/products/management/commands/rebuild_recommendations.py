@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute precomputed related/similar product recommendations"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = recommendations.rebuild_all()
+        scorer = "NumPy" if recommendations.np is not None else "pure Python"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {total} recommendations in "
+                f"{time.perf_counter() - started:.2f}s ({scorer} scoring)"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.search import PythonSearchIndex, get_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the database"
+
+    def handle(self, *args, **options):
+        index = get_search_index()
+        if isinstance(index, PythonSearchIndex):
+            # Its index lives in each server process, out of this one's reach
+            raise CommandError(
+                "The python search backend is built in memory by each server "
+                "process on its first search; restart the servers to rebuild it."
+            )
+        index.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {type(index).__name__} search index")
+        )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.featured import featured_set
+
+
+class Command(BaseCommand):
+    help = "Rebuild and publish the featured products snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and refresh every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            snapshot = featured_set.refresh()
+            self.stdout.write(
+                self.style.SUCCESS(f"Featured products: {snapshot['ids']}")
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
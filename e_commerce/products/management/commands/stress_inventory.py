@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from products.inventory import DatabaseInventory, InsufficientStock, MemoryInventory
+from products.models import Category, Product
+
+
+def run_stress(inventory, product_ids, threads=8, attempts=200, seed=0):
+    """Hammer ``inventory`` with concurrent multi-line reserve/commit/release
+
+    Every third successful reservation is released, the rest committed.
+    Returns counters including the quantity each product had taken, which
+    callers compare against the starting stock to prove nothing oversold.
+    """
+    lock = threading.Lock()
+    totals = {
+        "reserved": 0,
+        "rejected": 0,
+        "released": 0,
+        "lock_errors": 0,
+        "taken": {product_id: 0 for product_id in product_ids},
+    }
+
+    def retrying(func, *args):
+        while True:
+            try:
+                return func(*args)
+            except OperationalError:
+                # SQLite "database is locked": count it and retry
+                with lock:
+                    totals["lock_errors"] += 1
+                time.sleep(0.001)
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        try:
+            for attempt in range(attempts):
+                lines = [
+                    (product_id, rng.randint(1, 3))
+                    for product_id in rng.sample(product_ids, rng.randint(1, 2))
+                ]
+                try:
+                    reference = retrying(inventory.reserve, lines)
+                except InsufficientStock:
+                    with lock:
+                        totals["rejected"] += 1
+                    continue
+
+                release = attempt % 3 == 0
+                retrying(inventory.release if release else inventory.commit, reference)
+                with lock:
+                    if release:
+                        totals["released"] += 1
+                    else:
+                        totals["reserved"] += 1
+                        for product_id, quantity in lines:
+                            totals["taken"][product_id] += quantity
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    totals["elapsed"] = time.perf_counter() - started
+    operations = totals["reserved"] + totals["released"] + totals["rejected"]
+    totals["per_second"] = operations / totals["elapsed"] if totals["elapsed"] else 0
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Concurrent reservation stress test against the database and in-process stand-in"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--attempts", type=int, default=200)
+        parser.add_argument("--products", type=int, default=5)
+        parser.add_argument("--stock", type=int, default=300)
+
+    def handle(self, *args, **options):
+        category = Category.objects.create(name="Inventory stress test")
+        try:
+            products = Product.objects.bulk_create(
+                Product(
+                    name=f"Stress {i}",
+                    description="stress test",
+                    price=Decimal("1.00"),
+                    category=category,
+                    stock_quantity=options["stock"],
+                )
+                for i in range(options["products"])
+            )
+            ids = [product.id for product in products]
+            database = self.verify(
+                "SQLite",
+                DatabaseInventory(),
+                ids,
+                options,
+                lambda: dict(
+                    Product.objects.filter(id__in=ids).values_list("id", "stock_quantity")
+                ),
+            )
+            memory_inventory = MemoryInventory({pk: options["stock"] for pk in ids})
+            memory = self.verify(
+                "in-process", memory_inventory, ids, options, lambda: memory_inventory.stock
+            )
+        finally:
+            category.delete()
+
+        self.stdout.write(
+            f"Speedup of in-process stand-in: {memory / database:.1f}x"
+            if database
+            else ""
+        )
+
+    def verify(self, label, inventory, ids, options, current_stock):
+        totals = run_stress(inventory, ids, options["threads"], options["attempts"])
+        stock = current_stock()
+        for product_id in ids:
+            remaining = stock[product_id]
+            if remaining < 0 or remaining + totals["taken"][product_id] != options["stock"]:
+                raise CommandError(
+                    f"{label}: product {product_id} oversold "
+                    f"(remaining {remaining}, taken {totals['taken'][product_id]})"
+                )
+        self.stdout.write(
+            f"{label:10s} {totals['per_second']:9.0f} ops/s  "
+            f"committed={totals['reserved']} released={totals['released']} "
+            f"rejected={totals['rejected']} lock_errors={totals['lock_errors']}  "
+            "oversell=0"
+        )
+        return totals["per_second"]
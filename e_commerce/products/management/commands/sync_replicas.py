@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from products.replicas import copy_database, get_replica_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over each catalog replica; a local "
+        "stand-in for replication"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep copying every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        aliases = get_replica_settings()["ALIASES"]
+        if not aliases:
+            raise CommandError("No replicas configured in CATALOG_REPLICAS")
+        databases = [connections[alias] for alias in [DEFAULT_DB_ALIAS, *aliases]]
+        if any(database.vendor != "sqlite" for database in databases):
+            raise CommandError("Only SQLite databases can be copied")
+
+        source = databases[0].settings_dict["NAME"]
+        while True:
+            started = time.perf_counter()
+            for alias, database in zip(aliases, databases[1:]):
+                copy_database(source, database.settings_dict["NAME"])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Synced {len(aliases)} replicas in {elapsed:.3f}s")
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('related', 'Related'), ('similar', 'Similar')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='products.product')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'kind', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'rank'), name='unique_recommendation_rank')],
+            },
+        ),
+    ]
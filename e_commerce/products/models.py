@@ -28,6 +28,43 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # Partial on is_active: Django filters booleans as a bare column, which
+        # SQLite can only match against an index condition, not a key column
+        indexes = [
+            # Keyset pagination seeks on (ordering field, id) among active rows
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_created_idx",
+            ),
+            models.Index(
+                fields=["price", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_price_idx",
+            ),
+            models.Index(
+                fields=["name", "id"],
+                condition=models.Q(is_active=True),
+                name="product_active_name_idx",
+            ),
+            # Category pages and the similar products price range scan
+            models.Index(
+                fields=["category", "created_at", "id"],
+                condition=models.Q(is_active=True),
+                name="product_category_created_idx",
+            ),
+            models.Index(
+                fields=["category", "price", "id"],
+                condition=models.Q(is_active=True),
+                name="product_category_price_idx",
+            ),
+            # Best stocked first: featured candidates and search suggestions
+            models.Index(
+                fields=["-stock_quantity", "name"],
+                condition=models.Q(is_active=True),
+                name="product_active_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -35,3 +72,69 @@ class Product(models.Model):
     @property
     def is_in_stock(self):
         return self.stock_quantity > 0
+
+
+class ProductRecommendation(models.Model):
+    """Precomputed ranked neighbors of a product, see products/recommendations.py"""
+
+    RELATED = "related"
+    SIMILAR = "similar"
+    KINDS = [
+        (RELATED, "Related"),
+        (SIMILAR, "Similar"),
+    ]
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    neighbor = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="recommended_for"
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["product", "kind", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "kind", "rank"], name="unique_recommendation_rank"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbor_id} ({self.kind} #{self.rank})"
+
+
+class StockReservation(models.Model):
+    """Stock held for an order in progress, see products/inventory.py
+
+    Stock is decremented when the reservation is made; committing keeps it
+    taken, releasing or expiring puts it back.
+    """
+
+    HELD = "held"
+    COMMITTED = "committed"
+    RELEASED = "released"
+    STATUSES = [
+        (HELD, "Held"),
+        (COMMITTED, "Committed"),
+        (RELEASED, "Released"),
+    ]
+
+    reference = models.UUIDField(db_index=True)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="reservations"
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="reservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} ({self.status})"
@@ -0,0 +1,206 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import F
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductPagination(PageNumberPagination):
+    """Page number pagination with an opt-in keyset (cursor) mode
+
+    Passing ``?cursor=`` switches to keyset pagination: rows are ordered by one
+    of the view's ``ordering_fields`` plus ``id`` as a tiebreaker, and each page
+    seeks past the last row of the previous one instead of using OFFSET, so
+    deep pages cost the same as the first. ``?count=false`` skips the COUNT(*).
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    tiebreak_field = "id"
+    # Seek value is annotated so it is available even when only() defers it
+    cursor_value_attr = "keyset_value"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        self.count = None
+        if self.include_count(request):
+            self.count = queryset.order_by().count()
+
+        field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        reverse = cursor is not None and cursor["d"] == "p"
+        if reverse:
+            descending = not descending
+
+        queryset = self.keyset_queryset(queryset, field, cursor, descending)
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Page number pagination that counts and fetches with the async ORM
+
+        Keyset pages are not supported here; use paginate_queryset for them.
+        """
+        self.keyset = False
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.page.object_list = [row async for row in self.page.object_list]
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.page[-1], "n")
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.build_link(self.page[0], "p")
+
+    def get_ordering(self, request, view):
+        """Return the single ordering term used as the seek key"""
+        allowed = getattr(view, "ordering_fields", None) or []
+        for term in request.query_params.get("ordering", "").split(","):
+            term = term.strip()
+            if term.lstrip("-") in allowed:
+                return term
+        default = getattr(view, "ordering", None) or ["-" + self.tiebreak_field]
+        return default[0] if isinstance(default, (list, tuple)) else default
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("0", "false", "no")
+
+    def keyset_queryset(self, queryset, field, cursor, descending):
+        """The rows of a keyset page, before its LIMIT"""
+        prefix = "-" if descending else ""
+        queryset = queryset.annotate(**{self.cursor_value_attr: F(field)}).order_by(
+            prefix + field, prefix + self.tiebreak_field
+        )
+        if cursor is not None:
+            queryset = self.seek(queryset, field, cursor, descending)
+        return queryset
+
+    def seek(self, queryset, field, cursor, descending):
+        """Rows after (value, id) in the (field, id) order
+
+        Written as a range on ``field`` minus the rows of the boundary value
+        already seen, rather than ``field > value OR (field = value AND id >
+        pk)``: databases (SQLite among them) do not turn that OR into an index
+        range, and walk the index from its start on every page.
+        """
+        value, pk = cursor["v"], cursor["i"]
+        if descending:
+            bound, seen = "lte", "gte"
+        else:
+            bound, seen = "gte", "lte"
+        return queryset.filter(**{f"{field}__{bound}": value}).exclude(
+            **{field: value, f"{self.tiebreak_field}__{seen}": pk}
+        )
+
+    def build_link(self, instance, direction):
+        value = getattr(instance, self.cursor_value_attr)
+        token = {
+            "o": self.ordering,
+            "v": value.isoformat() if hasattr(value, "isoformat") else str(value),
+            "i": getattr(instance, self.tiebreak_field),
+            "d": direction,
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(token, separators=(",", ":")).encode()
+        ).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        """Decode the opaque cursor, returning None for the first page
+
+        Values are converted by the model fields, so a tampered cursor is
+        rejected here rather than failing the query.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            token = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if token["o"] != self.ordering or token["d"] not in ("n", "p"):
+                raise ValueError
+            field = model._meta.get_field(self.ordering.lstrip("-"))
+            tiebreak = model._meta.get_field(self.tiebreak_field)
+            value = field.to_python(token["v"])
+            pk = tiebreak.to_python(token["i"])
+            if value is None or pk is None:
+                raise ValueError
+            return {"v": value, "i": pk, "d": token["d"]}
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeDecodeError,
+            ValidationError,
+            FieldDoesNotExist,
+        ):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,71 @@
+import re
+
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+# Name -> function returning the queryset of a hot query shape; filled by
+# the ``hot_queries`` module of each installed app
+hot_queries = {}
+
+# Plan lines that read a whole table, or walk a whole index without a range
+# (sqlite's "SCAN t USING INDEX i", as opposed to "SEARCH t USING INDEX i
+# (col>?)"); the second group is set for index walks
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(
+        r"\bSCAN (?!CONSTANT\b)(?:TABLE )?(\w+)"
+        r"( USING (?:COVERING )?INDEX\b| USING INTEGER PRIMARY KEY\b)?"
+    ),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)()"),
+}
+
+
+def hot_query(name, index_scan=False):
+    """Register a function returning a queryset as a hot query shape
+
+    ``index_scan`` accepts walking an index without a range: first pages
+    read in index order and stopped by their LIMIT, and queries that read
+    every row by design. Seeks and filters must show a range instead.
+    """
+
+    def decorator(func):
+        func.index_scan = index_scan
+        hot_queries[name] = func
+        return func
+
+    return decorator
+
+
+def discover():
+    autodiscover_modules("hot_queries")
+    return hot_queries
+
+
+def full_scans(plan, vendor, index_scan=False):
+    """Tables a query plan reads in full
+
+    An index walked from one end counts unless ``index_scan`` allows it.
+    """
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        raise ValueError(f"Query plans of {vendor!r} databases are not checked")
+    return sorted(
+        {
+            table
+            for table, using_index in pattern.findall(plan)
+            if not (using_index and index_scan)
+        }
+    )
+
+
+def check_plans(names=None, using="default"):
+    """Yield (name, plan, fully scanned tables) for the registered queries"""
+    queries = discover()
+    vendor = connections[using].vendor
+    for name in names or sorted(queries):
+        if name not in queries:
+            raise KeyError(name)
+        query = queries[name]
+        plan = query().using(using).explain()
+        yield name, plan, full_scans(
+            plan, vendor, getattr(query, "index_scan", False)
+        )
@@ -0,0 +1,254 @@
+import logging
+import math
+import queue
+import threading
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .cache import bump_version
+from .models import Product, ProductRecommendation
+from .search import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - pure Python scoring is used instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+RELATED_LIMIT = 4
+SIMILAR_LIMIT = 6
+# Similar products must be priced within this band of the product
+SIMILAR_PRICE_BAND = (0.7, 1.3)
+TEXT_WEIGHT = 0.5
+PRICE_WEIGHT = 0.5
+# Hashed bag-of-words dimensions for text similarity
+HASH_DIMENSIONS = 256
+BLOCK_SIZE = 512
+
+
+def text_vector(text):
+    """Hashed, L2-normalized term counts of ``text``"""
+    vector = defaultdict(float)
+    for token in tokenize(text):
+        vector[zlib.crc32(token.encode()) % HASH_DIMENSIONS] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {dim: value / norm for dim, value in vector.items()} if norm else {}
+
+
+def price_similarity(a, b):
+    high = max(a, b)
+    return 1.0 if high == 0 else min(a, b) / high
+
+
+def in_price_band(price, candidate):
+    low, high = SIMILAR_PRICE_BAND
+    return price * low <= candidate <= price * high
+
+
+def score_python(ids, prices, vectors):
+    """Reference O(n^2) scoring pass used when NumPy is not installed"""
+    results = {}
+    for i, product_id in enumerate(ids):
+        scored = []
+        for j, neighbor_id in enumerate(ids):
+            if i == j:
+                continue
+            text = sum(
+                value * vectors[j].get(dim, 0.0) for dim, value in vectors[i].items()
+            )
+            score = TEXT_WEIGHT * text + PRICE_WEIGHT * price_similarity(
+                prices[i], prices[j]
+            )
+            scored.append((-score, neighbor_id, prices[j]))
+        scored.sort()
+        related = [(pk, -score) for score, pk, _ in scored[:RELATED_LIMIT]]
+        similar = [
+            (pk, -score)
+            for score, pk, price in scored
+            if in_price_band(prices[i], price)
+        ][:SIMILAR_LIMIT]
+        results[product_id] = {
+            ProductRecommendation.RELATED: related,
+            ProductRecommendation.SIMILAR: similar,
+        }
+    return results
+
+
+def top_k(ids, scores, limit):
+    """Indices of the ``limit`` best scores per row, ties broken by id"""
+    order = np.lexsort((np.broadcast_to(ids, scores.shape), -scores), axis=1)
+    return order[:, :limit]
+
+
+def score_numpy(ids, prices, vectors):
+    """Vectorized scoring pass, processed in row blocks to bound memory"""
+    count = len(ids)
+    ids = np.asarray(ids)
+    prices = np.asarray(prices, dtype=np.float64)
+    matrix = np.zeros((count, HASH_DIMENSIONS), dtype=np.float64)
+    for row, vector in enumerate(vectors):
+        for dim, value in vector.items():
+            matrix[row, dim] = value
+
+    low, high = SIMILAR_PRICE_BAND
+    results = {}
+    for start in range(0, count, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, count)
+        rows = np.arange(stop - start)
+        text = matrix[start:stop] @ matrix.T
+        own = prices[start:stop, None]
+        highest = np.maximum(own, prices[None, :])
+        lowest = np.minimum(own, prices[None, :])
+        price = np.where(highest == 0, 1.0, lowest / np.where(highest == 0, 1, highest))
+        scores = TEXT_WEIGHT * text + PRICE_WEIGHT * price
+        scores[rows, start + rows] = -np.inf
+
+        band = (prices[None, :] >= own * low) & (prices[None, :] <= own * high)
+        banded = np.where(band, scores, -np.inf)
+
+        related = top_k(ids, scores, RELATED_LIMIT)
+        similar = top_k(ids, banded, SIMILAR_LIMIT)
+        for row in rows:
+            results[int(ids[start + row])] = {
+                ProductRecommendation.RELATED: [
+                    (int(ids[col]), float(scores[row, col]))
+                    for col in related[row]
+                    if np.isfinite(scores[row, col])
+                ],
+                ProductRecommendation.SIMILAR: [
+                    (int(ids[col]), float(banded[row, col]))
+                    for col in similar[row]
+                    if np.isfinite(banded[row, col])
+                ],
+            }
+    return results
+
+
+def score_products(rows):
+    """Rank neighbors for ``rows`` of (id, price, name, description)"""
+    ids = [row[0] for row in rows]
+    prices = [float(row[1]) for row in rows]
+    vectors = [text_vector(f"{row[2]} {row[3]}") for row in rows]
+    scorer = score_numpy if np is not None else score_python
+    return scorer(ids, prices, vectors)
+
+
+def rebuild_category(category_id):
+    """Recompute and store recommendations for every product in a category"""
+    rows = list(
+        Product.objects.filter(category_id=category_id, is_active=True)
+        .order_by("id")
+        .values_list("id", "price", "name", "description")
+    )
+    results = score_products(rows) if rows else {}
+
+    recommendations = [
+        ProductRecommendation(
+            product_id=product_id,
+            neighbor_id=neighbor_id,
+            kind=kind,
+            rank=rank,
+            score=score,
+        )
+        for product_id, kinds in results.items()
+        for kind, neighbors in kinds.items()
+        for rank, (neighbor_id, score) in enumerate(neighbors)
+    ]
+    with transaction.atomic():
+        ProductRecommendation.objects.filter(
+            product__category_id=category_id
+        ).delete()
+        ProductRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+    return len(recommendations)
+
+
+def rebuild_all():
+    category_ids = (
+        Product.objects.order_by().values_list("category_id", flat=True).distinct()
+    )
+    # Products of inactive or moved rows may still hold stale recommendations
+    ProductRecommendation.objects.exclude(product__is_active=True).delete()
+    total = sum(rebuild_category(category_id) for category_id in list(category_ids))
+    bump_version(Product)
+    return total
+
+
+def affected_categories(product_id, category_id):
+    """Categories whose rankings may include or should include a product"""
+    categories = {category_id}
+    categories.update(
+        ProductRecommendation.objects.filter(neighbor_id=product_id).values_list(
+            "product__category_id", flat=True
+        )
+    )
+    categories.update(
+        ProductRecommendation.objects.filter(product_id=product_id).values_list(
+            "neighbor__category_id", flat=True
+        )
+    )
+    return categories
+
+
+def refresh(product_id, category_id):
+    """Recompute the categories touched by a product change"""
+    for affected in affected_categories(product_id, category_id):
+        rebuild_category(affected)
+    bump_version(Product)
+
+
+class RefreshWorker:
+    """Background thread applying queued refreshes, deduplicated by product"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, product_id, category_id):
+        with self._lock:
+            if (product_id, category_id) in self._queued:
+                return
+            self._queued.add((product_id, category_id))
+            self._queue.put((product_id, category_id))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="recommendations", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=1)
+                except queue.Empty:
+                    with self._lock:
+                        if self._queue.empty():
+                            self._thread = None
+                            return
+                    continue
+                with self._lock:
+                    self._queued.discard(item)
+                try:
+                    refresh(*item)
+                except Exception:
+                    logger.exception("Failed to refresh recommendations for %s", item)
+        finally:
+            connection.close()
+
+
+worker = RefreshWorker()
+
+
+def schedule_refresh(product_id, category_id):
+    """Refresh recommendations after a product change"""
+    options = getattr(settings, "PRODUCT_RECOMMENDATIONS", {})
+    if options.get("BACKGROUND", True):
+        worker.submit(product_id, category_id)
+    else:
+        refresh(product_id, category_id)
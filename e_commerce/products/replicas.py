@@ -0,0 +1,164 @@
+import contextvars
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = contextvars.ContextVar("catalog_replica_state", default=None)
+
+
+def get_replica_settings():
+    options = {
+        "ALIASES": [],
+        "APPS": ["products"],
+        # Seconds a client keeps reading from the primary after a write
+        "PIN_SECONDS": 5,
+        "COOKIE": "primary_pin",
+    }
+    options.update(getattr(settings, "CATALOG_REPLICAS", {}))
+    return options
+
+
+class ReplicaState:
+    """Routing state of one request"""
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Let catalog reads in this context go to a replica until a write"""
+    token = _state.set(ReplicaState(pinned))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def pin_to_primary():
+    state = _state.get()
+    if state is not None:
+        state.pinned = state.wrote = True
+
+
+def replica_may_lag(versions):
+    """Whether this request may read a replica that lacks the latest changes
+
+    ``versions`` are the cache version counters (change timestamps in ms) of
+    the data read. Results read within PIN_SECONDS of a change must not be
+    cached or tagged, or stale replica data would outlive the lag.
+    """
+    state = _state.get()
+    if state is None or state.pinned:
+        return False
+    options = get_replica_settings()
+    if not options["ALIASES"]:
+        return False
+    return time.time() * 1000 - max(versions) < options["PIN_SECONDS"] * 1000
+
+
+class CatalogReplicaRouter:
+    """Send catalog reads of safe requests to a replica, everything else to default
+
+    Reads only leave the primary inside replica_reads(), which
+    PrimaryPinMiddleware opens for GET/HEAD/OPTIONS requests. Management
+    commands, worker threads and write requests therefore always read what
+    they write. The first write of a request pins the rest of it, and the
+    middleware pins the client for PIN_SECONDS after that to cover
+    replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned:
+            return None
+        options = get_replica_settings()
+        if not options["ALIASES"] or model._meta.app_label not in options["APPS"]:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(options["ALIASES"])
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()["ALIASES"]}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema from the primary
+        if db in get_replica_settings()["ALIASES"]:
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    """Open replica reads for safe requests of clients without a recent write"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        with replica_reads(self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.process_response(state, response)
+
+    def pinned(self, request):
+        return (
+            request.method not in SAFE_METHODS
+            or get_replica_settings()["COOKIE"] in request.COOKIES
+        )
+
+    def process_response(self, state, response):
+        if state.wrote:
+            options = get_replica_settings()
+            response.set_cookie(
+                options["COOKIE"],
+                "1",
+                max_age=options["PIN_SECONDS"],
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def copy_database(source, target):
+    """Replace the SQLite database file ``target`` with a copy of ``source``
+
+    A local stand-in for replication: the backup API copies a consistent
+    snapshot even while the source is being written.
+    """
+    primary = sqlite3.connect(source)
+    replica = sqlite3.connect(target)
+    try:
+        primary.backup(replica)
+    finally:
+        primary.close()
+        replica.close()
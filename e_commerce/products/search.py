@@ -0,0 +1,318 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+
+FTS_TABLE = "products_product_fts"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of a match in the name vs the description
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def first_distinct(values, limit):
+    """The first ``limit`` distinct values, in order"""
+    seen = {}
+    for value in values:
+        seen.setdefault(value)
+        if len(seen) == limit:
+            break
+    return list(seen)
+
+
+def fts5_available(conn=None):
+    """Return True if the database is SQLite compiled with FTS5"""
+    conn = conn or connection
+    if conn.vendor != "sqlite":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+class PythonSearchIndex:
+    """In-process inverted index with BM25 ranking
+
+    Postings are kept per field so name matches outrank description matches.
+    The last query term is matched as a prefix against a sorted vocabulary.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    # Updates are applied after commit, see products.signals
+    transactional = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built = False
+        self._clear()
+
+    def _clear(self):
+        self.postings = {"name": defaultdict(dict), "description": defaultdict(dict)}
+        self.lengths = {"name": {}, "description": {}}
+        # Running sums of self.lengths, for the average length BM25 needs
+        self.total_lengths = {"name": 0, "description": 0}
+        self.documents = {}
+        self.terms = {}
+        self.vocabulary = []
+
+    def rebuild(self):
+        with self._lock:
+            self._clear()
+            rows = Product.objects.filter(is_active=True).values_list(
+                "id", "name", "description", "category_id", "price"
+            )
+            for row in rows.iterator(chunk_size=2000):
+                self._add(*row)
+            self.vocabulary = sorted(
+                set(self.postings["name"]) | set(self.postings["description"])
+            )
+            self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.rebuild()
+
+    def _add(self, product_id, name, description, category_id, price):
+        self.documents[product_id] = (category_id, Decimal(price), name)
+        self.terms[product_id] = {}
+        for field, text in (("name", name), ("description", description)):
+            tokens = tokenize(text)
+            self.lengths[field][product_id] = len(tokens)
+            self.total_lengths[field] += len(tokens)
+            counts = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for token, count in counts.items():
+                self.postings[field][token][product_id] = count
+            self.terms[product_id][field] = list(counts)
+
+    def _remove(self, product_id):
+        if self.documents.pop(product_id, None) is None:
+            return
+        for field, tokens in self.terms.pop(product_id).items():
+            self.total_lengths[field] -= self.lengths[field].pop(product_id)
+            for token in tokens:
+                docs = self.postings[field][token]
+                del docs[product_id]
+                if not docs:
+                    del self.postings[field][token]
+
+    def update(self, product):
+        with self._lock:
+            if not self.built:
+                return
+            self._remove(product.id)
+            if product.is_active:
+                self._add(
+                    product.id,
+                    product.name,
+                    product.description,
+                    product.category_id,
+                    product.price,
+                )
+                for tokens in self.terms[product.id].values():
+                    for token in tokens:
+                        position = bisect_left(self.vocabulary, token)
+                        if self.vocabulary[position : position + 1] != [token]:
+                            insort(self.vocabulary, token)
+
+    def update_many(self, products):
+        for product in products:
+            self.update(product)
+
+    def delete(self, product_id):
+        with self._lock:
+            if self.built:
+                self._remove(product_id)
+
+    def _expand(self, prefix):
+        # The vocabulary may keep terms of removed documents; they have no postings
+        start = bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _score_term(self, terms):
+        """BM25 score per document for any of the given (expanded) terms"""
+        scores = defaultdict(float)
+        total = len(self.documents) or 1
+        for field, weight in (("name", NAME_WEIGHT), ("description", DESCRIPTION_WEIGHT)):
+            lengths = self.lengths[field]
+            average = (self.total_lengths[field] / len(lengths)) if lengths else 1
+            for term in terms:
+                docs = self.postings[field].get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                for product_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * lengths[product_id] / (average or 1))
+                    scores[product_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, category=None, price_min=None, price_max=None, limit=50):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            self.ensure_built()
+            totals = None
+            for position, token in enumerate(tokens):
+                is_last = position == len(tokens) - 1
+                scores = self._score_term(self._expand(token) if is_last else [token])
+                if totals is None:
+                    totals = dict(scores)
+                else:
+                    totals = {pk: s + scores[pk] for pk, s in totals.items() if pk in scores}
+                if not totals:
+                    return []
+
+            matches = []
+            for product_id, score in totals.items():
+                category_id, price, _ = self.documents[product_id]
+                if category is not None and category_id != int(category):
+                    continue
+                if price_min is not None and price < Decimal(str(price_min)):
+                    continue
+                if price_max is not None and price > Decimal(str(price_max)):
+                    continue
+                matches.append((-score, product_id))
+
+        matches.sort()
+        return [product_id for _, product_id in matches[:limit]]
+
+    def suggest(self, query, limit=5):
+        """Return the distinct names of the best matching products"""
+        ids = self.search(query, limit=None)
+        with self._lock:
+            names = (self.documents[pk][2] for pk in ids if pk in self.documents)
+            return first_distinct(names, limit)
+
+
+class FTS5SearchIndex:
+    """SQLite FTS5 virtual table keyed by product id, ranked with bm25()"""
+
+    built = True
+    transactional = True
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                f"SELECT id, name, description FROM {Product._meta.db_table} "
+                "WHERE is_active"
+            )
+
+    def ensure_built(self):
+        pass
+
+    def update(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.id])
+            if product.is_active:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                    "VALUES (%s, %s, %s)",
+                    [product.id, product.name, product.description],
+                )
+
+    def update_many(self, products):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [[product.id] for product in products],
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                "VALUES (%s, %s, %s)",
+                [
+                    [product.id, product.name, product.description]
+                    for product in products
+                    if product.is_active
+                ],
+            )
+
+    def delete(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+    @staticmethod
+    def match_expression(tokens):
+        terms = ['"%s"' % token for token in tokens]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, query, category=None, price_min=None, price_max=None, limit=50):
+        return self._query("f.rowid", query, category, price_min, price_max, limit)
+
+    def suggest(self, query, limit=5):
+        """Return the distinct names of the best matching products"""
+        return self._query("p.name", query, None, None, None, limit, distinct=True)
+
+    def _query(
+        self, column, query, category, price_min, price_max, limit, distinct=False
+    ):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        sql = [
+            f"SELECT {column} FROM {FTS_TABLE} f",
+            f"JOIN {Product._meta.db_table} p ON p.id = f.rowid",
+            f"WHERE {FTS_TABLE} MATCH %s AND p.is_active",
+        ]
+        params = [self.match_expression(tokens)]
+        if category is not None:
+            sql.append("AND p.category_id = %s")
+            params.append(int(category))
+        if price_min is not None:
+            sql.append("AND CAST(p.price AS REAL) >= %s")
+            params.append(float(price_min))
+        if price_max is not None:
+            sql.append("AND CAST(p.price AS REAL) <= %s")
+            params.append(float(price_max))
+        sql.append(f"ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s")
+        # bm25() is not allowed under GROUP BY: read ranked rows until enough
+        # distinct values came back
+        params.extend([NAME_WEIGHT, DESCRIPTION_WEIGHT, -1 if distinct else limit])
+
+        with connection.cursor() as cursor:
+            cursor.execute(" ".join(sql), params)
+            if distinct:
+                return first_distinct((row[0] for row in cursor), limit)
+            return [row[0] for row in cursor.fetchall()]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the process-wide search index for the configured backend"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                backend = getattr(settings, "PRODUCT_SEARCH_BACKEND", "auto")
+                if backend == "auto":
+                    backend = "fts5" if fts5_available() else "python"
+                _index = FTS5SearchIndex() if backend == "fts5" else PythonSearchIndex()
+    return _index
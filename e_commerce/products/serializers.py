@@ -1,5 +1,64 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
 from .models import Product, Category
+from .signals import bulk_saved
+
+MAX_BULK_OPERATIONS = 1000
+
+# Model attributes that are not columns but are read by serializers, mapped to
+# the columns they need. Serializer fields whose source is unknown disable the
+# only() narrowing so nothing is ever lazily loaded row-by-row.
+COMPUTED_FIELD_DEPENDENCIES = {
+    "is_in_stock": ["stock_quantity"],
+    "stock_status": ["stock_quantity"],
+}
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class):
+    """Return (select_related, only) derived from a serializer's declared fields"""
+    model = serializer_class.Meta.model
+    select_related = set()
+    columns = {model._meta.pk.name}
+
+    for field_name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+
+        source_attrs = field.source_attrs or [field_name]
+        if field.source == "*":
+            source_attrs = [field_name]
+
+        try:
+            model_field = model._meta.get_field(source_attrs[0])
+        except FieldDoesNotExist:
+            dependencies = COMPUTED_FIELD_DEPENDENCIES.get(source_attrs[0])
+            if dependencies is None:
+                # Unknown attribute, load every column to stay safe
+                return tuple(sorted(select_related)), None
+            columns.update(dependencies)
+            continue
+
+        if model_field.is_relation and len(source_attrs) > 1:
+            select_related.add(model_field.name)
+            columns.add(model_field.name)
+            columns.add(f"{model_field.name}__{source_attrs[1]}")
+        else:
+            columns.add(model_field.name)
+
+    return tuple(sorted(select_related)), tuple(sorted(columns))
+
+
+def shape_queryset(queryset, serializer_class, narrow=True):
+    """Apply the joins and column set the serializer needs to a queryset"""
+    select_related, columns = get_query_plan(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if narrow and columns is not None:
+        queryset = queryset.only(*columns)
+    return queryset
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -91,3 +150,143 @@ class RelatedProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ["id", "name", "price", "category_name", "image_url", "is_in_stock"]
+
+
+class ProductBulkDataSerializer(ProductSerializer):
+    """Product fields of a bulk operation
+
+    Categories are checked against ids preloaded for the whole batch instead
+    of one lookup per item.
+    """
+
+    category = serializers.IntegerField(min_value=1)
+
+    def validate_category(self, value):
+        if value not in self.context["category_ids"]:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
+
+
+class ProductBulkOperationSerializer(serializers.Serializer):
+    """One bulk operation: create a product, update fields or adjust stock"""
+
+    OPERATIONS = ["create", "update", "adjust_stock"]
+
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    id = serializers.IntegerField(min_value=1, required=False)
+    data = serializers.DictField(required=False)
+    delta = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        required = {
+            "create": ["data"],
+            "update": ["id", "data"],
+            "adjust_stock": ["id", "delta"],
+        }[attrs["op"]]
+        missing = [name for name in required if name not in attrs]
+        if missing:
+            raise serializers.ValidationError(
+                {name: "This field is required." for name in missing}
+            )
+        return attrs
+
+
+class ProductBulkSerializer(serializers.Serializer):
+    """Batch of product writes applied in one transaction
+
+    Referenced products are loaded (and locked) with one query and categories
+    with another; every item is validated by a shared child serializer and
+    applied in memory, then written with bulk_create/bulk_update and fanned
+    out to indexes and caches once. With ``atomic`` (the default) any invalid
+    item rejects the batch; otherwise valid items are applied and the rest
+    reported. Call inside a transaction.
+    """
+
+    operations = ProductBulkOperationSerializer(
+        many=True, allow_empty=False, max_length=MAX_BULK_OPERATIONS
+    )
+    atomic = serializers.BooleanField(default=True)
+
+    def apply(self, operations):
+        ids = {operation["id"] for operation in operations if "id" in operation}
+        products = Product.objects.select_for_update().in_bulk(ids)
+        category_ids = set()
+        for operation in operations:
+            try:
+                category_ids.add(int(operation.get("data", {})["category"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        context = {
+            "category_ids": set(
+                Category.objects.filter(id__in=category_ids).values_list("id", flat=True)
+            )
+        }
+        creating = ProductBulkDataSerializer(context=context)
+        updating = ProductBulkDataSerializer(context=context, partial=True)
+
+        results = []
+        created = []
+        changed = {}
+        fields = set()
+        previous_categories = set()
+        for index, operation in enumerate(operations):
+            result = {"index": index, "op": operation["op"]}
+            results.append(result)
+            product = products.get(operation.get("id"))
+            if operation["op"] != "create" and product is None:
+                result["errors"] = {"id": ["Product not found."]}
+                continue
+
+            try:
+                if operation["op"] == "adjust_stock":
+                    stock = product.stock_quantity + operation["delta"]
+                    if stock < 0:
+                        raise serializers.ValidationError(
+                            {"delta": ["Stock cannot go below zero."]}
+                        )
+                    values = {"stock_quantity": stock}
+                else:
+                    child = creating if operation["op"] == "create" else updating
+                    values = child.run_validation(operation["data"])
+            except serializers.ValidationError as exc:
+                result["errors"] = exc.detail
+                continue
+
+            if "category" in values:
+                values["category_id"] = values.pop("category")
+            if operation["op"] == "create":
+                product = Product(**values)
+                created.append((product, result))
+                continue
+
+            if values.get("category_id", product.category_id) != product.category_id:
+                previous_categories.add(product.category_id)
+            for name, value in values.items():
+                setattr(product, name, value)
+            fields.update(name.removesuffix("_id") for name in values)
+            changed[product.id] = product
+            result["id"] = product.id
+
+        failed = sum("errors" in result for result in results)
+        if failed and self.validated_data["atomic"]:
+            raise serializers.ValidationError({"results": results})
+
+        Product.objects.bulk_create(product for product, _ in created)
+        for product, result in created:
+            result["id"] = product.id
+        if changed:
+            Product.objects.bulk_update(changed.values(), sorted(fields))
+
+        bulk_saved([product for product, _ in created])
+        bulk_saved(list(changed.values()), fields, previous_categories)
+        return {
+            "created": len(created),
+            "updated": len(changed),
+            "failed": failed,
+            "results": results,
+        }
+
+    def save(self):
+        return self.apply(self.validated_data["operations"])
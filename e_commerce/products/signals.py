@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .featured import featured_set
+from .models import Category, Product
+from .recommendations import schedule_refresh
+from .search import get_search_index
+from .suggestions import get_suggestion_index
+
+
+def _apply(index, func, *args):
+    """Run an index update now if it shares the transaction, else after commit"""
+    if index.transactional:
+        func(*args)
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    transaction.on_commit(lambda: get_suggestion_index().update(instance))
+    # Saves limited to other fields (stock) leave the index and scores as is
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index = get_search_index()
+    _apply(index, index.update, instance)
+    transaction.on_commit(lambda: schedule_refresh(instance.id, instance.category_id))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    index = get_search_index()
+    _apply(index, index.delete, instance.id)
+    product_id = instance.id
+    transaction.on_commit(lambda: get_suggestion_index().delete(product_id))
+    category_id = instance.category_id
+    transaction.on_commit(lambda: schedule_refresh(product_id, category_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_featured_product(sender, instance, **kwargs):
+    product_id = instance.id
+
+    def invalidate():
+        if featured_set.shows(product_id=product_id):
+            featured_set.invalidate()
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_featured_category(sender, instance, **kwargs):
+    category_id = instance.id
+
+    def invalidate():
+        if featured_set.shows(category_id=category_id):
+            featured_set.invalidate()
+
+    transaction.on_commit(invalidate)
+
+
+# Fields read by the search index and the recommendation scorer
+INDEXED_FIELDS = {"name", "description", "price", "category", "is_active"}
+
+
+def bulk_saved(products, fields=None, previous_categories=()):
+    """Fan out a batch of bulk-written products once, as post_save does per row
+
+    ``fields`` lists the fields that changed (None for new rows); stock-only
+    changes skip the search index and recommendations. Products moved between
+    categories pass their old ones in ``previous_categories``.
+    """
+    if not products:
+        return
+    indexed = fields is None or bool(INDEXED_FIELDS & set(fields))
+    if indexed:
+        index = get_search_index()
+        _apply(index, index.update_many, products)
+
+    def fan_out():
+        suggestions = get_suggestion_index()
+        for product in products:
+            suggestions.update(product)
+        if indexed:
+            categories = {product.category_id for product in products}
+            for category_id in sorted(categories | set(previous_categories)):
+                schedule_refresh(None, category_id)
+        bump_version(Product)
+        if any(featured_set.shows(product_id=product.id) for product in products):
+            featured_set.invalidate()
+
+    transaction.on_commit(fan_out)
@@ -0,0 +1,248 @@
+import heapq
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+
+def product_weight(stock_quantity):
+    """Rank completions by availability; out of stock products sink"""
+    return min(stock_quantity, 1000)
+
+
+class Lightest:
+    """Heap item ordering entries lightest (largest rank) first"""
+
+    __slots__ = ("rank",)
+
+    def __init__(self, rank):
+        self.rank = rank
+
+    def __lt__(self, other):
+        return self.rank > other.rank
+
+
+class TrieNode:
+    __slots__ = ("children", "terminal", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = None
+        self.top = ()
+
+
+class SuggestionIndex:
+    """In-process prefix trie over active product names
+
+    Every word boundary of a name is a key, so "lamp" completes "Brass Desk
+    Lamp". Each node caches its top-k entry ids, making a lookup cost one walk
+    down the prefix. Keys are cut at ``max_depth`` characters and at most
+    ``max_entries`` products (the heaviest) are indexed, which bounds memory;
+    a heap of entry ranks finds the one to evict in O(log n).
+    """
+
+    def __init__(self, max_entries=50000, max_depth=24, top_k=10):
+        self.max_entries = max_entries
+        self.max_depth = max_depth
+        self.top_k = top_k
+        self._lock = threading.RLock()
+        self._warming = False
+        self._pending = None
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self.root = TrieNode()
+        self.entries = {}
+        # Ranks of entries, stale once an entry is deleted or re-ranked
+        self.heap = []
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "PRODUCT_SUGGESTIONS", {})
+        return cls(
+            max_entries=options.get("MAX_ENTRIES", 50000),
+            max_depth=options.get("MAX_DEPTH", 24),
+            top_k=options.get("TOP_K", 10),
+        )
+
+    def keys(self, name):
+        words = name.lower().split()
+        return {" ".join(words[i:])[: self.max_depth] for i in range(len(words))}
+
+    def _rank(self, entry_id):
+        weight, name = self.entries[entry_id]
+        return (-weight, name, entry_id)
+
+    def _insert(self, entry_id, name, weight):
+        self.entries[entry_id] = (weight, name)
+        rank = self._rank(entry_id)
+        heapq.heappush(self.heap, Lightest(rank))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            # Drop the stale ranks left behind by updates
+            self.heap = [Lightest(self._rank(pk)) for pk in self.entries]
+            heapq.heapify(self.heap)
+        for key in self.keys(name):
+            node = self.root
+            path = [node]
+            for char in key:
+                node = node.children.setdefault(char, TrieNode())
+                path.append(node)
+            if node.terminal is None:
+                node.terminal = set()
+            node.terminal.add(entry_id)
+            for visited in path:
+                if entry_id in visited.top:
+                    continue
+                if len(visited.top) < self.top_k or rank < self._rank(visited.top[-1]):
+                    top = sorted(visited.top + (entry_id,), key=self._rank)
+                    visited.top = tuple(top[: self.top_k])
+
+    def _recompute(self, node):
+        candidates = set(node.terminal or ())
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = tuple(sorted(candidates, key=self._rank)[: self.top_k])
+
+    def _delete(self, entry_id):
+        if entry_id not in self.entries:
+            return
+        _, name = self.entries[entry_id]
+        for key in self.keys(name):
+            path = [self.root]
+            for char in key:
+                child = path[-1].children.get(char)
+                if child is None:
+                    break
+                path.append(child)
+            else:
+                path[-1].terminal.discard(entry_id)
+            # Walk back up, pruning empty nodes and refilling top-k caches
+            for depth in range(len(path) - 1, -1, -1):
+                node = path[depth]
+                if entry_id in node.top:
+                    node.top = tuple(pk for pk in node.top if pk != entry_id)
+                    self._recompute(node)
+                if depth and not node.children and not node.terminal:
+                    del path[depth - 1].children[key[depth - 1]]
+        del self.entries[entry_id]
+
+    def _lightest(self):
+        while self.heap:
+            rank = self.heap[0].rank
+            entry_id = rank[2]
+            if entry_id in self.entries and self._rank(entry_id) == rank:
+                return entry_id
+            heapq.heappop(self.heap)
+        return None
+
+    def _apply(self, product_id, name, weight, is_active):
+        self._delete(product_id)
+        if not is_active:
+            return
+        if len(self.entries) >= self.max_entries:
+            lightest = self._lightest()
+            if self._rank(lightest) < (-weight, name, product_id):
+                return
+            self._delete(lightest)
+        self._insert(product_id, name, weight)
+
+    def rebuild(self):
+        """Load the heaviest active products and swap the trie in"""
+        with self._lock:
+            if self._pending is None:
+                self._pending = []
+        rows = (
+            Product.objects.filter(is_active=True)
+            .order_by("-stock_quantity", "name")
+            .values_list("id", "name", "stock_quantity")[: self.max_entries]
+        )
+        fresh = SuggestionIndex(self.max_entries, self.max_depth, self.top_k)
+        for product_id, name, stock_quantity in rows.iterator(chunk_size=2000):
+            fresh._insert(product_id, name, product_weight(stock_quantity))
+
+        with self._lock:
+            self.root, self.entries, self.heap = fresh.root, fresh.entries, fresh.heap
+            # Replay signal updates that arrived while the trie was loading
+            for args in self._pending or ():
+                self._apply(*args)
+            self._pending = None
+            self.ready = True
+
+    def warm_async(self):
+        """Build the trie on a background thread if it is cold"""
+        with self._lock:
+            if self.ready or self._warming:
+                return
+            self._warming = True
+            self._pending = []
+
+        def target():
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Failed to build product suggestion index")
+            finally:
+                self._warming = False
+                connection.close()
+
+        threading.Thread(target=target, name="suggestion-index", daemon=True).start()
+
+    def update(self, product):
+        args = (
+            product.id,
+            product.name,
+            product_weight(product.stock_quantity),
+            product.is_active,
+        )
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(args)
+            elif self.ready:
+                self._apply(*args)
+
+    def delete(self, product_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, "", 0, False))
+            elif self.ready:
+                self._delete(product_id)
+
+    def complete(self, prefix, limit=5):
+        """Return up to ``limit`` distinct names, or None while the trie is cold"""
+        if not self.ready:
+            return None
+
+        node = self.root
+        with self._lock:
+            for char in prefix.lower()[: self.max_depth]:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            names = []
+            for entry_id in node.top:
+                name = self.entries[entry_id][1]
+                if name not in names:
+                    names.append(name)
+                    if len(names) == limit:
+                        break
+        return names
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_suggestion_index():
+    """Return the process-wide suggestion trie"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SuggestionIndex.from_settings()
+    return _index
@@ -1,3 +1,1593 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, router, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import Q
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cache import bump_version, normalize_params, stats as cache_stats
+from . import recommendations
+from .catalog import export_lines, import_catalog
+from .compiled import compile_serializer
+from .featured import featured_set, score_candidates, get_featured_settings
+from .inventory import (
+    DatabaseInventory,
+    InsufficientStock,
+    MemoryInventory,
+    ReservationExpired,
+    inventory,
+)
+from .management.commands.bench_database import profile_database
+from .management.commands.stress_inventory import run_stress
+from .models import Product, Category, ProductRecommendation, StockReservation
+from .pagination import ProductPagination
+from .query_plans import discover as discover_hot_queries, full_scans
+from .recommendations import rebuild_all as rebuild_recommendations
+from .renderers import FastJSONRenderer
+from .replicas import (
+    CatalogReplicaRouter,
+    PrimaryPinMiddleware,
+    copy_database,
+    replica_may_lag,
+    replica_reads,
+)
+from .search import FTS5SearchIndex, PythonSearchIndex, fts5_available, get_search_index
+from .serializers import ProductDetailSerializer, ProductListSerializer
+from .suggestions import SuggestionIndex, get_suggestion_index
+
+
+class ProductTestMixin:
+    """Shared catalog fixture for product API tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.electronics = Category.objects.create(name="Electronics")
+        cls.books = Category.objects.create(name="Books")
+        cls.products = []
+        for i in range(12):
+            cls.products.append(
+                Product.objects.create(
+                    name=f"Gadget {i}",
+                    description=f"Useful gadget number {i}",
+                    price=Decimal("100.00") + i,
+                    category=cls.electronics if i % 2 == 0 else cls.books,
+                    stock_quantity=i,
+                )
+            )
+        rebuild_recommendations()
+
+    def setUp(self):
+        self.client = APIClient()
+        # Refresh recommendations inline rather than on a background thread
+        overridden = override_settings(PRODUCT_RECOMMENDATIONS={"BACKGROUND": False})
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        cache.clear()
+        cache_stats.reset()
+        index = get_search_index()
+        if not index.transactional:
+            # The in-process index outlives each test's rolled back transaction
+            index.rebuild()
+        get_suggestion_index().rebuild()
+
+
+class ProductQueryCountTests(ProductTestMixin, TestCase):
+    """Every read action must run a fixed number of queries regardless of rows"""
+
+    def test_list(self):
+        # COUNT for pagination + one joined SELECT
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 12)
+        self.assertIn("category_name", response.data["results"][0])
+
+    def test_retrieve(self):
+        # product + related products, both joined to category
+        product = self.products[4]
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["product"]["category_name"], "Electronics")
+        self.assertEqual(len(response.data["related_products"]), 4)
+        self.assertEqual(response.data["breadcrumb"]["category"], "Electronics")
+
+    def test_by_category(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/products/by_category/", {"category_id": self.books.id}
+            )
+        self.assertEqual(len(response.data), 6)
+
+    def test_featured(self):
+        # Two candidate scans and one joined SELECT, then served from memory
+        with self.assertNumQueries(3):
+            self.client.get("/api/products/featured/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/featured/")
+        self.assertEqual(len(response.data), 6)
+
+    def test_similar(self):
+        product = self.products[6]
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/products/{product.id}/similar/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(p["category_name"] == "Electronics" for p in response.data))
+
+    def test_search_suggestions(self):
+        # Answered from the warm suggestion trie
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/products/search_suggestions/", {"q": "gadget"}
+            )
+        self.assertEqual(len(response.data["suggestions"]), 5)
+
+    def test_category_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/categories/")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_list_does_not_grow_with_rows(self):
+        for i in range(10):
+            Product.objects.create(
+                name=f"Extra {i}",
+                description="extra",
+                price=Decimal("5.00"),
+                category=self.books,
+            )
+        with self.assertNumQueries(2):
+            self.client.get("/api/products/")
+
+
+class SparseFieldsetTests(ProductTestMixin, TestCase):
+    """?fields=, ?exclude= and ?include= narrow both the payload and the SQL"""
+
+    def test_fields_narrow_detail_and_columns(self):
+        product = self.products[3]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/products/{product.id}/", {"fields": "id,price,is_in_stock"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data,
+            {"product": {"id": product.id, "price": "103.00", "is_in_stock": True}},
+        )
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"]
+        self.assertIn('"stock_quantity"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_include_related(self):
+        product = self.products[4]
+        response = self.client.get(
+            f"/api/products/{product.id}/",
+            {"fields": "id,name", "include": "related"},
+        )
+        self.assertEqual(set(response.data), {"product", "related_products"})
+        self.assertEqual(len(response.data["related_products"]), 4)
+
+        # Without any option the full response is unchanged
+        response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual(
+            set(response.data), {"product", "related_products", "breadcrumb"}
+        )
+
+    def test_exclude_on_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/products/", {"exclude": "category_name,image_url"}
+            )
+        self.assertEqual(
+            list(response.data["results"][0]),
+            ["id", "name", "price", "is_in_stock"],
+        )
+        self.assertNotIn("JOIN", queries[-1]["sql"])
+
+    def test_list_paths_agree(self):
+        params = {"fields": "name,price", "ordering": "price"}
+        with self.settings(PRODUCT_COMPILED_SERIALIZATION=False):
+            expected = self.client.get("/api/products/", params).content
+        with self.settings(PRODUCT_COMPILED_SERIALIZATION=True):
+            response = self.client.get("/api/products/", params)
+        self.assertEqual(response.content, expected)
+        response = self.client.get(
+            "/api/products/by_category/", {"category_id": self.books.id, **params}
+        )
+        self.assertEqual(list(response.data[0]), ["name", "price"])
+
+    def test_featured_and_similar(self):
+        response = self.client.get("/api/products/featured/", {"fields": "id"})
+        self.assertEqual([list(item) for item in response.data], [["id"]] * 6)
+        product = self.products[6]
+        response = self.client.get(
+            f"/api/products/{product.id}/similar/", {"fields": "id,price"}
+        )
+        self.assertTrue(response.data)
+        self.assertTrue(all(list(item) == ["id", "price"] for item in response.data))
+
+    def test_categories(self):
+        response = self.client.get("/api/categories/", {"fields": "name"})
+        self.assertEqual(response.data["results"][0], {"name": "Books"})
+        response = self.client.get(
+            f"/api/categories/{self.books.id}/", {"exclude": "description"}
+        )
+        self.assertEqual(response.data, {"id": self.books.id, "name": "Books"})
+
+    def test_invalid_options(self):
+        for params in (
+            {"fields": "id,secret"},
+            {"exclude": "nope"},
+            {"include": "reviews"},
+            {"fields": "id", "exclude": "id"},
+        ):
+            response = self.client.get(f"/api/products/{self.products[0].id}/", params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get("/api/products/", {"include": "related"})
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchLookupTests(ProductTestMixin, TestCase):
+    """GET /api/products/batch/ resolves many ids with one query"""
+
+    def test_batch(self):
+        ids = [product.id for product in self.products[:5]]
+        inactive = self.products[5]
+        Product.objects.filter(id=inactive.id).update(is_active=False)
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/products/batch/", {"ids": ",".join(map(str, ids + [inactive.id]))}
+            )
+        self.assertEqual(response.status_code, 200)
+        products = json.loads(response.content)["products"]
+        self.assertEqual(list(products), [str(pk) for pk in ids])
+        self.assertEqual(products[str(ids[2])]["price"], "102.00")
+        self.assertEqual(response.data["missing"], [inactive.id])
+
+    def test_read_through_per_id(self):
+        first = [product.id for product in self.products[:3]]
+        self.client.get("/api/products/batch/", {"ids": first})
+        # Cached ids are served from the cache, only new ones are queried
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/products/batch/", {"ids": [*first, self.products[3].id]}
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertIn(f"IN ({self.products[3].id})", queries[0]["sql"])
+        self.assertEqual(len(response.data["products"]), 4)
+
+        # A product change makes every entry stale
+        product = self.products[0]
+        product.price = Decimal("1.50")
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        response = self.client.get("/api/products/batch/", {"ids": first})
+        self.assertEqual(response.data["products"][product.id]["price"], "1.50")
+
+    def test_fields(self):
+        product = self.products[1]
+        response = self.client.get(
+            "/api/products/batch/",
+            {"ids": product.id, "fields": "price,is_in_stock"},
+        )
+        self.assertEqual(
+            response.data["products"],
+            {product.id: {"price": "101.00", "is_in_stock": True}},
+        )
+        response = self.client.get("/api/products/batch/", {"ids": product.id})
+        self.assertIn("name", response.data["products"][product.id])
+
+    def test_invalid_ids(self):
+        for ids in ("", "1,x", ",".join(str(pk) for pk in range(1, 300))):
+            response = self.client.get("/api/products/batch/", {"ids": ids})
+            self.assertEqual(response.status_code, 400, ids)
+
+
+class QueryPlanTests(TestCase):
+    """Every registered hot query must be answered from an index"""
+
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("product_list: ok", out.getvalue())
+        self.assertIn("address_default: ok", out.getvalue())
+        self.assertNotIn("full scan", out.getvalue())
+
+    def test_keyset_pages_seek(self):
+        out = io.StringIO()
+        call_command(
+            "check_query_plans",
+            "product_list_seek",
+            "product_list_seek_price",
+            stdout=out,
+        )
+        self.assertNotIn("full scan", out.getvalue())
+        for name in ("product_list_seek", "product_list_seek_price"):
+            plan = discover_hot_queries()[name]().explain()
+            self.assertRegex(plan, r"SEARCH products_product USING INDEX \S+ \(", name)
+
+    def test_unbounded_index_walk_fails(self):
+        # A seek written as an OR walks the price index from its start
+        def or_seek():
+            return (
+                Product.objects.filter(is_active=True)
+                .filter(Q(price__gt=10) | Q(price=10, id__gt=1))
+                .order_by("price", "id")[:20]
+            )
+
+        with mock.patch.dict(discover_hot_queries(), {"or_seek": or_seek}):
+            out = io.StringIO()
+            with self.assertRaises(CommandError):
+                call_command("check_query_plans", stdout=out)
+        self.assertIn("or_seek: full scan of products_product", out.getvalue())
+
+    def test_full_scan_fails(self):
+        with mock.patch.dict(
+            discover_hot_queries(),
+            {"by_description": lambda: Product.objects.filter(description="x")},
+        ):
+            out = io.StringIO()
+            with self.assertRaises(CommandError):
+                call_command("check_query_plans", stdout=out)
+        self.assertIn("by_description: full scan of products_product", out.getvalue())
+
+    def test_full_scans(self):
+        self.assertEqual(
+            full_scans("SCAN products_product", "sqlite"), ["products_product"]
+        )
+        self.assertEqual(full_scans("SCAN TABLE cart_cart", "sqlite"), ["cart_cart"])
+        for plan in (
+            "SEARCH products_product USING INDEX product_active_price_idx (price>?)",
+            "SEARCH products_product USING INTEGER PRIMARY KEY (rowid=?)",
+            "SCAN CONSTANT ROW",
+        ):
+            self.assertEqual(full_scans(plan, "sqlite"), [], plan)
+        # Walking a whole index is only accepted from queries registered so
+        for plan, table in (
+            (
+                "SCAN products_product USING INDEX product_active_created_idx",
+                "products_product",
+            ),
+            (
+                "SCAN cart_cart USING COVERING INDEX sqlite_autoindex_cart_cart_1",
+                "cart_cart",
+            ),
+        ):
+            self.assertEqual(full_scans(plan, "sqlite"), [table], plan)
+            self.assertEqual(full_scans(plan, "sqlite", index_scan=True), [], plan)
+        self.assertEqual(
+            full_scans("Seq Scan on products_product  (cost=0.00..1.01)", "postgresql"),
+            ["products_product"],
+        )
+
+
+class DatabaseProfileTests(TestCase):
+    """The production profile tunes every new SQLite connection"""
+
+    def test_production_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = profile_database(f"{directory}/db.sqlite3", "production")
+            wrapper = DatabaseWrapper(config, alias="profile_test")
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ("journal_mode", "busy_timeout", "synchronous"):
+                        cursor.execute(f"PRAGMA {name}")
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(
+            pragmas, {"journal_mode": "wal", "busy_timeout": 20000, "synchronous": 1}
+        )
+        self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
+        self.assertEqual(config["CONN_MAX_AGE"], 600)
+
+
+@override_settings(CATALOG_REPLICAS={"ALIASES": ["replica"], "PIN_SECONDS": 5})
+class ReplicaRoutingTests(SimpleTestCase):
+    """Catalog reads of safe requests go to a replica until the client writes
+
+    Routing is checked through QuerySet.db and router.db_for_write() (which
+    saves call) so no query runs; a TestCase would hold every read on the
+    primary inside its transaction.
+    """
+
+    databases = {"default"}
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(Product.objects.all().db, "default")
+
+    def test_request_reads_replica_until_write(self):
+        with replica_reads():
+            self.assertEqual(Product.objects.all().db, "replica")
+            self.assertEqual(Category.objects.all().db, "replica")
+            self.assertEqual(get_user_model().objects.all().db, "default")
+            with transaction.atomic():
+                self.assertEqual(Product.objects.all().db, "default")
+            self.assertEqual(router.db_for_write(Category), "default")
+            self.assertEqual(Product.objects.all().db, "default")
+        with replica_reads(pinned=True):
+            self.assertEqual(Product.objects.all().db, "default")
+
+    def test_middleware_pins_client_after_write(self):
+        def view(request):
+            if request.method == "POST":
+                router.db_for_write(Category)
+            return HttpResponse(Product.objects.all().db)
+
+        middleware = PrimaryPinMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.get("/api/products/"))
+        self.assertEqual(response.content, b"replica")
+        self.assertNotIn("primary_pin", response.cookies)
+
+        response = middleware(factory.post("/api/products/"))
+        self.assertEqual(response.content, b"default")
+        self.assertEqual(response.cookies["primary_pin"]["max-age"], 5)
+
+        request = factory.get("/api/products/")
+        request.COOKIES["primary_pin"] = "1"
+        self.assertEqual(middleware(request).content, b"default")
+
+    def test_lagging_reads_are_not_cached(self):
+        recent = int(time.time() * 1000)
+        self.assertFalse(replica_may_lag([recent]))
+        with replica_reads():
+            self.assertTrue(replica_may_lag([recent]))
+            self.assertFalse(replica_may_lag([recent - 6000]))
+
+    def test_replicas_are_not_migrated(self):
+        replica_router = CatalogReplicaRouter()
+        self.assertIs(replica_router.allow_migrate("replica", "products"), False)
+        self.assertIsNone(replica_router.allow_migrate("default", "products"))
+
+    def test_copy_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary, replica = f"{directory}/primary.db", f"{directory}/replica.db"
+            with sqlite3.connect(primary) as db:
+                db.execute("CREATE TABLE item (name TEXT)")
+                db.execute("INSERT INTO item VALUES ('copied')")
+            db.close()
+            copy_database(primary, replica)
+            db = sqlite3.connect(replica)
+            rows = db.execute("SELECT name FROM item").fetchall()
+            self.assertEqual(rows, [("copied",)])
+            db.close()
+
+
+# Responses are recomputed on every request while ETags stay stable
+@override_settings(CATALOG_CACHE={"TIMEOUT": 0})
+class AsyncCatalogViewTests(ProductTestMixin, TestCase):
+    """The async catalog reads answer exactly like the sync views"""
+
+    async def assertSameResponse(self, path, params=None):
+        expected = await sync_to_async(self.client.get)(f"/api/{path}", params)
+        response = await self.async_client.get(f"/api/async/{path}", params)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Pagination links point back at the endpoint that was called
+        self.assertEqual(
+            response.content.replace(b"/api/async/", b"/api/"), expected.content
+        )
+        self.assertEqual("ETag" in response, "ETag" in expected)
+        return response
+
+    async def test_list(self):
+        response = await self.assertSameResponse("products/")
+        self.assertEqual(response.json()["count"], 12)
+        await self.assertSameResponse("products/", {"page": 2, "page_size": 5})
+        await self.assertSameResponse("products/", {"page": "last", "page_size": 5})
+        await self.assertSameResponse(
+            "products/", {"category": self.books.id, "ordering": "price"}
+        )
+        await self.assertSameResponse("products/", {"search": "gadget"})
+        await self.assertSameResponse("products/", {"cursor": "", "page_size": 5})
+        await self.assertSameResponse("products/", {"fields": "id,price"})
+
+    async def test_list_errors(self):
+        response = await self.assertSameResponse("products/", {"page": 9})
+        self.assertEqual(response.status_code, 404)
+        response = await self.assertSameResponse("products/", {"fields": "bogus"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_retrieve(self):
+        product = self.products[4]
+        response = await self.assertSameResponse(f"products/{product.id}/")
+        self.assertEqual(len(response.json()["related_products"]), 4)
+        # Sparse fields defer the columns the related products and the
+        # breadcrumb read, which must not be lazy-loaded in async code
+        await self.assertSameResponse(
+            f"products/{product.id}/",
+            {"fields": "id,price", "include": "related,breadcrumb"},
+        )
+
+    async def test_retrieve_without_recommendations(self):
+        product = self.products[2]
+        await ProductRecommendation.objects.filter(product=product).adelete()
+        response = await self.assertSameResponse(
+            f"products/{product.id}/", {"fields": "id", "include": "related"}
+        )
+        related = response.json()["related_products"]
+        self.assertEqual(len(related), 4)
+        self.assertNotIn(product.id, [item["id"] for item in related])
+
+    async def test_similar(self):
+        product = self.products[6]
+        await self.assertSameResponse(f"products/{product.id}/similar/")
+        await ProductRecommendation.objects.filter(product=product).adelete()
+        response = await self.assertSameResponse(
+            f"products/{product.id}/similar/", {"fields": "id"}
+        )
+        self.assertTrue(response.json())
+
+    async def test_featured_and_suggestions(self):
+        await self.assertSameResponse("products/featured/")
+        response = await self.assertSameResponse(
+            "products/search_suggestions/", {"q": "gad"}
+        )
+        self.assertTrue(response.json()["suggestions"])
+
+    async def test_not_found(self):
+        response = await self.assertSameResponse("products/999999/")
+        self.assertEqual(response.status_code, 404)
+        response = await self.assertSameResponse("products/abc/similar/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_conditional_get(self):
+        path = f"/api/async/products/{self.products[0].id}/"
+        response = await self.async_client.get(path)
+        response = await self.async_client.get(
+            path, headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_only_reads(self):
+        user = await get_user_model().objects.acreate_user(
+            email="writer@example.com", username="writer", password="x"
+        )
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.post("/api/async/products/", {})
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, HEAD, OPTIONS")
+
+
+class KeysetPaginationTests(ProductTestMixin, TestCase):
+    """Cursor mode walks the catalog without OFFSET, duplicates or gaps"""
+
+    def walk(self, ordering, page_size=5, **params):
+        seen = []
+        url = "/api/products/"
+        query = {"cursor": "", "ordering": ordering, "page_size": page_size, **params}
+        while url:
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item["id"] for item in response.data["results"])
+            url, query = response.data["next"], None
+        return seen, response
+
+    def test_walks_every_ordering(self):
+        # Duplicate prices to exercise the id tiebreaker
+        Product.objects.filter(id__in=[p.id for p in self.products[:6]]).update(
+            price=Decimal("50.00")
+        )
+        for ordering in ["price", "-price", "name", "-name", "created_at", "-created_at"]:
+            seen, _ = self.walk(ordering, page_size=4)
+            self.assertEqual(len(seen), len(set(seen)), ordering)
+            self.assertEqual(len(seen), 12, ordering)
+            expected = list(
+                Product.objects.order_by(ordering, ordering.replace(ordering.lstrip("-"), "id"))
+                .values_list("id", flat=True)
+            )
+            self.assertEqual(seen, expected, ordering)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(
+            "/api/products/", {"cursor": "", "ordering": "price", "page_size": 5}
+        )
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(back.data["previous"])
+        self.assertEqual(back.data["next"], first.data["next"])
+
+    def test_count_opt_out(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/products/", {"cursor": "", "count": "false"})
+        self.assertNotIn("count", response.data)
+
+        response = self.client.get("/api/products/", {"cursor": ""})
+        self.assertEqual(response.data["count"], 12)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/products/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_seek_plan_is_a_range(self):
+        paginator = ProductPagination()
+        for field, value, descending in (
+            ("price", Decimal("10.00"), False),
+            ("price", Decimal("10.00"), True),
+            ("created_at", timezone.now(), True),
+        ):
+            queryset = paginator.keyset_queryset(
+                Product.objects.filter(is_active=True),
+                field,
+                {"v": value, "i": 1, "d": "n"},
+                descending,
+            )
+            plan = queryset[:20].explain()
+            self.assertRegex(plan, rf"SEARCH products_product .*\({field}[<>]", plan)
+            self.assertNotIn("SCAN products_product", plan)
+
+    def test_tampered_cursor_values(self):
+        for token in (
+            {"o": "price", "v": "abc", "i": 1, "d": "n"},
+            {"o": "price", "v": "10.00", "i": "x", "d": "n"},
+            {"o": "price", "v": None, "i": 1, "d": "n"},
+            {"o": "created_at", "v": "yesterday", "i": 1, "d": "n"},
+        ):
+            cursor = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
+            response = self.client.get(
+                "/api/products/", {"cursor": cursor, "ordering": token["o"]}
+            )
+            self.assertEqual(response.status_code, 404, token)
+            self.assertEqual(response.data["detail"], "Invalid cursor")
+
+    def test_page_number_mode_unchanged(self):
+        response = self.client.get("/api/products/", {"page": 1})
+        self.assertEqual(response.data["count"], 12)
+        self.assertIn("results", response.data)
+
+
+class SearchIndexTests(ProductTestMixin, TestCase):
+    """Both index backends rank, prefix-match and filter the same way"""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp = Product.objects.create(
+                name="Brass desk lamp",
+                description="Warm light for a gadget-free desk",
+                price=Decimal("45.00"),
+                category=self.books,
+                stock_quantity=3,
+            )
+
+    def backends(self):
+        python_index = PythonSearchIndex()
+        python_index.rebuild()
+        yield python_index
+        if fts5_available():
+            fts_index = FTS5SearchIndex()
+            fts_index.rebuild()
+            yield fts_index
+
+    def test_ranking_prefix_and_filters(self):
+        for index in self.backends():
+            # Name matches outrank description-only matches
+            self.assertEqual(index.search("desk")[0], self.lamp.id)
+            self.assertEqual(index.search("gadg")[-1], self.lamp.id)
+            self.assertEqual(index.search("bra")[0], self.lamp.id)
+            self.assertEqual(index.search("gadget 3"), [self.products[3].id])
+            self.assertEqual(index.search("nothing-here"), [])
+
+            in_books = index.search("gadget", category=self.books.id)
+            self.assertEqual(len(in_books), 7)
+            cheap = index.search("gadget", price_min=101, price_max="102.00")
+            self.assertEqual(
+                sorted(cheap), sorted([self.products[1].id, self.products[2].id])
+            )
+
+    def test_signals_keep_index_in_sync(self):
+        index = get_search_index()
+        index.ensure_built()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp.name = "Brass floor lamp"
+            self.lamp.save()
+        self.assertEqual(index.search("floor"), [self.lamp.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp.is_active = False
+            self.lamp.save()
+        self.assertEqual(index.search("floor"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[5].delete()
+        self.assertEqual(index.search("gadget 5"), [])
+
+    def test_length_totals_follow_updates(self):
+        index = PythonSearchIndex()
+        index.rebuild()
+        self.lamp.description = "A much longer description of the lamp"
+        index.update(self.lamp)
+        index.delete(self.products[0].id)
+        for field, lengths in index.lengths.items():
+            self.assertEqual(index.total_lengths[field], sum(lengths.values()))
+
+    def test_rebuild_command(self):
+        python_index = PythonSearchIndex()
+        with mock.patch(
+            "products.management.commands.rebuild_search_index.get_search_index",
+            return_value=python_index,
+        ):
+            with self.assertRaisesMessage(CommandError, "restart the servers"):
+                call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertFalse(python_index.built)
+        if fts5_available():
+            out = io.StringIO()
+            with mock.patch(
+                "products.management.commands.rebuild_search_index.get_search_index",
+                return_value=FTS5SearchIndex(),
+            ):
+                call_command("rebuild_search_index", stdout=out)
+            self.assertIn("Rebuilt FTS5SearchIndex", out.getvalue())
+
+    def test_search_param_uses_index_rank(self):
+        response = self.client.get("/api/products/", {"search": "lamp"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [self.lamp.id])
+
+        response = self.client.get(
+            "/api/products/", {"search": "gadget", "ordering": "price", "price__lte": 103}
+        )
+        prices = [Decimal(p["price"]) for p in response.data["results"]]
+        self.assertEqual(prices, sorted(prices))
+        self.assertTrue(all(price <= 103 for price in prices))
+
+
+class SuggestionIndexTests(ProductTestMixin, TestCase):
+    """Prefix trie completions, incremental updates and the cold fallback"""
+
+    def build(self, **options):
+        index = SuggestionIndex(**options)
+        index.rebuild()
+        return index
+
+    def test_top_k_by_stock(self):
+        index = self.build()
+        # Gadget 11 has the most stock
+        self.assertEqual(index.complete("gad", limit=3), ["Gadget 11", "Gadget 10", "Gadget 9"])
+        self.assertEqual(index.complete("GADGET 7"), ["Gadget 7"])
+        self.assertEqual(index.complete("xyz"), [])
+
+    def test_matches_word_boundaries(self):
+        Product.objects.create(
+            name="Brass Desk Lamp", description="lamp", price=10, category=self.books
+        )
+        index = self.build()
+        self.assertEqual(index.complete("desk"), ["Brass Desk Lamp"])
+        self.assertEqual(index.complete("lamp"), ["Brass Desk Lamp"])
+        self.assertEqual(index.complete("esk"), [])
+
+    def test_incremental_updates(self):
+        index = self.build(top_k=3)
+        product = self.products[0]
+        product.stock_quantity = 500
+        index.update(product)
+        self.assertEqual(index.complete("gad", limit=1), ["Gadget 0"])
+
+        product.is_active = False
+        index.update(product)
+        self.assertEqual(index.complete("gad", limit=1), ["Gadget 11"])
+        self.assertEqual(index.complete("gadget 0"), [])
+
+        index.delete(self.products[11].id)
+        self.assertEqual(index.complete("gad", limit=3), ["Gadget 10", "Gadget 9", "Gadget 8"])
+        self.assertNotIn(self.products[11].id, index.entries)
+
+    def test_bounded_entries(self):
+        index = self.build(max_entries=5, max_depth=4)
+        self.assertEqual(len(index.entries), 5)
+        self.assertEqual(index.complete("gadget 1"), index.complete("gadg"))
+
+        # A heavier product displaces the lightest entry
+        product = self.products[0]
+        product.stock_quantity = 900
+        index.update(product)
+        self.assertEqual(len(index.entries), 5)
+        self.assertIn(product.id, index.entries)
+        self.assertNotIn(self.products[7].id, index.entries)
+
+    def test_signals_refresh_shared_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(
+                name="Zephyr Fan", description="fan", price=10, category=self.books
+            )
+        self.assertEqual(get_suggestion_index().complete("zep"), ["Zephyr Fan"])
+
+    def test_cold_index_falls_back_to_database(self):
+        cold = SuggestionIndex()
+        with mock.patch("products.views.get_suggestion_index", return_value=cold):
+            with mock.patch.object(cold, "warm_async") as warm_async:
+                response = self.client.get(
+                    "/api/products/search_suggestions/", {"q": "gadget"}
+                )
+        warm_async.assert_called_once()
+        self.assertEqual(len(response.data["suggestions"]), 5)
+
+    def test_database_suggestions_are_distinct(self):
+        for name in ["Twin Lamp"] * 4 + ["Twin Bed"]:
+            Product.objects.create(
+                name=name, description="twin", price=10, category=self.books
+            )
+        backends = [PythonSearchIndex()]
+        if fts5_available():
+            backends.append(FTS5SearchIndex())
+        for backend in backends:
+            backend.rebuild()
+            self.assertCountEqual(
+                backend.suggest("twin", limit=5), ["Twin Lamp", "Twin Bed"], backend
+            )
+            self.assertEqual(len(backend.suggest("twin", limit=1)), 1)
+
+    def test_eviction_follows_rank_changes(self):
+        index = self.build(max_entries=5)
+        # Re-rank the entries a few times, leaving stale heap items behind
+        for stock in (1, 500, 2):
+            for product in self.products[7:]:
+                product.stock_quantity = stock + product.id
+                index.update(product)
+        lightest = max(index.entries, key=index._rank)
+        product = self.products[0]
+        product.stock_quantity = 900
+        index.update(product)
+        self.assertIn(product.id, index.entries)
+        self.assertNotIn(lightest, index.entries)
+        self.assertEqual(len(index.entries), 5)
+
+
+class ResponseCacheTests(ProductTestMixin, TestCase):
+    """Catalog responses are served from cache until a dependency changes"""
+
+    def test_list_is_cached_per_normalized_params(self):
+        first = self.client.get("/api/products/?ordering=price&category=%d" % self.books.id)
+        with self.assertNumQueries(0):
+            second = self.client.get(
+                "/api/products/?category=%d&ordering=price" % self.books.id
+            )
+        self.assertEqual(first.data, second.data)
+
+        with self.assertNumQueries(2):
+            self.client.get("/api/products/?ordering=-price")
+        snapshot = cache_stats.snapshot()
+        self.assertEqual((snapshot["hits"], snapshot["misses"]), (1, 2))
+
+    def test_product_save_invalidates_exactly(self):
+        product = self.products[0]
+        self.client.get(f"/api/products/{product.id}/")
+        self.client.get("/api/categories/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = "Renamed"
+            product.save()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual(response.data["product"]["name"], "Renamed")
+        # Categories do not depend on products
+        with self.assertNumQueries(0):
+            self.client.get("/api/categories/")
+
+    def test_category_change_invalidates_products(self):
+        self.client.get("/api/products/featured/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.electronics.name = "Gear"
+            self.electronics.save()
+        response = self.client.get("/api/products/featured/")
+        self.assertIn("Gear", {p["category_name"] for p in response.data})
+
+    def test_errors_are_not_cached(self):
+        self.client.get("/api/products/by_category/")
+        with self.assertNumQueries(1):
+            self.client.get("/api/products/by_category/", {"category_id": self.books.id})
+        self.assertEqual(cache_stats.snapshot()["stores"], 1)
+
+    def test_eviction_detected(self):
+        with self.settings(CATALOG_CACHE={"TIMEOUT": 0.01}):
+            self.client.get("/api/categories/")
+            time.sleep(0.02)
+            bump_version(Product)
+            self.client.get("/api/categories/")
+        snapshot = cache_stats.snapshot()
+        self.assertEqual(snapshot["evictions"], 1)
+        self.assertEqual(snapshot["invalidations"], 1)
+
+    def test_stats_endpoint_requires_staff(self):
+        self.assertEqual(self.client.get("/api/cache/stats/").status_code, 401)
+        admin = get_user_model().objects.create_user(
+            email="admin@example.com", username="admin", password="x", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/cache/stats/")
+        self.assertIn("hit_ratio", response.data)
+
+    def test_normalize_params(self):
+        from django.http import QueryDict
+
+        self.assertEqual(
+            normalize_params(QueryDict("b=2&a=1&b=3")), normalize_params(QueryDict("a=1&b=2&b=3"))
+        )
+
+
+class ConditionalGetTests(ProductTestMixin, TestCase):
+    """ETag / Last-Modified revalidation answers 304 without touching the DB"""
+
+    def test_if_none_match_returns_304(self):
+        product = self.products[2]
+        url = f"/api/products/{product.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_params_and_writes(self):
+        first = self.client.get("/api/products/")["ETag"]
+        self.assertNotEqual(first, self.client.get("/api/products/?ordering=price")["ETag"])
+        self.assertNotEqual(first, self.client.get("/api/categories/")["ETag"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].save()
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first)
+
+    def test_if_modified_since(self):
+        response = self.client.get("/api/categories/")
+        last_modified = response["Last-Modified"]
+        response = self.client.get("/api/categories/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            "/api/categories/", HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_object_is_not_revalidated(self):
+        url = f"/api/products/{self.products[2].id}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+        for headers in (
+            {"HTTP_IF_MODIFIED_SINCE": last_modified},
+            {"HTTP_IF_NONE_MATCH": "*"},
+        ):
+            for missing in ("/api/products/999999/", "/api/async/products/999999/"):
+                response = self.client.get(missing, **headers)
+                self.assertEqual(response.status_code, 404, (missing, headers))
+            # Detail routes only revalidate by ETag
+            self.assertEqual(self.client.get(url, **headers).status_code, 200, headers)
+
+    def test_errors_have_no_etag(self):
+        response = self.client.get("/api/products/999999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+
+class RecommendationTests(ProductTestMixin, TestCase):
+    """Precomputed related/similar products"""
+
+    def test_numpy_and_python_scoring_agree(self):
+        if recommendations.np is None:
+            self.skipTest("NumPy is not installed")
+        rows = list(
+            Product.objects.order_by("id").values_list("id", "price", "name", "description")
+        )
+        ids = [row[0] for row in rows]
+        prices = [float(row[1]) for row in rows]
+        vectors = [recommendations.text_vector(f"{row[2]} {row[3]}") for row in rows]
+        vectorized = recommendations.score_numpy(ids, prices, vectors)
+        reference = recommendations.score_python(ids, prices, vectors)
+        for product_id in ids:
+            for kind in (ProductRecommendation.RELATED, ProductRecommendation.SIMILAR):
+                self.assertEqual(
+                    [pk for pk, _ in vectorized[product_id][kind]],
+                    [pk for pk, _ in reference[product_id][kind]],
+                )
+
+    def test_rankings_respect_category_and_price_band(self):
+        product = self.products[6]
+        similar = ProductRecommendation.objects.filter(
+            product=product, kind=ProductRecommendation.SIMILAR
+        ).select_related("neighbor")
+        self.assertTrue(similar)
+        for recommendation in similar:
+            neighbor = recommendation.neighbor
+            self.assertEqual(neighbor.category_id, product.category_id)
+            self.assertNotEqual(neighbor.id, product.id)
+            self.assertGreaterEqual(neighbor.price, product.price * Decimal("0.7"))
+            self.assertLessEqual(neighbor.price, product.price * Decimal("1.3"))
+        # Closest price ranks first
+        self.assertIn(similar[0].neighbor_id, {self.products[4].id, self.products[8].id})
+
+    def test_detail_views_read_precomputed_rows(self):
+        product = self.products[6]
+        expected = list(
+            ProductRecommendation.objects.filter(
+                product=product, kind=ProductRecommendation.RELATED
+            ).values_list("neighbor_id", flat=True)
+        )
+        response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual([p["id"] for p in response.data["related_products"]], expected)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/products/{product.id}/similar/")
+        self.assertEqual(len(response.data), 5)
+
+    def test_falls_back_when_not_computed(self):
+        ProductRecommendation.objects.all().delete()
+        product = self.products[6]
+        response = self.client.get(f"/api/products/{product.id}/similar/")
+        self.assertEqual(len(response.data), 5)
+        response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual(len(response.data["related_products"]), 4)
+
+    def test_product_changes_refresh_rankings(self):
+        moved = self.products[4]
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.category = self.books
+            moved.save()
+        self.assertFalse(
+            ProductRecommendation.objects.filter(
+                product__category=self.electronics, neighbor=moved
+            ).exists()
+        )
+        self.assertTrue(
+            ProductRecommendation.objects.filter(
+                product__category=self.books, neighbor=moved
+            ).exists()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.delete()
+        self.assertEqual(
+            ProductRecommendation.objects.filter(
+                product__category=self.books, kind=ProductRecommendation.RELATED
+            ).count(),
+            6 * 4,
+        )
+
+    def test_stock_only_save_skips_refresh(self):
+        product = self.products[4]
+        with mock.patch("products.signals.schedule_refresh") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                product.stock_quantity = 40
+                product.save(update_fields=["stock_quantity"])
+            refresh.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                product.price = Decimal("1.00")
+                product.save(update_fields=["price", "stock_quantity"])
+        refresh.assert_called_once_with(product.id, product.category_id)
+
+
+class FeaturedSetTests(ProductTestMixin, TestCase):
+    """Scored, materialized featured products"""
+
+    def test_scoring_prefers_stock_recency_and_diversity(self):
+        now = timezone.now()
+        options = {**get_featured_settings(), "SIZE": 3}
+        candidates = [
+            (1, 100, now, 1),
+            (2, 100, now, 1),
+            (3, 100, now, 1),
+            (4, 50, now, 2),
+            (5, 100, now - timedelta(days=365), 3),
+        ]
+        # The third category-1 product loses to category 2 after penalties
+        self.assertEqual(score_candidates(candidates, options, now), [1, 4, 2])
+
+    def test_snapshot_excludes_out_of_stock(self):
+        ids = featured_set.refresh()["ids"]
+        self.assertEqual(len(ids), 6)
+        self.assertNotIn(self.products[0].id, ids)  # stock 0
+        categories = {p.category_id for p in Product.objects.filter(id__in=ids)}
+        self.assertEqual(categories, {self.electronics.id, self.books.id})
+
+    def test_out_of_stock_featured_product_invalidates(self):
+        ids = featured_set.refresh()["ids"]
+        product = Product.objects.get(id=ids[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock_quantity = 0
+            product.save()
+        response = self.client.get("/api/products/featured/")
+        self.assertNotIn(product.id, [p["id"] for p in response.data])
+
+    def test_unrelated_changes_keep_snapshot(self):
+        snapshot = featured_set.refresh()
+        outsider = self.products[0]
+        self.assertNotIn(outsider.id, snapshot["ids"])
+        with self.captureOnCommitCallbacks(execute=True):
+            outsider.name = "Renamed"
+            outsider.save()
+        self.assertEqual(featured_set.current()["generation"], snapshot["generation"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books.name = "Novels"
+            self.books.save()
+        self.assertNotEqual(featured_set.current()["generation"], snapshot["generation"])
+
+    def test_shows_reads_ids_not_payload(self):
+        snapshot = featured_set.refresh()
+        with mock.patch.object(cache, "get", wraps=cache.get) as get:
+            self.assertTrue(featured_set.shows(product_id=snapshot["ids"][0]))
+            self.assertTrue(featured_set.shows(category_id=self.books.id))
+            self.assertFalse(featured_set.shows(product_id=self.products[0].id))
+        keys = [call.args[0] for call in get.call_args_list]
+        self.assertIn(featured_set.members_key, keys)
+        self.assertNotIn(featured_set.snapshot_key, keys)
+
+    def test_expired_snapshot_is_rebuilt(self):
+        snapshot = featured_set.refresh()
+        with self.settings(FEATURED_PRODUCTS={"REFRESH_INTERVAL": -1}):
+            self.assertNotEqual(featured_set.current()["generation"], snapshot["generation"])
+
+    def test_refresh_changes_etag(self):
+        url = "/api/products/featured/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        featured_set.refresh()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_expired_snapshot_is_not_revalidated(self):
+        etag = self.client.get("/api/products/featured/")["ETag"]
+        with self.settings(FEATURED_PRODUCTS={"REFRESH_INTERVAL": -1}):
+            response = self.client.get(
+                "/api/products/featured/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class InventoryTests(ProductTestMixin, TestCase):
+    """Atomic, all-or-nothing stock reservations"""
+
+    def stock(self, product):
+        product.refresh_from_db(fields=["stock_quantity"])
+        return product.stock_quantity
+
+    def test_reserve_commit_release(self):
+        first, second = self.products[5], self.products[7]
+        reference = inventory.reserve([(first.id, 2), (second.id, 3), (first.id, 1)])
+        self.assertEqual((self.stock(first), self.stock(second)), (2, 4))
+        self.assertEqual(inventory.commit(reference), 2)
+        self.assertEqual(inventory.release(reference), 0)
+        self.assertEqual(self.stock(first), 2)
+
+        reference = inventory.reserve([(first.id, 2)])
+        self.assertEqual(inventory.release(reference), 2)
+        self.assertEqual(inventory.release(reference), 0)
+        self.assertEqual(self.stock(first), 2)
+        with self.assertRaises(ReservationExpired):
+            inventory.commit(reference)
+
+    def test_insufficient_stock_holds_nothing(self):
+        first, empty = self.products[5], self.products[0]
+        with self.assertRaises(InsufficientStock) as raised:
+            inventory.reserve([(first.id, 2), (empty.id, 1)])
+        self.assertEqual(raised.exception.product_ids, [empty.id])
+        self.assertEqual(self.stock(first), 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_expired_reservations_return_stock(self):
+        product = self.products[4]
+        reference = inventory.reserve([(product.id, 4)], ttl=timedelta(seconds=-1))
+        with self.assertRaises(ReservationExpired):
+            inventory.commit(reference)
+        self.assertEqual(inventory.expire(), 4)
+        self.assertEqual(self.stock(product), 4)
+
+    def test_reservation_invalidates_catalog_cache(self):
+        product = self.products[3]
+        self.client.get(f"/api/products/{product.id}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.reserve([(product.id, 3)])
+        response = self.client.get(f"/api/products/{product.id}/")
+        self.assertEqual(response.data["product"]["stock_quantity"], 0)
+
+    def test_memory_stand_in_never_oversells(self):
+        stand_in = MemoryInventory({1: 50, 2: 50})
+        totals = run_stress(stand_in, [1, 2], threads=8, attempts=100)
+        for product_id in (1, 2):
+            self.assertGreaterEqual(stand_in.stock[product_id], 0)
+            self.assertEqual(stand_in.stock[product_id] + totals["taken"][product_id], 50)
+        self.assertGreater(totals["rejected"], 0)
+
+    def load_admin_form(self, product):
+        """Logged-in admin client, change URL and the form data as loaded"""
+        admin = get_user_model().objects.create_superuser(
+            email="root@example.com", username="root", password="x"
+        )
+        client = Client()
+        client.force_login(admin)
+        url = f"/admin/products/product/{product.id}/change/"
+        response = client.get(url)
+        self.assertContains(response, 'name="initial-stock_quantity"')
+        form = response.context["adminform"].form
+        data = {
+            name: "" if form[name].value() is None else form[name].value()
+            for name in form.fields
+        }
+        data["initial-stock_quantity"] = form["stock_quantity"].value()
+        return client, url, data
+
+    def test_admin_stock_edit_is_relative(self):
+        product = self.products[10]
+        client, url, data = self.load_admin_form(product)
+        inventory.reserve([(product.id, 3)])
+        with mock.patch("products.signals.schedule_refresh") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(url, {**data, "stock_quantity": 5})
+        self.assertEqual(response.status_code, 302)
+        # Loaded at 10 and set to 5 while 3 were reserved
+        self.assertEqual(self.stock(product), 2)
+        refresh.assert_not_called()
+
+    def test_admin_stock_edit_never_goes_negative(self):
+        product = self.products[10]
+        client, url, data = self.load_admin_form(product)
+        inventory.reserve([(product.id, 8)])
+        client.post(url, {**data, "stock_quantity": 0, "price": "1.00"})
+        product.refresh_from_db()
+        self.assertEqual((product.stock_quantity, product.price), (0, Decimal("1.00")))
+
+
+class CatalogTests(ProductTestMixin, TestCase):
+    """Chunked bulk import/export in CSV and JSONL"""
+
+    def test_round_trip(self):
+        for file_format in ["csv", "jsonl"]:
+            text = "".join(export_lines(file_format, chunk_size=5))
+            Product.objects.update(price=Decimal("1.00"))
+            totals = import_catalog(io.StringIO(text), file_format, chunk_size=5)
+            self.assertEqual((totals["rows"], totals["updated"]), (12, 12), file_format)
+            self.assertEqual(len(totals["chunks"]), 3)
+            self.assertEqual(
+                Product.objects.get(id=self.products[3].id).price, Decimal("103.00")
+            )
+
+    def test_creates_categories_and_reports_errors(self):
+        rows = [
+            {"name": "Kettle", "description": "steel", "price": "30.00", "category": "Kitchen"},
+            {"name": "Pan", "description": "iron", "price": "oops", "category": "Kitchen"},
+            {"name": "Bowl", "description": "clay", "price": "5", "category": ""},
+            {"name": "Whisk", "description": "wire", "price": "4.50", "category": "Books",
+             "stock_quantity": "7", "is_active": "no"},
+        ]
+        stream = io.StringIO("".join(json.dumps(row) + "\n" for row in rows) + "{bad\n")
+        reports = []
+        with self.captureOnCommitCallbacks(execute=True):
+            totals = import_catalog(
+                stream, "jsonl", chunk_size=2, on_chunk=lambda r, t: reports.append(r)
+            )
+        self.assertEqual((totals["created"], totals["failed"]), (2, 3))
+        self.assertEqual(
+            [error["line"] for report in reports for error in report["errors"]], [2, 3, 5]
+        )
+        whisk = Product.objects.get(name="Whisk")
+        self.assertEqual((whisk.category, whisk.stock_quantity, whisk.is_active), (self.books, 7, False))
+        self.assertTrue(Category.objects.filter(name="Kitchen").exists())
+        # Bulk writes bypass signals, so the import refreshes the search index
+        self.assertEqual(
+            self.client.get("/api/products/", {"search": "kettle"}).data["count"], 1
+        )
+
+    def test_missing_fields_reported_by_line(self):
+        rows = [
+            {
+                "name": "Kettle",
+                "description": "steel",
+                "price": "30.00",
+                "category": "Kitchen",
+            },
+            {"name": "Pan", "description": "iron", "category": "Kitchen"},
+            # Optional columns left out still go through validation
+            {"name": "Wok", "price": "20.00", "category": "Kitchen"},
+        ]
+        stream = io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+        reports = []
+        with self.captureOnCommitCallbacks(execute=True):
+            totals = import_catalog(
+                stream, "jsonl", on_chunk=lambda r, t: reports.append(r)
+            )
+        self.assertEqual((totals["created"], totals["failed"]), (1, 2))
+        self.assertEqual(
+            reports[0]["errors"],
+            [
+                {"line": 2, "errors": ["Missing required fields: price."]},
+                {"line": 3, "errors": ["This field cannot be blank."]},
+            ],
+        )
+        kettle = Product.objects.get(name="Kettle")
+        self.assertEqual((kettle.stock_quantity, kettle.is_active), (0, True))
+
+    def test_rejected_chunk_creates_no_categories(self):
+        rows = [
+            {"name": name, "description": "tool", "price": "9.00", "category": "Garden"}
+            for name in ("Rake", "Hoe")
+        ]
+        stream = io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+        with mock.patch.object(
+            Product.objects, "bulk_create", side_effect=DatabaseError("disk full")
+        ):
+            totals = import_catalog(stream, "jsonl")
+        self.assertEqual(totals["failed"], 2)
+        self.assertFalse(Category.objects.filter(name="Garden").exists())
+
+    def test_commands(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as target:
+            call_command("export_catalog", target.name, stdout=io.StringIO())
+            Product.objects.filter(id=self.products[0].id).delete()
+            out = io.StringIO()
+            call_command("import_catalog", target.name, "--chunk-size", "4", stdout=out)
+        self.assertIn("1 created, 11 updated, 0 failed", out.getvalue())
+        self.assertEqual(Product.objects.count(), 12)
+
+    def test_api_is_admin_only(self):
+        self.assertEqual(self.client.get("/api/catalog/export/").status_code, 401)
+        admin = get_user_model().objects.create_user(
+            email="admin@example.com", username="admin", password="x", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get("/api/catalog/export/", {"type": "jsonl"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(json.loads(lines[0])["category"], "Electronics")
+
+        upload = SimpleUploadedFile(
+            "catalog.csv",
+            b"name,description,price,category\nLamp,bright,9.99,Books\n,x,1,Books\n",
+        )
+        response = self.client.post("/api/catalog/import/", {"file": upload})
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertEqual(response.data["errors"][0]["line"], 3)
+
+
+class BulkWriteTests(ProductTestMixin, TestCase):
+    """Batched create/update/adjust_stock operations on ProductViewSet"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email="warehouse@example.com",
+            username="warehouse",
+            password="x",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_staff_only(self):
+        customer = get_user_model().objects.create_user(
+            email="customer@example.com", username="customer", password="x"
+        )
+        self.client.force_authenticate(customer)
+        operation = {"op": "adjust_stock", "id": self.products[3].id, "delta": 5}
+        self.assertEqual(self.post([operation]).status_code, 403)
+        self.products[3].refresh_from_db()
+        self.assertEqual(self.products[3].stock_quantity, 3)
+
+    def post(self, operations, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/products/bulk/", {"operations": operations, **extra}, format="json"
+            )
+
+    def test_mixed_batch(self):
+        first, second = self.products[3], self.products[4]
+        response = self.post(
+            [
+                {
+                    "op": "create",
+                    "data": {
+                        "name": "Solar lantern",
+                        "description": "camping",
+                        "price": "25.00",
+                        "category": self.books.id,
+                    },
+                },
+                {
+                    "op": "update",
+                    "id": first.id,
+                    "data": {"price": "9.50", "category": self.electronics.id},
+                },
+                {"op": "adjust_stock", "id": second.id, "delta": -4},
+                {"op": "adjust_stock", "id": first.id, "delta": 2},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 2))
+        self.assertEqual(
+            [result["op"] for result in response.data["results"]],
+            ["create", "update", "adjust_stock", "adjust_stock"],
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(
+            (first.price, first.category, first.stock_quantity),
+            (Decimal("9.50"), self.electronics, 5),
+        )
+        self.assertEqual(second.stock_quantity, 0)
+        # The batch was fanned out to the search index and the response cache
+        created_id = response.data["results"][0]["id"]
+        found = self.client.get("/api/products/", {"search": "lantern"}).data["results"]
+        self.assertEqual([item["id"] for item in found], [created_id])
+        # Moving categories re-ranked the product among its new neighbors
+        self.assertTrue(
+            ProductRecommendation.objects.filter(
+                product=first, neighbor__category=self.electronics
+            ).exists()
+        )
+
+    def test_query_count_does_not_grow_with_operations(self):
+        def run(products):
+            operations = [
+                {"op": "adjust_stock", "id": product.id, "delta": 1} for product in products
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.post(operations)
+            return len(queries)
+
+        self.assertEqual(run(self.products[:2]), run(self.products))
+
+    def test_invalid_item_rejects_atomic_batch(self):
+        product = self.products[2]
+        response = self.post(
+            [
+                {"op": "adjust_stock", "id": product.id, "delta": 1},
+                {"op": "adjust_stock", "id": product.id, "delta": -10},
+                {"op": "update", "id": 999999, "data": {"price": "1.00"}},
+                {
+                    "op": "create",
+                    "data": {"name": "No price", "description": "x", "category": 999999},
+                },
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        results = response.data["results"]
+        self.assertNotIn("errors", results[0])
+        self.assertIn("delta", results[1]["errors"])
+        self.assertIn("id", results[2]["errors"])
+        self.assertEqual(set(results[3]["errors"]), {"price", "category"})
+        product.refresh_from_db()
+        self.assertEqual(product.stock_quantity, 2)
+
+    def test_non_atomic_batch_applies_valid_items(self):
+        product = self.products[2]
+        response = self.post(
+            [
+                {"op": "adjust_stock", "id": product.id, "delta": 3},
+                {"op": "update", "id": product.id, "data": {"price": "-"}},
+            ],
+            atomic=False,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["updated"], response.data["failed"]), (1, 1))
+        product.refresh_from_db()
+        self.assertEqual(product.stock_quantity, 5)
+
+    def test_malformed_operations(self):
+        response = self.post([{"op": "update", "data": {}}, {"op": "explode"}])
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post([{"op": "create", "data": {}}]).status_code, 401)
+
+
+class CompiledSerializationTests(ProductTestMixin, TestCase):
+    """Compiled rows and the orjson renderer produce the same bytes"""
+
+    def fetch(self, compiled, url, params):
+        cache.clear()
+        with self.settings(PRODUCT_COMPILED_SERIALIZATION=compiled):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_matches_serializer_output(self):
+        Product.objects.create(
+            name="Caf\u00e9 \u2028 \"mug\" \U0001f375",
+            description="unicode",
+            price=Decimal("7.5"),
+            category=self.books,
+            image_url="https://example.com/mug.png",
+        )
+        cases = [
+            ("/api/products/", {}),
+            ("/api/products/", {"ordering": "price", "page_size": 5, "page": 2}),
+            ("/api/products/", {"search": "gadget"}),
+            ("/api/products/", {"cursor": "", "ordering": "-price", "page_size": 4}),
+            ("/api/products/by_category/", {"category_id": self.books.id}),
+        ]
+        for url, params in cases:
+            expected = self.fetch(False, url, params)
+            self.assertEqual(self.fetch(True, url, params), expected, (url, params))
+
+        # Follow a cursor so the seek value is read from compiled rows
+        next_url = self.client.get(
+            "/api/products/", {"cursor": "", "ordering": "name", "page_size": 4}
+        ).data["next"]
+        self.assertEqual(self.fetch(True, next_url, {}), self.fetch(False, next_url, {}))
+
+    def test_only_plain_serializers_compile(self):
+        computed = (("is_in_stock", ("stock_quantity",)),)
+        self.assertIsNotNone(compile_serializer(ProductListSerializer, computed))
+        # stock_status is a SerializerMethodField
+        self.assertIsNone(compile_serializer(ProductDetailSerializer))
+
+    def test_renderer_matches_json_renderer(self):
+        from rest_framework.exceptions import ErrorDetail
+        from rest_framework.renderers import JSONRenderer
+
+        data = {
+            "text": "line\u2028sep\u2029 \u00e9 \U0001f600 \"q\" \\ \x01",
+            "when": timezone.now(),
+            "day": timezone.now().date(),
+            "price": Decimal("12.30"),
+            "error": ErrorDetail("bad", code="invalid"),
+            1: [True, None, 3, 2.5, (4, 5)],
+        }
+        # orjson, the indented stdlib path, and the fallback for wide integers
+        for media_type, extra in [
+            (None, {}),
+            ("application/json; indent=2", {}),
+            (None, {"huge": 2**70}),
+        ]:
+            self.assertEqual(
+                FastJSONRenderer().render(data | extra, media_type),
+                JSONRenderer().render(data | extra, media_type),
+            )
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+
+@override_settings(PRODUCT_RECOMMENDATIONS={"BACKGROUND": False})
+class InventoryConcurrencyTests(TransactionTestCase):
+    """Threads racing on the real database never take stock below zero"""
+
+    def test_database_never_oversells(self):
+        category = Category.objects.create(name="Stress")
+        products = [
+            Product.objects.create(
+                name=f"Stress {i}",
+                description="stress",
+                price=Decimal("1.00"),
+                category=category,
+                stock_quantity=40,
+            )
+            for i in range(2)
+        ]
+        ids = [product.id for product in products]
+        totals = run_stress(DatabaseInventory(), ids, threads=4, attempts=30)
+        stock = dict(Product.objects.values_list("id", "stock_quantity"))
+        for product_id in ids:
+            self.assertGreaterEqual(stock[product_id], 0)
+            self.assertEqual(stock[product_id] + totals["taken"][product_id], 40)
+        self.assertGreater(totals["rejected"], 0)
@@ -3,6 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .async_views import AsyncProductViewSet
 
 router = DefaultRouter()
 router.register(r"products", views.ProductViewSet)
@@ -10,4 +11,33 @@ router.register(r"categories", views.CategoryViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("cache/stats/", views.cache_stats, name="cache_stats"),
+    path("catalog/export/", views.export_catalog, name="catalog_export"),
+    path("catalog/import/", views.import_catalog_file, name="catalog_import"),
+    # Async (ASGI) catalog reads, see products/async_views.py
+    path(
+        "async/products/",
+        AsyncProductViewSet.as_async_view("list"),
+        name="async-product-list",
+    ),
+    path(
+        "async/products/featured/",
+        AsyncProductViewSet.as_async_view("featured"),
+        name="async-product-featured",
+    ),
+    path(
+        "async/products/search_suggestions/",
+        AsyncProductViewSet.as_async_view("search_suggestions"),
+        name="async-product-search-suggestions",
+    ),
+    path(
+        "async/products/<pk>/",
+        AsyncProductViewSet.as_async_view("retrieve"),
+        name="async-product-detail",
+    ),
+    path(
+        "async/products/<pk>/similar/",
+        AsyncProductViewSet.as_async_view("similar"),
+        name="async-product-similar",
+    ),
 ]
@@ -1,121 +1,399 @@
 from rest_framework import viewsets, filters, status
-from rest_framework.decorators import action
+from rest_framework.decorators import (
+    action,
+    api_view,
+    parser_classes,
+    permission_classes,
+)
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Product, Category
+import hashlib
+import io
+from decimal import Decimal
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from .models import Product, Category, ProductRecommendation
+from .cache import (
+    cache_many,
+    cache_response,
+    conditional_response,
+    stats as cache_stats_counters,
+)
+from .compiled import compile_serializer, compiled_serialization_enabled
+from .catalog import FORMATS, CatalogError, export_lines, guess_format, import_catalog
+from .featured import VERSION_LABEL as FEATURED_VERSION, featured_set
+from .fieldsets import SparseFieldsetMixin, readable_fields
+from .filters import ProductSearchFilter
+from .pagination import ProductPagination
+from .search import get_search_index
+from .suggestions import get_suggestion_index
 from .serializers import (
+    COMPUTED_FIELD_DEPENDENCIES,
+    ProductBulkSerializer,
     ProductSerializer,
     ProductListSerializer,
     ProductDetailSerializer,
     RelatedProductSerializer,
     CategorySerializer,
+    shape_queryset,
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Actions that only read rows; write actions keep full instances
+READ_ACTIONS = {"list", "retrieve", "by_category", "featured", "similar", "batch"}
+
+# Most ids one batch lookup resolves
+MAX_BATCH_IDS = 250
+
+
+def get_compiled_serializer(serializer_class):
+    """CompiledSerializer for a read serializer, if enabled and compilable"""
+    if not compiled_serialization_enabled():
+        return None
+    computed = tuple(
+        (name, tuple(columns)) for name, columns in COMPUTED_FIELD_DEPENDENCIES.items()
+    )
+    return compile_serializer(serializer_class, computed)
+
+
+class CategoryViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    sparse_actions = {"list", "retrieve"}
+
+    def get_queryset(self):
+        return shape_queryset(super().get_queryset(), self.get_serializer_class())
+
+    @conditional_response(Category)
+    @cache_response(Category)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response(Category)
+    @cache_response(Category)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
+    pagination_class = ProductPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        ProductSearchFilter,
     ]
-    filterset_fields = ["category", "is_active"]
+    filterset_fields = {
+        "category": ["exact"],
+        "is_active": ["exact"],
+        "price": ["gte", "lte"],
+    }
     search_fields = ["name", "description"]
     ordering_fields = ["price", "created_at", "name"]
     ordering = ["-created_at"]
+    sparse_actions = READ_ACTIONS
+    include_options = {"retrieve": ("related", "breadcrumb")}
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
-        if self.action == "list":
-            return ProductListSerializer
+        if self.action in ("list", "by_category", "featured", "batch"):
+            serializer_class = ProductListSerializer
         elif self.action == "retrieve":
-            return ProductDetailSerializer
-        return ProductSerializer
+            serializer_class = ProductDetailSerializer
+        elif self.action == "similar":
+            serializer_class = RelatedProductSerializer
+        else:
+            serializer_class = ProductSerializer
+        return self.narrow_serializer_class(serializer_class)
+
+    def get_queryset(self):
+        """Shape the queryset to the joins and columns the action serializes"""
+        return shape_queryset(
+            super().get_queryset(),
+            self.get_serializer_class(),
+            narrow=self.action in READ_ACTIONS,
+        )
+
+    def get_related_queryset(self, serializer_class=RelatedProductSerializer):
+        """Base queryset for related/similar product lookups"""
+        return shape_queryset(Product.objects.filter(is_active=True), serializer_class)
 
+    def get_recommended_queryset(self, product_id, kind, limit, serializer_class=None):
+        """Precomputed neighbors of a product, in rank order"""
+        return (
+            self.get_related_queryset(serializer_class or RelatedProductSerializer)
+            .filter(
+                recommended_for__product_id=product_id,
+                recommended_for__kind=kind,
+            )
+            .order_by("recommended_for__rank")[:limit]
+        )
+
+    def get_recommended(self, product, kind, limit, serializer_class=None):
+        return list(
+            self.get_recommended_queryset(product.id, kind, limit, serializer_class)
+        )
+
+    def get_same_category_queryset(self, product, limit):
+        """Ad-hoc related products until recommendations are built"""
+        return (
+            self.get_related_queryset()
+            .filter(category_id=product.category_id)
+            .exclude(id=product.id)[:limit]
+        )
+
+    def get_price_band_queryset(self, product, limit, serializer_class=None):
+        """Same-category products within 30% of a product's price"""
+        price_min = product.price * Decimal("0.7")  # 30% below
+        price_max = product.price * Decimal("1.3")  # 30% above
+        return (
+            self.get_related_queryset(serializer_class or RelatedProductSerializer)
+            .filter(
+                category_id=product.category_id,
+                price__gte=price_min,
+                price__lte=price_max,
+            )
+            .exclude(id=product.id)[:limit]
+        )
+
+    def get_breadcrumb(self, product):
+        return {
+            "category": product.category.name,
+            "category_id": product.category.id,
+            "product": product.name,
+        }
+
+    def compiled_response(self, compiled, queryset, paginate=True):
+        """Serialize value rows of ``queryset`` with a CompiledSerializer"""
+        rows = compiled.queryset(queryset)
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(rows))
+
+    def list_response(self, queryset):
+        """Paginated list of ``queryset``, compiled when the serializer allows"""
+        compiled = get_compiled_serializer(self.get_serializer_class())
+        if compiled is not None:
+            return self.compiled_response(compiled, queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @conditional_response(Product, Category)
+    @cache_response(Product, Category)
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    @conditional_response(Product, Category)
+    @cache_response(Product, Category)
     def retrieve(self, request, *args, **kwargs):
         """Enhanced detail view with additional context"""
         instance = self.get_object()
         serializer = self.get_serializer(instance)
+        data = {"product": serializer.data}
 
-        # Get related products (same category, excluding current product)
-        related_products = Product.objects.filter(
-            category=instance.category, is_active=True
-        ).exclude(id=instance.id)[
-            :4
-        ]  # Limit to 4 related products
+        if self.wants("related"):
+            # Precomputed related products, or an ad-hoc same-category query
+            # until the recommendation table has been built for this product
+            related_products = self.get_recommended(
+                instance, ProductRecommendation.RELATED, 4
+            ) or self.get_same_category_queryset(
+                instance, 4
+            )  # Limit to 4 related products
 
-        related_serializer = RelatedProductSerializer(related_products, many=True)
+            related_serializer = RelatedProductSerializer(related_products, many=True)
+            data["related_products"] = related_serializer.data
 
-        return Response(
-            {
-                "product": serializer.data,
-                "related_products": related_serializer.data,
-                "breadcrumb": {
-                    "category": instance.category.name,
-                    "category_id": instance.category.id,
-                    "product": instance.name,
-                },
-            }
-        )
+        if self.wants("breadcrumb"):
+            data["breadcrumb"] = self.get_breadcrumb(instance)
+        return Response(data)
 
     @action(detail=False, methods=["get"])
+    @conditional_response(Product, Category)
+    @cache_response(Product, Category)
     def by_category(self, request):
         """Get products by category"""
         category_id = request.query_params.get("category_id")
         if category_id:
-            products = self.queryset.filter(category_id=category_id)
-            serializer = ProductListSerializer(products, many=True)
+            products = self.get_queryset().filter(category_id=category_id)
+            compiled = get_compiled_serializer(self.get_serializer_class())
+            if compiled is not None:
+                return self.compiled_response(compiled, products, paginate=False)
+            serializer = self.get_serializer(products, many=True)
             return Response(serializer.data)
         return Response({"error": "category_id parameter required"}, status=400)
 
+    def serialize_by_id(self, queryset):
+        """Serialize ``queryset`` with the action's serializer, keyed by id"""
+        serializer_class = self.get_serializer_class()
+        compiled = get_compiled_serializer(serializer_class)
+        if compiled is not None:
+            rows = list(compiled.queryset(queryset))
+            return {row.id: data for row, data in zip(rows, compiled.serialize(rows))}
+        products = list(queryset)
+        data = self.get_serializer(products, many=True).data
+        return {product.id: item for product, item in zip(products, data)}
+
     @action(detail=False, methods=["get"])
-    def featured(self, request):
-        """Get featured products (you can customize this logic)"""
-        # For now, return products with high stock or recently added
-        featured_products = self.queryset.filter(
-            Q(stock_quantity__gte=10) | Q(created_at__isnull=False)
-        ).order_by("-created_at")[:6]
+    @conditional_response(Product, Category)
+    def batch(self, request):
+        """Look up many products by id (?ids=1,2,3) in one query"""
+        try:
+            ids = list(
+                dict.fromkeys(
+                    int(value)
+                    for param in request.query_params.getlist("ids")
+                    for value in param.split(",")
+                    if value.strip()
+                )
+            )
+        except ValueError:
+            return Response({"error": "ids must be integers"}, status=400)
+        if not ids:
+            return Response({"error": "ids parameter required"}, status=400)
+        if len(ids) > MAX_BATCH_IDS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_IDS} ids per request"}, status=400
+            )
+
+        # Entries depend on the fieldset, so it is part of the cache namespace
+        fields = ",".join(readable_fields(self.get_serializer_class()))
+        namespace = f"batch:{hashlib.md5(fields.encode()).hexdigest()}"
+        products = cache_many(
+            namespace,
+            ids,
+            lambda missing: self.serialize_by_id(
+                self.get_queryset().filter(id__in=missing).order_by()
+            ),
+            (Product, Category),
+        )
+        return Response(
+            {
+                "products": products,
+                "missing": [pk for pk in ids if pk not in products],
+            }
+        )
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """Apply hundreds of create/update/adjust_stock operations at once"""
+        serializer = ProductBulkSerializer(data=request.data)
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            return Response(serializer.save())
 
-        serializer = ProductListSerializer(featured_products, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=["get"])
+    @conditional_response(
+        Product, Category, FEATURED_VERSION, prepare=featured_set.current
+    )
+    def featured(self, request):
+        """Get featured products from the materialized snapshot"""
+        data = featured_set.data()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            data = fieldset.filter(data)
+        return Response(data)
 
     @action(detail=False, methods=["get"])
     def search_suggestions(self, request):
         """Get search suggestions for autocomplete"""
         query = request.query_params.get("q", "")
         if len(query) >= 2:
-            suggestions = Product.objects.filter(
-                name__icontains=query, is_active=True
-            ).values_list("name", flat=True)[:5]
-            return Response({"suggestions": list(suggestions)})
+            index = get_suggestion_index()
+            suggestions = index.complete(query, limit=5)
+            if suggestions is None:
+                # Trie is cold: answer from the database while it loads
+                index.warm_async()
+                suggestions = get_search_index().suggest(query, limit=5)
+            return Response({"suggestions": suggestions})
         return Response({"suggestions": []})
 
     @action(detail=True, methods=["get"])
+    @conditional_response(Product, Category)
     def similar(self, request, pk=None):
         """Get similar products based on category and price range"""
         try:
             product = self.get_object()
-            price_min = float(product.price) * 0.7  # 30% below
-            price_max = float(product.price) * 1.3  # 30% above
-
-            similar_products = Product.objects.filter(
-                category=product.category,
-                price__gte=price_min,
-                price__lte=price_max,
-                is_active=True,
-            ).exclude(id=product.id)[:6]
+            serializer_class = self.get_serializer_class()
+            similar_products = self.get_recommended(
+                product, ProductRecommendation.SIMILAR, 6, serializer_class
+            )
+            if not similar_products:
+                similar_products = self.get_price_band_queryset(
+                    product, 6, serializer_class
+                )
 
-            serializer = RelatedProductSerializer(similar_products, many=True)
+            serializer = serializer_class(similar_products, many=True)
             return Response(serializer.data)
 
         except Product.DoesNotExist:
             return Response(
                 {"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND
             )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Response cache statistics for this process"""
+    return Response(cache_stats_counters.snapshot())
+
+
+# Import errors returned in the response body; the totals count every failure
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+CATALOG_CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_catalog(request):
+    """Stream the whole catalog as CSV (default) or JSONL (?type=jsonl)"""
+    file_format = request.query_params.get("type", "csv")
+    if file_format not in FORMATS:
+        return Response(
+            {"error": f"type must be one of {FORMATS}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    response = StreamingHttpResponse(
+        export_lines(file_format), content_type=CATALOG_CONTENT_TYPES[file_format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="catalog.{file_format}"'
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_catalog_file(request):
+    """Bulk import an uploaded CSV or JSONL ``file``, chunk by chunk"""
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response(
+            {"error": "Upload a CSV or JSONL file as 'file'"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    file_format = request.data.get("type") or guess_format(upload.name)
+
+    errors = []
+
+    def on_chunk(report, totals):
+        room = MAX_REPORTED_IMPORT_ERRORS - len(errors)
+        errors.extend(report["errors"][: max(room, 0)])
+
+    try:
+        totals = import_catalog(
+            io.TextIOWrapper(upload, encoding="utf-8", newline=""),
+            file_format,
+            on_chunk=on_chunk,
+        )
+    except (CatalogError, UnicodeDecodeError) as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    totals["errors"] = errors
+    return Response(totals)